@@ -93,6 +93,7 @@ class RatingWidget(QWidget):
         self.current_answers = None
         self.current_color = None
         self.selected_ratings = {}
+        self.answer_appender = None
 
     @property
     def path(self):
@@ -198,11 +199,23 @@ class RatingWidget(QWidget):
         self.answer(item, rating, value)
         self.limit_answer(item, answer_radio)
 
+    def set_event_logger(self, events):
+        # Answers are logged straight into the logger so no event is made for each answer
+        if events is None:
+            self.answer_appender = None
+        else:
+            self.answer_appender = events.register_event_type(
+                "Rating_AnswerSelected", {"File": str, "Item": str, "Rating": str, "Value": int})
+
     def answer(self, item, rating, value):
         self.selected_ratings[item] = rating
-        event = {'type_': 'Rating_AnswerSelected', 'File': self.path.name,
-                 'Item': item, 'Rating': rating, 'Value': value}
-        self.answer_action(event=event, caller=self)
+        if self.answer_appender is not None:
+            self.answer_appender(self.path.name, item, rating, value)
+            self.answer_action(caller=self)
+        else:
+            event = {'type_': 'Rating_AnswerSelected', 'File': self.path.name,
+                     'Item': item, 'Rating': rating, 'Value': value}
+            self.answer_action(event=event, caller=self)
 
     def limit_answer(self, item, answer_widget):
         other_answers = self.rating_items[item] - {answer_widget}
@@ -668,9 +668,17 @@ class VideoPlayerWidget(QWidget):
         # self.frameProbe.videoFrameProbed.connect(self.frame)
         self.frameProbe.setSource(self.mediaPlayer)
         self.frame_number = 0
+        self.frame_appender = None
 
         self.video = None
 
+    def set_event_logger(self, events):
+        # Frames are logged straight into the logger so no event is made for each frame
+        if events is None:
+            self.frame_appender = None
+        else:
+            self.frame_appender = events.register_event_type("Video_Frame", {"Video": str, "FrameNumber": int})
+
     def set_video(self, video):
         self.video = video
         if isinstance(video, pathlib.Path) or isinstance(video, str):
@@ -685,8 +693,12 @@ class VideoPlayerWidget(QWidget):
 
     def frame(self, frame):
         self.frame_number += 1
-        event = {'type_': 'Video_Frame', 'Video': self.video.name, 'FrameNumber': self.frame_number}
-        self.frame_action(frame, self.frame_number, event=event, caller=self)
+        if self.frame_appender is not None:
+            self.frame_appender(self.video.name, self.frame_number)
+            self.frame_action(frame, self.frame_number, caller=self)
+        else:
+            event = {'type_': 'Video_Frame', 'Video': self.video.name, 'FrameNumber': self.frame_number}
+            self.frame_action(frame, self.frame_number, event=event, caller=self)
 
     def default_frame(self, frame=None, number=None, event=None, caller=None):
         print(QtCore.QTime.currentTime().toString("hh:mm:ss.zzzz"))
@@ -20,6 +20,7 @@ from bidict import bidict
 from PySide2.QtWidgets import QMainWindow, QHBoxLayout, QStackedWidget
 
 # Local Libraries #
+from ..utility.ioscheduler import prefetch_file
 
 
 # Definitions #
@@ -126,10 +127,11 @@ class WidgetContainer(ABC):
 
 
 class WidgetContainerSequencer:
-    def __init__(self):
+    def __init__(self, scheduler=None):
         self.index = None
         self.sequence = []
         self.loop = False
+        self.scheduler = scheduler
 
     def __len__(self):
         return len(self.sequence)
@@ -180,7 +182,35 @@ class WidgetContainerSequencer:
     def run_current(self):
         widget = self.sequence[self.index]["widget"]
         kwargs = self.sequence[self.index]["kwargs"]
-        return widget.run(**kwargs)
+        if self.scheduler is None:
+            return widget.run(**kwargs)
+
+        # Deferred IO runs once an idle phase is showing, which keeps it away from timing critical phases
+        self.scheduler.enter(widget)
+        output = widget.run(**kwargs)
+        if not self.scheduler.is_critical:
+            self.scheduler.drain()
+        return output
+
+    def add_phases(self, widgets):
+        if self.scheduler is not None:
+            self.scheduler.add_phases(widgets)
+
+    def prefetch_next(self, widget):
+        # The next file is read ahead now if this phase is idle, otherwise once an idle phase starts
+        if self.scheduler is None or len(self.sequence) == 0:
+            return
+        next_widget, kwargs, _ = self.next()
+        if next_widget is widget and 'path' in kwargs:
+            self.scheduler.submit(('prefetch', kwargs['path']), prefetch_file, kwargs['path'])
+
+    def finish(self, events=None):
+        # Ends the session, the deferred IO is run before the log is closed so none of it is lost
+        if self.scheduler is not None:
+            self.scheduler.set_phase(None)
+            self.scheduler.drain()
+        if events is not None:
+            events.close()
 
     def start(self):
         self.index = 0
@@ -25,8 +25,8 @@ from PySide2.QtGui import QKeySequence
 from PySide2.QtWidgets import QWidget, QAction, QFileDialog, QAbstractItemView, QStyle
 
 # Local Libraries #
-from ...utility import AudioTrigger, SubjectEventLogger
-from ...QtUtility import WidgetContainer, WidgetContainerSequencer, TaskWindow
+from ...QtUtility import WidgetContainer
+from ..emotiontask import EmotionTask
 from ..emotionwidgets import EmotionInstructions, EmotionWashout, EmotionQuestionnaire, EmotionFinish, EmotionVideoPlayer
 from .UI.emotionparameters import Ui_EmotionParameters
 from ..UI.emotioncontrol import Ui_EmotionControl
@@ -34,24 +34,12 @@ from ..UI.emotioncontrol import Ui_EmotionControl
 
 # Definitions #
 # Classes #
-class EmotionCategorizationTask:
+class EmotionCategorizationTask(EmotionTask):
     EXPERIMENT_NAME = "Emotion Categorization"
+    TRIGGER_WAVE = {'amplitude': 5, 'samples': 22000, 'channels': 1}
 
-    def __init__(self, parent=None, stack=None, r_widget=None):
-        self.parent = parent
-        self.widget_stack = stack
-        self.return_widget = r_widget
-
-        self.trigger = AudioTrigger()
-        self.trigger.audio_device.device = 3
-        self.trigger.add_square_wave('square_wave', amplitude=5, samples=22000, channels=1)
-        self.trigger.current_waveform = 'square_wave'
-
-        self.task_window = TaskWindow()
-        self.events = SubjectEventLogger(io_trigger=self.trigger)
-        
-        self.sequencer = WidgetContainerSequencer()
-        self.task_window.sequencer = self.sequencer
+    def __init__(self, parent=None, stack=None, r_widget=None, output_root=None, archive_root=None):
+        super().__init__(parent, stack, r_widget, output_root, archive_root)
 
         self.parameters = EmotionParameters()
         self.control = EmotionControl(events=self.events, x_name=self.EXPERIMENT_NAME)
@@ -63,6 +51,7 @@ class EmotionCategorizationTask:
 
         self.block_widgets = {'instructions': self.instructions, 'video_player': self.video_player,
                               'questionnaire': self.questionnaire, 'washout': self.washout, 'finish': self.finished}
+        self.sequencer.add_phases(self.block_widgets)
         self.sequence_order = ['instructions', '*block*', 'washout', 'finish']
         self.block_order = ['washout', 'video_player', 'questionnaire']
 
@@ -796,6 +785,7 @@ class ControlWidget(QWidget):
     def advance(self, event=None, caller=None):
         self.events.append(**event)
         next(self.sequencer)
+        self.sequencer.prefetch_next(self.block_widgets['video_player'])
 
     def advance_trigger(self, event=None, caller=None):
         event = {'SubType': event["type_"]}
@@ -857,6 +847,8 @@ class ControlWidget(QWidget):
             self.sequencer.clear()
             event = {'type_': 'ManualStop'}
             self.events.append(**event)
+            # The session ends here, so its log is closed and handed to the archiver before the logger is reset
+            self.sequencer.finish(self.events)
             self.running = False
             self.reset()
             self.ui.startButton.setEnabled(True)
@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" emotiontask.py
+Description:
+"""
+__author__ = "Anthony Fong"
+__copyright__ = "Copyright 2019, Anthony Fong"
+__credits__ = ["Anthony Fong"]
+__license__ = ""
+__version__ = "1.0.0"
+__maintainer__ = "Anthony Fong"
+__email__ = ""
+__status__ = "Prototype"
+
+# Default Libraries #
+
+# Downloaded Libraries #
+
+# Local Libraries #
+from ..utility.iotriggers import AudioTrigger
+from ..utility.eventlogger import SubjectEventLogger
+from ..utility.ioscheduler import IOScheduler
+from ..utility.logarchiver import LogArchiver
+from ..QtUtility.utilitywidgets import WidgetContainerSequencer
+from ..QtUtility.taskwidgets import TaskWindow
+
+
+# Definitions #
+# Classes #
+class EmotionTask:
+    EXPERIMENT_NAME = None
+    TRIGGER_WAVE = {'amplitude': 5, 'samples': 22000}
+
+    def __init__(self, parent=None, stack=None, r_widget=None, output_root=None, archive_root=None):
+        self.parent = parent
+        self.widget_stack = stack
+        self.return_widget = r_widget
+
+        self.trigger = AudioTrigger()
+        self.trigger.audio_device.device = 3
+        self.trigger.add_square_wave('square_wave', **self.TRIGGER_WAVE)
+        self.trigger.current_waveform = 'square_wave'
+
+        self.task_window = TaskWindow()
+        self.scheduler = IOScheduler()
+        self.archiver = LogArchiver(staging=output_root, archive=archive_root)
+        self.events = SubjectEventLogger(io_trigger=self.trigger, io_scheduler=self.scheduler, archiver=self.archiver)
+
+        self.sequencer = WidgetContainerSequencer(scheduler=self.scheduler)
+        self.task_window.sequencer = self.sequencer
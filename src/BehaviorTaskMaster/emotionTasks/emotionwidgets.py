@@ -251,7 +251,9 @@ class EmotionQuestionnaire(WidgetContainer):
         self.events.append(type_="General", **event)
 
     def answer_selected(self, event=None, caller=None):
-        self.events.append(**event)
+        # Widgets with an event logger have already logged the answer
+        if event is not None:
+            self.events.append(**event)
 
 
 class EmotionQuestionnaireImage(EmotionQuestionnaire):
@@ -381,6 +383,7 @@ class EmotionRating(WidgetContainer):
             self.widget.finish_action(event=event, caller=self)
         else:
             self.widget.load_file(self.path)
+            self.widget.set_event_logger(self.events)
             event = {'SubType': 'RatingsStart'}
             super().run()
             # self.events.trigger_event(**event)
@@ -401,7 +404,9 @@ class EmotionRating(WidgetContainer):
         self.events.append(type_="General", **event)
 
     def answer_selected(self, event=None, caller=None):
-        self.events.append(**event)
+        # Widgets with an event logger have already logged the answer
+        if event is not None:
+            self.events.append(**event)
 
 
 class EmotionFinish(WidgetContainer):
@@ -573,6 +578,7 @@ class EmotionVideoPlayer(WidgetContainer):
             self.finish_action = finish_action
 
         self.load_video()
+        self.widget.set_event_logger(self.events)
         event = {'SubType': 'VideoStart'}
         super().run()
         # self.events.trigger_event(**event)
@@ -587,5 +593,7 @@ class EmotionVideoPlayer(WidgetContainer):
 
     def frame_process(self, frame=None, number=None, event=None, caller=None):
         # could use frame metadata if is exists: print(frame.metaData(str_name))
-        self.events.append(**event)
+        # Widgets with an event logger have already logged the frame
+        if event is not None:
+            self.events.append(**event)
         # print(self.events[-1])
@@ -15,5 +15,10 @@ __email__ = __email__
 # Imports #
 # Local Packages #
 from .audiodevice import AudioDevice
-from .eventlogger import SubjectEventLogger, EventLoggerCSV
+from .eventjournal import EventJournal
+from .eventlogger import SubjectEventLogger, EventLoggerCSV, HDF5eventTailer, HDF5flushPolicy, HDF5storageConfig
+from .eventlogger import HDF5durabilityConfig, HDF5segmentConfig
+from .eventpublisher import EventPublisher, EventSubscriber
+from .ioscheduler import IOScheduler
+from .logarchiver import LogArchiver
 from .iotriggers import IndexableDict, AudioTrigger
@@ -0,0 +1,359 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" eventjournal.py
+Description: An append only binary journal of events which can be replayed into an event log after a crash.
+"""
+__author__ = "Anthony Fong"
+__copyright__ = "Copyright 2019, Anthony Fong"
+__credits__ = ["Anthony Fong"]
+__license__ = ""
+__version__ = "1.0.0"
+__maintainer__ = "Anthony Fong"
+__email__ = ""
+__status__ = "Prototype"
+
+# Default Libraries #
+import datetime
+import json
+import numbers
+import os
+import pathlib
+import struct
+import time
+import uuid
+import zlib
+from warnings import warn
+
+# Downloaded Libraries #
+
+# Local Libraries #
+
+
+# Definitions #
+# Constants #
+MAGIC = b"BTMJRNL\x01"
+FRAME = struct.Struct("<II")
+SCHEMA_HEADER = struct.Struct("<BH")
+EVENT_HEADER = "<BHddd16s"
+STRING_LENGTH = struct.Struct("<I")
+SCHEMA_RECORD = 1
+EVENT_RECORD = 2
+FIELD_FORMATS = {"i": "q", "f": "d"}
+
+
+# Classes #
+class JournalSchema(object):
+    # Instantiation, Copy, Destruction
+    def __init__(self, code=0, name="", fields=(), init=True):
+        self.code = code
+        self.name = name
+        self.fields = []
+        self.numeric = []
+        self.strings = []
+        self.header = None
+
+        if init:
+            self.construct(code, name, fields)
+
+    # Constructors
+    def construct(self, code, name, fields):
+        self.code = code
+        self.name = name
+        self.fields = [tuple(field) for field in fields]
+        self.numeric = [(name, kind) for name, kind in self.fields if kind in FIELD_FORMATS]
+        self.strings = [name for name, kind in self.fields if kind not in FIELD_FORMATS]
+        self.numeric_index = [i for i, (_, kind) in enumerate(self.fields) if kind in FIELD_FORMATS]
+        self.string_index = [i for i, (_, kind) in enumerate(self.fields) if kind not in FIELD_FORMATS]
+        self.header = struct.Struct(EVENT_HEADER + "".join(FIELD_FORMATS[kind] for _, kind in self.numeric))
+
+    # Encoding
+    def encode_schema(self):
+        return SCHEMA_HEADER.pack(SCHEMA_RECORD, self.code) + \
+            json.dumps({"name": self.name, "fields": self.fields}).encode("utf-8")
+
+    def encode(self, times, link, event):
+        values = []
+        for name, kind in self.numeric:
+            value = event.get(name, 0)
+            if isinstance(value, datetime.datetime):
+                value = value.timestamp()
+            values.append(value)
+        payload = [self.header.pack(EVENT_RECORD, self.code, *times, link, *values)]
+        for name in self.strings:
+            value = str(event.get(name, "")).encode("utf-8")
+            payload.append(STRING_LENGTH.pack(len(value)))
+            payload.append(value)
+        return b"".join(payload)
+
+    def encode_values(self, times, link, values):
+        # The values are given in the order of the fields, as an appender logs them
+        payload = [self.header.pack(EVENT_RECORD, self.code, *times, link, *(values[i] for i in self.numeric_index))]
+        for i in self.string_index:
+            value = str(values[i]).encode("utf-8")
+            payload.append(STRING_LENGTH.pack(len(value)))
+            payload.append(value)
+        return b"".join(payload)
+
+    def decode(self, payload):
+        values = self.header.unpack_from(payload)
+        offset = self.header.size
+        event = dict(zip((name for name, _ in self.numeric), values[6:]))
+        for name in self.strings:
+            length, = STRING_LENGTH.unpack_from(payload, offset)
+            offset += STRING_LENGTH.size
+            event[name] = payload[offset:offset + length].decode("utf-8")
+            offset += length
+        return values[2:5], values[5], event
+
+
+class EventCodec(object):
+    # Frames records by their length and crc so a torn or partial record is detected and left for later
+    # Instantiation, Copy, Destruction
+    def __init__(self, time_names=("Time", "DeltaTime", "StartTime"), type_name="Type", link_name="LinkID"):
+        self.time_names = time_names
+        self.type_name = type_name
+        self.link_name = link_name
+        self.schemas = {}
+        self.schema_count = 0
+        self.decode_schemas = {}
+        self.unknown_count = 0
+
+    # Schemas
+    def event_fields(self, event):
+        return [(key, field_kind(value)) for key, value in event.items()
+                if key not in self.time_names and key != self.type_name and key != self.link_name]
+
+    def add_schema(self, event, fields=None):
+        if fields is None:
+            fields = self.event_fields(event)
+        schema = JournalSchema(self.schema_count, event[self.type_name], fields)
+        self.schemas[schema.name] = schema
+        self.schema_count += 1
+        return schema
+
+    def require_schema(self, event):
+        # Returns the schema of the event's type and whether it is new, a type whose fields changed gets a new schema
+        schema = self.schemas.get(event[self.type_name])
+        if schema is None:
+            return self.add_schema(event), True
+
+        kinds = dict(schema.fields)
+        fields = self.event_fields(event)
+        if all(key in kinds and widen_kind(kinds[key], kind) == kinds[key] for key, kind in fields):
+            return schema, False
+
+        for key, kind in fields:
+            kinds[key] = widen_kind(kinds[key], kind) if key in kinds else kind
+        return self.add_schema(event, list(kinds.items())), True
+
+    def require_value_schema(self, name, fields):
+        # Returns the schema of a type logged from positional values and whether it is new, fields are name kind pairs
+        schema = self.schemas.get(name)
+        if schema is not None and schema.fields == fields:
+            return schema, False
+        return self.add_schema({self.type_name: name}, fields), True
+
+    def schema_frames(self):
+        return b"".join(self.frame(schema.encode_schema()) for schema in self.schemas.values())
+
+    def clear(self):
+        self.schemas.clear()
+        self.schema_count = 0
+        self.decode_schemas.clear()
+
+    # Encoding
+    @staticmethod
+    def frame(payload):
+        return FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+
+    def encode(self, event):
+        # Returns the framed event, preceded by the schema of its type whenever the type gets a new schema
+        schema, new = self.require_schema(event)
+        frames = self.frame(schema.encode_schema()) if new else b""
+
+        times = []
+        for name in self.time_names:
+            value = event.get(name, 0.0)
+            times.append(value.timestamp() if isinstance(value, datetime.datetime) else value)
+        link = event.get(self.link_name)
+        if link is None:
+            link = bytes(16)
+        elif not isinstance(link, uuid.UUID):
+            link = uuid.UUID(link).bytes
+        else:
+            link = link.bytes
+        return frames + self.frame(schema.encode(times, link, event))
+
+    def encode_values(self, name, fields, times, values):
+        # Encodes an event from its positional values without making a dict of it, it has no LinkID yet
+        schema, new = self.require_value_schema(name, fields)
+        frames = self.frame(schema.encode_schema()) if new else b""
+        return frames + self.frame(schema.encode_values(times, bytes(16), values))
+
+    # Decoding
+    def decode(self, data, offset=0):
+        # Returns the decoded events, the offset after the last whole record and whether a corrupt record was found
+        events = []
+        while offset + FRAME.size <= len(data):
+            length, crc = FRAME.unpack_from(data, offset)
+            payload = data[offset + FRAME.size:offset + FRAME.size + length]
+            if len(payload) < length:
+                return events, offset, False
+            elif zlib.crc32(payload) != crc:
+                return events, offset, True
+            offset += FRAME.size + length
+
+            kind, code = SCHEMA_HEADER.unpack_from(payload)
+            if kind == SCHEMA_RECORD:
+                info = json.loads(payload[SCHEMA_HEADER.size:].decode("utf-8"))
+                self.decode_schemas[code] = JournalSchema(code, info["name"], info["fields"])
+            elif kind == EVENT_RECORD:
+                schema = self.decode_schemas.get(code)
+                if schema is None:
+                    # The schema never arrived, the record is skipped so the records after it can still be read
+                    self.unknown_count += 1
+                    continue
+                times, link, fields = schema.decode(payload)
+                event = dict(zip(self.time_names, times))
+                event[self.type_name] = schema.name
+                event.update(fields)
+                if link != bytes(16):
+                    event[self.link_name] = str(uuid.UUID(bytes=link))
+                events.append(event)
+        return events, offset, False
+
+
+class EventJournal(object):
+    SYNC_POLICIES = ("always", "interval", "never")
+
+    # Instantiation, Copy, Destruction
+    def __init__(self, path=None, sync="interval", sync_interval=1.0, time_names=("Time", "DeltaTime", "StartTime"),
+                 type_name="Type", link_name="LinkID", init=False):
+        self._path = None
+        self.path = path
+        self.fobj = None
+
+        self.sync = sync
+        self.sync_interval = sync_interval
+        self.last_sync = 0.0
+        self.unsynced = 0
+
+        self.codec = EventCodec(time_names, type_name, link_name)
+
+        if init:
+            self.open()
+
+    @property
+    def path(self):
+        return self._path
+
+    @path.setter
+    def path(self, value):
+        if isinstance(value, pathlib.Path) or value is None:
+            self._path = value
+        else:
+            self._path = pathlib.Path(value)
+
+    @property
+    def is_open(self):
+        return self.fobj is not None
+
+    # Context Managers
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    # File Methods
+    def open(self):
+        if not self.is_open:
+            if self.sync not in self.SYNC_POLICIES:
+                raise ValueError("sync must be one of " + ", ".join(self.SYNC_POLICIES))
+            self.fobj = open(self.path, "ab", buffering=0)
+            if self.fobj.tell() == 0:
+                self.fobj.write(MAGIC)
+            self.codec.clear()
+            self.last_sync = time.perf_counter()
+        return self.fobj
+
+    def close(self, remove=False):
+        if self.is_open:
+            self.flush()
+            self.fobj.close()
+            self.fobj = None
+        self.codec.clear()
+        if remove and self.path is not None and self.path.is_file():
+            self.path.unlink()
+
+    def flush(self):
+        if self.is_open and self.unsynced > 0:
+            os.fsync(self.fobj.fileno())
+            self.unsynced = 0
+            self.last_sync = time.perf_counter()
+
+    def checkpoint(self):
+        # Everything in the journal has been stored elsewhere, so it starts over
+        if self.is_open:
+            self.fobj.truncate(len(MAGIC))
+            self.codec.clear()
+            self.unsynced += 1
+            self.flush()
+
+    def exists(self):
+        return self.path is not None and self.path.is_file() and self.path.stat().st_size > len(MAGIC)
+
+    # Writing
+    def write(self, event):
+        self.open()
+        self.fobj.write(self.codec.encode(event))
+        self.written()
+
+    def write_values(self, name, fields, times, values):
+        self.open()
+        self.fobj.write(self.codec.encode_values(name, fields, times, values))
+        self.written()
+
+    def written(self):
+        self.unsynced += 1
+        if self.sync == "always":
+            self.flush()
+        elif self.sync == "interval" and time.perf_counter() - self.last_sync >= self.sync_interval:
+            self.flush()
+
+    # Reading
+    def read(self):
+        if not self.exists():
+            return []
+
+        data = self.path.read_bytes()
+        if data[:len(MAGIC)] != MAGIC:
+            warn(self.path.as_posix() + " is not an event journal", stacklevel=2)
+            return []
+
+        codec = EventCodec(self.codec.time_names, self.codec.type_name, self.codec.link_name)
+        events, offset, _ = codec.decode(data, len(MAGIC))
+        if offset < len(data):
+            warn(self.path.as_posix() + " ends with a partial record", stacklevel=2)
+        return events
+
+
+# Functions #
+def field_kind(value):
+    if isinstance(value, numbers.Integral):
+        return "i"
+    elif isinstance(value, (numbers.Real, datetime.datetime)):
+        return "f"
+    else:
+        return "s"
+
+
+def widen_kind(kind, other):
+    # Integers are stored as floats once a float is seen, and anything else is stored as a string
+    if kind == other:
+        return kind
+    elif {kind, other} == {"i", "f"}:
+        return "f"
+    else:
+        return "s"
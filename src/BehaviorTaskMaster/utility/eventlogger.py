@@ -25,15 +25,21 @@ Output:
 
 # Default Libraries #
 from abc import ABC, abstractmethod
-import bisect
+import atexit
 import collections
+import contextlib
 import copy
 import csv
 import datetime
+import functools
+import os
 import pathlib
+import queue
+import threading
 import time
 import uuid
 from warnings import warn
+import weakref
 
 # Downloaded Libraries #
 from bidict import bidict
@@ -41,10 +47,20 @@ import h5py
 import numpy as np
 
 # Local Libraries #
+from .eventjournal import EventJournal
 from .iotriggers import AudioTrigger
 
 
 # Definitions #
+# Constants #
+HEX_DIGITS = np.zeros(256, dtype=np.uint8)
+HEX_DIGITS[np.frombuffer(b"0123456789", dtype=np.uint8)] = np.arange(0, 10)
+HEX_DIGITS[np.frombuffer(b"abcdef", dtype=np.uint8)] = np.arange(10, 16)
+HEX_DIGITS[np.frombuffer(b"ABCDEF", dtype=np.uint8)] = np.arange(10, 16)
+LINK_DTYPE = np.dtype("V16")
+HANDLE_MANAGERS = weakref.WeakSet()
+
+
 # Classes #
 class EventLoggerCSV(collections.UserList):
     def __init__(self, io_trigger=None, **kwargs):
@@ -123,21 +139,227 @@ class EventLoggerCSV(collections.UserList):
         return result
 
 
+class HDF5handle(object):
+    # Instantiation, Copy, Destruction
+    def __init__(self, fobj, mode="a", kwargs=None):
+        self.fobj = fobj
+        self.mode = mode
+        self.kwargs = {} if kwargs is None else kwargs
+        self.leases = 0
+        self.last_used = time.perf_counter()
+        # Only the thread that last used the handle closes it, another thread may still be reading from it
+        self.thread = threading.get_ident()
+
+    @property
+    def is_open(self):
+        return bool(self.fobj)
+
+    def is_compatible(self, mode, kwargs):
+        # A writable handle can serve reads, but truncating or creating always needs a fresh open
+        if kwargs != self.kwargs or mode in ("w", "w-", "x"):
+            return False
+        return mode == self.mode or mode == "r" or (mode in ("a", "r+") and self.mode != "r")
+
+
+class HDF5handleManager(object):
+    # Keeps one open h5py file per path so containers can lease it instead of opening and closing it every access
+    # Instantiation, Copy, Destruction
+    def __init__(self, idle_timeout=5.0, max_idle=16):
+        self.handles = {}
+        self.lock = threading.RLock()
+        self.idle_timeout = idle_timeout
+        self.max_idle = max_idle
+        HANDLE_MANAGERS.add(self)
+
+    # Container Magic Methods
+    def __len__(self):
+        return len(self.handles)
+
+    def __contains__(self, path):
+        return self.handle_name(path) in self.handles
+
+    @staticmethod
+    def handle_name(path):
+        return path.as_posix() if isinstance(path, pathlib.PurePath) else pathlib.Path(path).as_posix()
+
+    # Leasing
+    def acquire(self, path, mode="a", **kwargs):
+        # Returns the file and whether it was opened for this lease
+        name = self.handle_name(path)
+        with self.lock:
+            handle = self.handles.get(name)
+            if handle is not None and not handle.is_open:
+                del self.handles[name]
+                handle = None
+            if handle is not None and not handle.is_compatible(mode, kwargs):
+                if handle.leases > 0:
+                    raise OSError(name + " is leased in mode " + handle.mode + " and cannot be reopened in " + mode)
+                self.close(name)
+                handle = None
+
+            opened = handle is None
+            if opened:
+                handle = HDF5handle(h5py.File(name, mode=mode, **kwargs), mode, kwargs)
+                self.handles[name] = handle
+            handle.leases += 1
+            handle.last_used = time.perf_counter()
+            handle.thread = threading.get_ident()
+            # Idle handles are closed here on the thread that used them instead of by a background thread
+            self.close_idle()
+            self.close_excess()
+            return handle.fobj, opened
+
+    def release(self, path):
+        # A writable file holds HDF5's exclusive lock, so it is closed once nothing leases it and other processes
+        # can open it, read only files are kept open for the next lease
+        name = self.handle_name(path)
+        with self.lock:
+            handle = self.handles.get(name)
+            if handle is not None and handle.leases > 0:
+                handle.leases -= 1
+                handle.last_used = time.perf_counter()
+                handle.thread = threading.get_ident()
+                if handle.leases == 0 and handle.mode != "r":
+                    self.close(name)
+
+    @contextlib.contextmanager
+    def lease(self, path, mode="a", **kwargs):
+        fobj, _ = self.acquire(path, mode, **kwargs)
+        try:
+            yield fobj
+        finally:
+            self.release(path)
+
+    # Closing
+    def close(self, path, force=False):
+        name = self.handle_name(path)
+        with self.lock:
+            handle = self.handles.get(name)
+            if handle is None or (handle.leases > 0 and not force):
+                return False
+            del self.handles[name]
+            if handle.is_open:
+                handle.fobj.flush()
+                handle.fobj.close()
+            return True
+
+    def idle_handles(self):
+        # The unleased handles the calling thread was the last to use
+        thread = threading.get_ident()
+        return [(n, h) for n, h in self.handles.items() if h.leases == 0 and h.thread == thread]
+
+    def close_idle(self, timeout=None):
+        if timeout is None:
+            timeout = self.idle_timeout
+        now = time.perf_counter()
+        with self.lock:
+            for name, handle in self.idle_handles():
+                if now - handle.last_used >= timeout:
+                    self.close(name)
+
+    def close_excess(self):
+        # The least recently used idle handles are closed once there are too many
+        with self.lock:
+            idle = sorted((h.last_used, n) for n, h in self.idle_handles())
+            for _, name in idle[:max(len(idle) - self.max_idle, 0)]:
+                self.close(name)
+
+    def close_all(self, force=False):
+        with self.lock:
+            for name in list(self.handles):
+                self.close(name, force=force)
+
+
+class HDF5metadata(object):
+    # The file attributes and top level names of a file as they were when its modification stamp was taken
+    # Instantiation, Copy, Destruction
+    def __init__(self, stamp=None, attributes=None, datasets=None):
+        self.stamp = stamp
+        self.attributes = {} if attributes is None else attributes
+        self.datasets = set() if datasets is None else datasets
+        self.is_valid = True
+
+    @staticmethod
+    def file_stamp(path):
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+
+class HDF5metadataCache(object):
+    # The metadata of the most recently used files, the least recently used is dropped once there are max_size
+    # Instantiation, Copy, Destruction
+    def __init__(self, max_size=256):
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.max_size = max_size
+
+    # Container Magic Methods
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def __setitem__(self, name, metadata):
+        with self.lock:
+            self.entries[name] = metadata
+            self.entries.move_to_end(name)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    # Cache Methods
+    def get(self, name, default=None):
+        with self.lock:
+            metadata = self.entries.get(name, default)
+            if name in self.entries:
+                self.entries.move_to_end(name)
+            return metadata
+
+    def pop(self, name, default=None):
+        with self.lock:
+            return self.entries.pop(name, default)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
 class HDF5container(object):
     FILE_TYPE = "Abstract"
     VERSION = "0.0.0"
+    handles = HDF5handleManager()
+    metadata_cache = HDF5metadataCache()
 
     # Instantiation, Copy, Destruction
-    def __init__(self, path=None, update=True, init=False):
+    def __init__(self, path=None, update=True, mmap=False, managed=True, compression="gzip", compression_opts=None,
+                 shuffle=False, rdcc_nbytes=None, rdcc_nslots=None, init=False):
         self._file_attrs = set()
         self._datasets = set()
         self._path = None
+        self.dataset_wrappers = {}
 
         self.path = path
         self.is_updating = update
-
-        self.cargs = {"compression": "gzip", "compression_opts": 4}
+        self.is_mapped = mmap
+        self.is_managed = managed
+        self.is_leased = False
+        self.loaded_fobj = None
+        self.metadata = None
+
+        # Growable datasets are resized ahead of their rows, None resizes them to exactly the rows written
+        self.growth_factor = None
+        self.max_growth = 65536
+        self.dataset_lengths = {}
+        self.lengths_pending = set()
+
+        self.cargs = compression_args(compression, compression_opts, shuffle)
         self.default_datasets_parameters = self.cargs.copy()
+        # The raw data chunk cache of each open file, h5py's defaults are used for the settings left as None
+        self.cache_args = {name: value for name, value in (("rdcc_nbytes", rdcc_nbytes), ("rdcc_nslots", rdcc_nslots))
+                           if value is not None}
         self.default_attrs = {"FileType": self.FILE_TYPE, "Version": self.VERSION}
         self.default_datasets = {}
 
@@ -161,6 +383,10 @@ class HDF5container(object):
     def is_open(self):
         return bool(self.h5_fobj)
 
+    @property
+    def is_metadata_cached(self):
+        return self.metadata is not None and self.metadata.is_valid
+
     @property
     def file_attrs_names(self):
         self.load_attributes()
@@ -180,7 +406,11 @@ class HDF5container(object):
         return new
 
     def __del__(self):
-        self.close()
+        # Only gives the file back, flushing and writing indexes is left to close since it can fail while collecting
+        try:
+            self.release()
+        except Exception:
+            pass
 
     # Pickling
     def __getstate__(self):
@@ -202,19 +432,15 @@ class HDF5container(object):
         self.__dict__.update(state)
 
     # Attribute Access
-    def __getattribute__(self, item):
-        reserved = ("_file_attrs", "_datasets", "get_file_attribute", "get_dataset", "__init__")
-        try:
-            if item in reserved:
-                return super().__getattribute__(item)
-            elif item in self._file_attrs:
-                return self.get_file_attribute(item)
-            elif item in self._datasets:
-                return self.get_dataset(item)
-            else:
-                return super().__getattribute__(item)
-        except AttributeError:
-            return super().__getattribute__(item)
+    def __getattr__(self, item):
+        # Only reached when normal lookup fails, so file attribute and dataset names cost nothing elsewhere
+        names = self.__dict__
+        if item in names.get("_file_attrs", ()):
+            return self.get_file_attribute(item)
+        elif item in names.get("_datasets", ()):
+            return self.get_dataset(item)
+        else:
+            raise AttributeError("'" + type(self).__name__ + "' object has no attribute '" + item + "'")
 
     def __setattr__(self, key, value):
         reserved = ("_file_attrs", "_datasets")
@@ -233,7 +459,7 @@ class HDF5container(object):
         self.open()
         length = len(self.h5_fobj)
         if not op:
-            self.close()
+            self.release()
         return length
 
     def __getitem__(self, item):
@@ -260,9 +486,14 @@ class HDF5container(object):
     # Constructors
     def construct(self, open_=False, **kwargs):
         if self.path.is_file():
-            self.open(validate=True, **kwargs)
-            if not open_:
-                self.close()
+            if open_:
+                self.open(validate=True, **kwargs)
+            else:
+                # The cached metadata answers validation without opening the file when it has not changed
+                self.metadata = None
+                self.validate_file_structure(**kwargs)
+                self.load_attributes()
+                self.load_datasets()
         else:
             self.create_file(open_=open_)
 
@@ -276,7 +507,7 @@ class HDF5container(object):
         if open_:
             return self.h5_fobj
         else:
-            self.close()
+            self.release()
             return None
 
     def construct_file_attributes(self, value=""):
@@ -293,8 +524,9 @@ class HDF5container(object):
                 warn("Could not set attribute due to error: " + str(e), stacklevel=2)
             else:
                 super().__setattr__(_key, value)
+                self.cache_metadata(attributes={key: value})
         if not op:
-            self.close()
+            self.release()
 
     def construct_file_datasets(self, **kwargs):
         if len(self._datasets.intersection(self._file_attrs)) > 0:
@@ -311,8 +543,9 @@ class HDF5container(object):
                 warn("Could not set datasets due to error: " + str(e), stacklevel=2)
             else:
                 super().__setattr__(_key, HDF5container(self.h5_fobj[key], self))
+                self.cache_metadata(datasets=(key,))
         if not op:
-            self.close()
+            self.release()
 
     # Copy Methods
     def copy(self):
@@ -329,6 +562,7 @@ class HDF5container(object):
         new.is_updating = self.is_updating
         new.cargs = copy.deepcopy(self.cargs, memo=memo)
         new.default_datasets_parameters = copy.deepcopy(self.cargs, memo=memo)
+        new.cache_args = self.cache_args.copy()
 
         if init:
             new.construct()
@@ -347,28 +581,16 @@ class HDF5container(object):
     # File Attributes
     def get_file_attribute(self, item):
         _item = "_" + item
-        op = self.is_open
-        self.open()
-
         try:
-            if item in self.h5_fobj.attrs and (super().__getattribute__(_item) is None or self.is_updating):
-                setattr(self, _item, self.h5_fobj.attrs[item])
+            attributes = self.get_metadata().attributes
+            if item in attributes and (super().__getattribute__(_item) is None or self.is_updating):
+                setattr(self, _item, attributes[item])
         except Exception as e:
             warn("Could not update attribute due to error: "+str(e), stacklevel=2)
-
-        if not op:
-            self.close()
         return super().__getattribute__(_item)
 
     def get_file_attributes(self):
-        op = self.is_open
-        self.open()
-
-        attr = dict(self.h5_fobj.attrs.items())
-
-        if not op:
-            self.close()
-        return attr
+        return self.get_metadata().attributes.copy()
 
     def set_file_attribute(self, key, value):
         op = self.is_open
@@ -383,9 +605,10 @@ class HDF5container(object):
             warn("Could not set attribute due to error: " + str(e), stacklevel=2)
         else:
             super().__setattr__(_item, value)
+            self.cache_metadata(attributes={key: value})
 
         if not op:
-            self.close()
+            self.release()
 
     def add_file_attributes(self, items):
         names = set(items.keys())
@@ -404,8 +627,9 @@ class HDF5container(object):
                 warn("Could not set attribute due to error: " + str(e), stacklevel=2)
             else:
                 super().__setattr__(_key, value)
+                self.cache_metadata(attributes={key: value})
         if not op:
-            self.close()
+            self.release()
 
     def clear_attributes(self):
         for key in self._file_attrs:
@@ -414,7 +638,7 @@ class HDF5container(object):
 
     def load_attributes(self):
         self.clear_attributes()
-        for key, value in self.h5_fobj.attrs.items():
+        for key, value in self.get_metadata().attributes.items():
             _item = "_" + key
             self._file_attrs.update((key,))
             super().__setattr__(_item, value)
@@ -430,17 +654,23 @@ class HDF5container(object):
 
     def get_dataset(self, item):
         _item = "_" + item
+        wrapper = self.dataset_wrappers.get(item)
+        if wrapper is not None and wrapper._dataset:
+            return wrapper
+
         op = self.is_open
         self.open()
 
         try:
-            if item in self.h5_fobj and self.is_updating:
-                super().__setattr__(_item, HDF5dataset(self.h5_fobj[item], self))
+            if item in self.h5_fobj and (self.is_updating or self.__dict__.get(_item) is None):
+                wrapper = HDF5dataset(self.h5_fobj[item], self)
+                self.dataset_wrappers[item] = wrapper
+                super().__setattr__(_item, wrapper)
         except Exception as e:
             warn("Could not update datasets due to error: " + str(e), stacklevel=2)
 
         if not op:
-            self.close()
+            self.release()
         return super().__getattribute__(_item)
 
     def set_dataset(self, name, data=None, **kwargs):
@@ -460,9 +690,10 @@ class HDF5container(object):
             warn("Could not set datasets due to error: " + str(e), stacklevel=2)
         else:
             super().__setattr__(_key, HDF5dataset(self.h5_fobj[name], self))
+            self.cache_metadata(datasets=(name,))
 
         if not op:
-            self.close()
+            self.release()
 
     def add_file_datasets(self, items):
         names = set(items.keys())
@@ -481,25 +712,57 @@ class HDF5container(object):
                 warn("Could not set datasets due to error: " + str(e), stacklevel=2)
             else:
                 super().__setattr__(_key, HDF5dataset(self.h5_fobj[name], self))
+                self.cache_metadata(datasets=(name,))
         if not op:
-            self.close()
+            self.release()
 
     def clear_datasets(self):
         for name in self._datasets:
             self.__delattr__("_" + name)
         self._datasets.clear()
+        self.dataset_wrappers.clear()
+        # Lengths that are not written yet are the only record of the rows in the allocated datasets
+        pending = {name: self.dataset_lengths[name] for name in self.lengths_pending}
+        self.dataset_lengths.clear()
+        self.dataset_lengths.update(pending)
 
     def load_datasets(self):
+        # The wrappers are made when a dataset is first accessed
         self.clear_datasets()
-        for name, value in self.h5_fobj.items():
+        for name in self.get_metadata().datasets:
             _item = "_" + name
             self._datasets.update((name,))
-            super().__setattr__(_item, value)
+            super().__setattr__(_item, None)
 
     def get_dataset_names(self):
         self.load_datasets()
         return self._datasets
 
+    def write_lengths(self):
+        # Stores the lengths of the growable datasets that changed so other handles read the right rows
+        op = self.is_open
+        self.open()
+        for name in self.lengths_pending:
+            self.h5_fobj[name].attrs[HDF5dataset.LENGTH_NAME] = self.dataset_lengths[name]
+        self.lengths_pending.clear()
+        if not op:
+            self.release()
+
+    def trim_datasets(self):
+        # Frees the rows allocated past the length of each growable dataset
+        op = self.is_open
+        self.open()
+        if self.lengths_pending:
+            self.write_lengths()
+        for dataset in self.h5_fobj.values():
+            if isinstance(dataset, h5py.Dataset) and HDF5dataset.LENGTH_NAME in dataset.attrs:
+                length = self.dataset_lengths.get(dataset.name, dataset.attrs[HDF5dataset.LENGTH_NAME])
+                dataset.resize(length, axis=0)
+                del dataset.attrs[HDF5dataset.LENGTH_NAME]
+                self.dataset_lengths[dataset.name] = int(length)
+        if not op:
+            self.release()
+
     def list_dataset_names(self):
         self.load_datasets()
         return list(self._datasets)
@@ -543,13 +806,70 @@ class HDF5container(object):
     def pop_file_attribute(self, key):
         value = self.get_file_attribute(key)
         del self.h5_fobj.attrs[key]
+        self.cache_metadata(removed=(key,))
         return value
 
     def pop_dataset(self, key):
-        value = self.get_dataset(key)[...]
+        dataset = self.get_dataset(key)
+        value = dataset[:dataset.len()]
+        self.dataset_wrappers.pop(key, None)
+        self.dataset_lengths.pop(dataset.name, None)
+        self.lengths_pending.discard(dataset.name)
         del self.h5_fobj[key]
+        self.cache_metadata(removed=(key,))
         return value
 
+    # Metadata Cache
+    def get_metadata(self, refresh=False):
+        # Only reads the file when nothing is cached for it or its modification stamp changed since it was cached
+        if not refresh and self.is_metadata_cached:
+            return self.metadata
+
+        name = self.path.as_posix()
+        stamp = HDF5metadata.file_stamp(self.path)
+        metadata = self.metadata_cache.get(name)
+        if refresh or metadata is None or not metadata.is_valid or metadata.stamp != stamp:
+            op = self.is_open
+            self.open(mode=self.metadata_mode(stamp))
+            metadata = HDF5metadata(stamp, dict(self.h5_fobj.attrs.items()), set(self.h5_fobj.keys()))
+            self.metadata_cache[name] = metadata
+            if not op:
+                self.release()
+                # Closing a writable file changes its stamp, nothing else could write to it while it was open
+                metadata.stamp = HDF5metadata.file_stamp(self.path)
+        self.metadata = metadata
+        return metadata
+
+    def metadata_mode(self, stamp):
+        # Opened for writing like the container's other accesses so the next open does not have to reopen it, unless
+        # the file can only be read or it is already leased, which a read only lease can share whatever its mode
+        if stamp is None or self.path in self.handles or not os.access(self.path, os.W_OK):
+            return "r"
+        return "a"
+
+    def cache_metadata(self, attributes=None, datasets=(), removed=()):
+        # Applies this container's own writes so the cache does not have to be read again
+        if self.is_metadata_cached:
+            if attributes is not None:
+                self.metadata.attributes.update(attributes)
+            self.metadata.datasets.update(datasets)
+            for name in removed:
+                self.metadata.attributes.pop(name, None)
+                self.metadata.datasets.discard(name)
+
+    def invalidate_metadata(self):
+        if self.metadata is not None:
+            self.metadata.is_valid = False
+            self.metadata = None
+        if self.path is not None:
+            self.metadata_cache.pop(self.path.as_posix(), None)
+
+    def refresh(self):
+        self.invalidate_metadata()
+        self.get_metadata(refresh=True)
+        self.load_attributes()
+        self.load_datasets()
+
     # Mapping Update Methods
     def update_file_attrs(self, **kwargs):
         if len(self._datasets.intersection(kwargs.keys())) > 0:
@@ -568,8 +888,9 @@ class HDF5container(object):
                 warn("Could not set attribute due to error: " + str(e), stacklevel=2)
             else:
                 super().__setattr__(_key, value)
+                self.cache_metadata(attributes={key: value})
         if not op:
-            self.close()
+            self.release()
 
     def update_datasets(self, **kwargs):
         if len(self._file_attrs.intersection(kwargs.keys())) > 0:
@@ -589,15 +910,18 @@ class HDF5container(object):
                 warn("Could not set datasets due to error: " + str(e), stacklevel=2)
             else:
                 super().__setattr__(_key, HDF5container(self.h5_fobj[key], self))
+                self.cache_metadata(datasets=(key,))
         if not op:
-            self.close()
+            self.release()
 
     # File Methods
-    def open(self, mode="a", exc=False, validate=False, **kwargs):
+    def open(self, mode="a", exc=False, validate=False, swmr=False, locking=None, **kwargs):
         if not self.is_open:
             try:
-                self.h5_fobj = h5py.File(self.path.as_posix(), mode=mode)
+                opened = self.open_file(mode, swmr, locking)
             except Exception as e:
+                if isinstance(e, BlockingIOError):
+                    e = self.locked_error(e)
                 if exc:
                     warn("Could not open" + self.path.as_posix() + "due to error: " + str(e), stacklevel=2)
                     self.h5_fobj = None
@@ -607,19 +931,77 @@ class HDF5container(object):
             else:
                 if validate:
                     self.validate_file_structure(**kwargs)
-                self.load_attributes()
-                self.load_datasets()
+                # A leased handle this container has already loaded from only needs to be looked up
+                if opened or validate or self.loaded_fobj is not self.h5_fobj:
+                    if self.is_metadata_cached and self.metadata.stamp != HDF5metadata.file_stamp(self.path):
+                        self.metadata = None
+                    self.load_attributes()
+                    self.load_datasets()
+                    self.loaded_fobj = self.h5_fobj
                 return self.h5_fobj
 
+    def open_file(self, mode="a", swmr=False, locking=None):
+        # Returns whether the file was opened, a leased file may already have been open
+        if swmr:
+            # Single writer multiple reader files need the latest format, readers open with swmr set
+            self.h5_fobj = h5py.File(self.path.as_posix(), mode=mode, libver="latest", swmr=mode == "r",
+                                     locking=locking, **self.cache_args)
+            return True
+        elif self.is_managed:
+            self.h5_fobj, opened = self.handles.acquire(self.path, mode=mode, locking=locking, **self.cache_args)
+            self.is_leased = True
+            return opened
+        else:
+            self.h5_fobj = h5py.File(self.path.as_posix(), mode=mode, locking=locking, **self.cache_args)
+            return True
+
+    def locked_error(self, error):
+        # HDF5 locks the whole file, a reader opened with swmr keeps it locked for as long as it is open
+        locked = BlockingIOError(error.errno, self.path.as_posix() + " is locked by another process, a single writer "
+                                 "multiple reader reader may still have it open")
+        locked.__cause__ = error
+        return locked
+
+    def release(self):
+        # Gives the file back to the handle manager, which keeps read only files open until they have been idle
+        if self.lengths_pending and self.is_open:
+            self.write_lengths()
+        if self.is_leased:
+            self.is_leased = False
+            self.h5_fobj = None
+            self.handles.release(self.path)
+        elif self.is_open:
+            self.h5_fobj.flush()
+            self.h5_fobj.close()
+        return not self.is_open
+
     def close(self):
         if self.is_open:
             self.h5_fobj.flush()
-            self.h5_fobj.close()
+        self.release()
+        if self.is_managed and self.path is not None:
+            self.handles.close(self.path)
         return not self.is_open
 
+    def repack(self, path, compression=None):
+        # Copies the file with every dataset stored contiguous so that they can be memory mapped
+        op = self.is_open
+        self.open()
+        with h5py.File(pathlib.Path(path).as_posix(), mode="w") as new:
+            copy_group(self.h5_fobj, new, compression=compression)
+        if not op:
+            self.release()
+        return type(self)(path=path)
+
     # General Methods
     def append2dataset(self, name, data, axis=0):
         dataset = self.get_dataset(name)
+        if axis == 0:
+            start = dataset.len()
+            dataset.grow(start + data.shape[0])
+            dataset[start:start + data.shape[0]] = data
+            return
+
         s_shape = dataset.shape
         d_shape = data.shape
         f_shape = list(s_shape)
@@ -631,8 +1013,7 @@ class HDF5container(object):
             dataset[slicing] = data
 
     def report_file_structure(self):
-        op = self.is_open
-        self.open()
+        metadata = self.get_metadata()
 
         # Construct Structure Report Dictionary
         report = {"file_type": {"valid": False, "differences": {"object": self.FILE_TYPE, "file": None}},
@@ -640,33 +1021,31 @@ class HDF5container(object):
                   "datasets": {"valid": False, "differences": {"object": None, "file": None}}}
 
         # Check H5 File Type
-        if "FileType" in self.h5_fobj.attrs:
-            if self.h5_fobj.attrs["FileType"] == self.FILE_TYPE:
+        if "FileType" in metadata.attributes:
+            if metadata.attributes["FileType"] == self.FILE_TYPE:
                 report["file_type"]["valid"] = True
                 report["file_type"]["differences"]["object"] = None
             else:
-                report["file_type"]["differences"]["file"] = self.h5_fobj.attrs["FileType"]
+                report["file_type"]["differences"]["file"] = metadata.attributes["FileType"]
 
         # Check File Attributes
-        if self.h5_fobj.attrs.keys() == self._file_attrs:
+        if metadata.attributes.keys() == self._file_attrs:
             report["attrs"]["valid"] = True
         else:
-            f_attr_set = set(self.h5_fobj.attrs.keys())
+            f_attr_set = set(metadata.attributes.keys())
             o_attr_set = self._file_attrs
             report["attrs"]["differences"]["object"] = o_attr_set - f_attr_set
             report["attrs"]["differences"]["file"] = f_attr_set - o_attr_set
 
         # Check File Datasets
-        if self.h5_fobj.keys() == self._datasets:
+        if metadata.datasets == self._datasets:
             report["attrs"]["valid"] = True
         else:
-            f_attr_set = set(self.h5_fobj.keys())
+            f_attr_set = set(metadata.datasets)
             o_attr_set = self._datasets
             report["datasets"]["differences"]["object"] = o_attr_set - f_attr_set
             report["datasets"]["differences"]["file"] = f_attr_set - o_attr_set
 
-        if not op:
-            self.close()
         return report
 
     def validate_file_structure(self, file_type=True, o_attrs=True, f_attrs=False, o_datasets=True, f_datasets=False):
@@ -688,8 +1067,33 @@ class HDF5container(object):
                 warn(self.path.as_posix() + " has extra datasets", stacklevel=2)
 
 
+class HDF5datasetAttribute(object):
+    # Forwards an h5py.Dataset attribute to the wrapped dataset, opening the container when it is closed
+    # Instantiation, Copy, Destruction
+    def __init__(self, name):
+        self.name = name
+
+    # Descriptor
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        elif instance._dataset:
+            return getattr(instance._dataset, self.name)
+        else:
+            with instance:
+                return getattr(instance._container.h5_fobj[instance._name], self.name)
+
+    def __set__(self, instance, value):
+        if instance._dataset:
+            setattr(instance._dataset, self.name, value)
+        else:
+            with instance:
+                setattr(instance._container.h5_fobj[instance._name], self.name, value)
+
+
 class HDF5dataset(object):
     parent_methods = {x for x in dir(h5py.Dataset) if x[0] != '_'}
+    LENGTH_NAME = "Length"
 
     # Instantiation, Copy, Destruction
     def __init__(self, dataset=None, container=None, init=True):
@@ -709,30 +1113,6 @@ class HDF5dataset(object):
         #    self._dataset = self._container.h5_fobj[self._name]
         return self._dataset
 
-    # Attribute Access
-    def __getattribute__(self, item):
-        if item == "parent_methods":
-            output = super().__getattribute__(item)
-        elif item in self.parent_methods:
-            if self._dataset:
-                output = getattr(self._dataset, item)
-            else:
-                with self:
-                    output = getattr(self._container.h5_fobj[self._name], item)
-        else:
-            output = super().__getattribute__(item)
-        return output
-
-    def __setattr__(self, key, value):
-        if key in self.parent_methods:
-            if self._dataset:
-                setattr(self._dataset, key, value)
-            else:
-                with self:
-                    self._container.h5_fobj[self._name][key] = value
-        else:
-            super().__setattr__(key, value)
-
     # Container Magic Methods
     def __getitem__(self, item):
         if self._dataset:
@@ -777,13 +1157,192 @@ class HDF5dataset(object):
 
     def open(self, **kwargs):
         self._container_was_open = self._container.is_open
-        if not self._dataset:
+        if not self._container_was_open:
             self._container.open(**kwargs)
+        if not self._dataset:
             self._dataset = self._container.h5_fobj[self._name]
 
     def close(self):
         if not self._container_was_open:
-            self._container.close()
+            self._container.release()
+
+    # Length
+    def len(self):
+        # The rows written along the first axis, growable datasets are allocated past them
+        lengths = self._container.dataset_lengths
+        length = lengths.get(self._name)
+        if length is None:
+            with self:
+                dataset = self._container.h5_fobj[self._name]
+                length = int(dataset.attrs.get(self.LENGTH_NAME, dataset.shape[0]))
+            lengths[self._name] = length
+        return length
+
+    def grow(self, length):
+        # Sets the rows written, the allocation grows by the container's factor rounded up to whole chunks
+        container = self._container
+        factor = container.growth_factor
+        with self:
+            dataset = self._dataset
+            capacity = dataset.shape[0]
+            if length > capacity and factor is None:
+                dataset.resize(length, axis=0)
+            elif length > capacity:
+                chunk = dataset.chunks[0] if dataset.chunks else 1
+                capacity = max(length, min(int(capacity * factor), capacity + container.max_growth))
+                dataset.resize(-(-capacity // chunk) * chunk, axis=0)
+            # Recorded while the file is open so releasing it writes the length before the file is closed
+            container.dataset_lengths[self._name] = length
+            if factor is not None:
+                container.lengths_pending.add(self._name)
+
+    # Memory Mapping
+    def memmap(self, fields=None):
+        with self:
+            return dataset_memmap(self._container.h5_fobj[self._name], fields)
+
+    def read_field(self, name, index=Ellipsis):
+        if index is Ellipsis:
+            index = slice(0, self.len())
+        if self._container.is_mapped:
+            mapped = self.memmap((name,))
+            if mapped is not None:
+                return mapped[name][index]
+        with self:
+            return self._container.h5_fobj[self._name].fields(name)[index]
+
+
+for _name in HDF5dataset.parent_methods - set(vars(HDF5dataset)):
+    setattr(HDF5dataset, _name, HDF5datasetAttribute(_name))
+
+
+class HDF5linkIndex(object):
+    # Rows are indexed along the first axis, recent links are hashed and older links are kept in sorted arrays
+    # Instantiation, Copy, Destruction
+    def __init__(self, ids=None, capacity=1024, merge_size=65536, init=True):
+        self.ids = None
+        self.length = 0
+        self.merge_size = merge_size
+
+        self.sorted_ids = None
+        self.sorted_rows = None
+        self.recent = {}
+        self.modified = False
+
+        if init:
+            self.construct(ids, capacity)
+
+    # Container Magic Methods
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, item):
+        row = self.get_row(item)
+        if row is None:
+            raise KeyError(item)
+        return row
+
+    def __contains__(self, item):
+        return self.get_row(item) is not None
+
+    # Constructors Methods
+    def construct(self, ids=None, capacity=1024):
+        if ids is None:
+            ids = np.empty(0, dtype="S16")
+        self.length = ids.shape[0]
+        self.ids = np.zeros(max(capacity, self.length), dtype="S16")
+        self.ids[:self.length] = ids
+        self.recent.clear()
+        self.sort()
+
+    # Index Methods
+    def sort(self):
+        ids = self.ids[:self.length]
+        rows = np.flatnonzero(ids != b"")
+        order = np.argsort(ids[rows], kind="stable")
+        self.sorted_ids = ids[rows][order]
+        self.sorted_rows = rows[order]
+        self.recent.clear()
+
+    def reserve(self, length):
+        if length > self.ids.shape[0]:
+            ids = np.zeros(max(length, self.ids.shape[0] * 2), dtype="S16")
+            ids[:self.length] = self.ids[:self.length]
+            self.ids = ids
+
+    def add(self, row, id_):
+        key = self.id_to_key(id_)
+        self.reserve(row + 1)
+        self.remove_row(row)
+        self.ids[row] = key
+        self.recent[key] = row
+        self.length = max(self.length, row + 1)
+        if len(self.recent) > self.merge_size:
+            self.sort()
+
+    def extend(self, start, ids):
+        stop = start + ids.shape[0]
+        self.reserve(stop)
+        self.ids[start:stop] = ids
+        self.length = max(self.length, stop)
+        self.recent.update(zip(ids.tolist(), range(start, stop)))
+        if len(self.recent) > self.merge_size:
+            self.sort()
+
+    def remove_row(self, row):
+        if row < self.length:
+            key = self.ids[row]
+            if key != b"":
+                self.modified = True
+                if self.recent.get(key) == row:
+                    del self.recent[key]
+                else:
+                    position = np.searchsorted(self.sorted_ids, key)
+                    if position < self.sorted_ids.shape[0] and self.sorted_ids[position] == key:
+                        self.sorted_rows[position] = -1
+
+    def get_row(self, id_):
+        key = self.id_to_key(id_)
+        row = self.recent.get(key, None)
+        if row is None:
+            position = np.searchsorted(self.sorted_ids, key)
+            if position < self.sorted_ids.shape[0] and self.sorted_ids[position] == key:
+                row = int(self.sorted_rows[position])
+                if row < 0:
+                    row = None
+        return row
+
+    def get_rows(self, ids):
+        rows = np.full(ids.shape[0], -1, dtype=np.int64)
+        if self.sorted_ids.shape[0] > 0:
+            positions = np.minimum(np.searchsorted(self.sorted_ids, ids), self.sorted_ids.shape[0] - 1)
+            found = self.sorted_ids[positions] == ids
+            rows[found] = self.sorted_rows[positions[found]]
+        if self.recent:
+            for i in np.flatnonzero(rows < 0):
+                row = self.recent.get(ids[i], None)
+                if row is not None:
+                    rows[i] = row
+        return rows
+
+    def get_id(self, row):
+        if row < 0:
+            row += self.length
+        if row < 0 or row >= self.length:
+            return None
+        key = self.ids[row]
+        if key == b"":
+            return None
+        else:
+            return uuid.UUID(bytes=key.ljust(16, b"\x00"))
+
+    # Static Methods
+    @staticmethod
+    def id_to_key(id_):
+        if isinstance(id_, str):
+            id_ = uuid.UUID(id_)
+        # Numpy strips trailing nulls from fixed length bytes, so keys are stored stripped
+        return id_.bytes.rstrip(b"\x00")
 
 
 class HDF5referenceDataset(object):
@@ -794,9 +1353,11 @@ class HDF5referenceDataset(object):
         self.reference_field = ""
         self.dtype = None
         self.fields = bidict()
-        self.references = bidict()
+        self.index_loader = None
 
+        self._references = None
         self._reference_array = None
+        self._trailing = ()
 
         if init:
             self.construct(dataset, reference_field, dtype)
@@ -806,10 +1367,20 @@ class HDF5referenceDataset(object):
         new.__dict__.update(self.__dict__)
         return new
 
+    @property
+    def references(self):
+        if self._references is None:
+            self.build_index()
+        return self._references
+
+    @property
+    def is_index_built(self):
+        return self._references is not None
+
     @property
     def reference_array(self):
         try:
-            self._reference_array = self.dataset[self.reference_field]
+            self._reference_array = decode_strings(self.dataset.read_field(self.reference_field))
         except Exception as e:
             warn(e)
         finally:
@@ -823,20 +1394,13 @@ class HDF5referenceDataset(object):
         self.set_item(value, key)
 
     def __contains__(self, item):
-        if isinstance(item, str):
-            item = uuid.UUID(item)
-        if isinstance(item, uuid.UUID):
-            result = self.find_index(item)
-        elif isinstance(item, tuple):
-            result = self.find_id(item)
+        if isinstance(item, str) or isinstance(item, uuid.UUID):
+            return item in self.references
+        elif isinstance(item, tuple) or isinstance(item, int):
+            return self.find_id(item) is not None
         else:
             raise KeyError
 
-        if result is None:
-            return False
-        else:
-            return True
-
     # Generic Methods #
     # Constructors Methods
     def construct(self, dataset, reference_field, dtype=None):
@@ -855,7 +1419,15 @@ class HDF5referenceDataset(object):
         else:
             raise NameError
 
-        self._reference_array = self.dataset[self.reference_field]
+        self._trailing = (0,) * (len(self.dataset.shape) - 1)
+        self._references = None
+
+    def build_index(self):
+        if self.index_loader is not None:
+            ids = self.index_loader()
+        else:
+            ids = link_ids_to_bytes(np.ravel(self.dataset.read_field(self.reference_field)))
+        self._references = HDF5linkIndex(ids=ids)
 
     # Copy Methods
     def copy(self):
@@ -864,7 +1436,14 @@ class HDF5referenceDataset(object):
     # Reference Getters and Setters
     def new_reference(self, index=None, axis=0, id_=None):
         shape = self.dataset.shape
-        if index is None:
+        if index is None and axis == 0:
+            index = [self.dataset.len()] + [s - 1 for s in shape[1:]]
+            self.dataset.grow(index[0] + 1)
+            if id_ is None:
+                id_ = uuid.uuid4()
+            self.set_reference(index, id_)
+            return id_
+        elif index is None:
             shape = list(shape)
             shape[axis] += 1
             new_shape = shape[axis]
@@ -879,12 +1458,25 @@ class HDF5referenceDataset(object):
 
         with self.dataset:
             self.dataset.resize(new_shape, axis)
+        self.dataset._container.dataset_lengths.pop(self.dataset.name, None)
 
         if id_ is None:
             id_ = uuid.uuid4()
         self.set_reference(index, id_)
         return id_
 
+    def extend(self, array):
+        references = self.references
+        shape = self.dataset.shape
+        start = self.dataset.len()
+        stop = start + array.shape[0]
+
+        self.dataset.grow(stop)
+        self.dataset[start:stop, ...] = array.reshape((array.shape[0],) + tuple(shape[1:]))
+
+        references.extend(start, link_ids_to_bytes(array[self.reference_field]))
+        return start
+
     def get_references(self, items):
         if not isinstance(items, tuple):
             items = (items,)
@@ -909,59 +1501,30 @@ class HDF5referenceDataset(object):
         if isinstance(id_, str):
             id_ = uuid.UUID(id_)
         item = self.dataset[index]
-        item[self.reference_field] = str(id_)
+        item[self.reference_field] = id_.bytes if self.dtype[self.reference_field] == LINK_DTYPE else str(id_)
         self.dataset[index] = item
-        self.references[id_] = index
+        self.references.add(index[0], id_)
 
     def get_index(self, id_):
-        try:
-            index = self.find_index(id_)
-            if index:
-                self.references[id_] = index
-            else:
-                raise KeyError
-        except Exception as e:
-            warn(e)
-        finally:
-            return self.references[id_]
+        index = self.find_index(id_)
+        if index is None:
+            raise KeyError(id_)
+        return index
 
     def find_index(self, id_):
-        indices = np.where(self.reference_array == str(id_))
-        if len(indices) == 0:
-            index = None
-        elif len(indices[0]) > 1:
-            raise KeyError
+        row = self.references.get_row(id_)
+        if row is None:
+            return None
         else:
-            temp = []
-            for axis in indices:
-                if axis.size > 0:
-                    temp.append(axis[0])
-                else:
-                    return None
-            index = tuple(temp)
-        return index
+            return (row,) + self._trailing
 
     def get_id(self, index):
-        if isinstance(index, int):
-            shape = self.dataset.shape
-            if index < 0:
-                index = shape[0] - 1
-            index = tuple([index] + [0]*(len(shape)-1))
-        try:
-            self.references.inverse[index] = self.find_id(index)
-        except Exception as e:
-            warn(e)
-        finally:
-            return self.references.inverse[index]
+        return self.find_id(index)
 
     def find_id(self, index):
-        try:
-            array = self.reference_array[index]
-            result = uuid.UUID(self.reference_array[index])
-        except ValueError:
-            result = None
-        finally:
-            return result
+        if isinstance(index, tuple):
+            index = index[0]
+        return self.references.get_id(int(index))
 
     # Item Getters and Setters
     def get_item(self, location, dict_=True, id_=True):
@@ -1001,7 +1564,7 @@ class HDF5referenceDataset(object):
 
         # Assign Array to Dataset
         self.dataset[index] = tuple(array)
-        self.references[id_] = index
+        self.references.add(index[0], id_)
 
 
 class HDF5linkedDatasets(object):
@@ -1143,16 +1706,174 @@ class HDF5linkedDatasets(object):
 
         return data
 
+    def extend_linked_data(self, arrays):
+        starts = {}
+        for name, array in arrays.items():
+            starts[name] = self.references[name].extend(array)
+        return starts
+
     def append_linked_data(self, name, item, children=None, axis=0):
-        datasets = {name} | set(children)
-        location = self.new_link(datasets, axis=axis)
-        self.set_linked_data(name, location, item, children)
+        if children is None:
+            children = ()
+        if axis != 0:
+            datasets = {name} | set(children)
+            location = self.new_link(datasets, axis=axis)
+            self.set_linked_data(name, location, item, children)
+            return location
+
+        # The new rows are at the end of each dataset, so every row is built whole and written once
+        id_ = uuid.uuid4()
+        data = item.copy()
+        arrays = {}
+        for dataset_name in (name, *children):
+            references = self.references[dataset_name]
+            data[references.reference_field] = id_
+            arrays[dataset_name] = np.array([tuple(dict_to_np(data, references.dtype.descr))], dtype=references.dtype)
+
+        self.extend_linked_data(arrays)
+        return id_
+
+
+class HDF5categories(object):
+    # Stores repeated strings as integer codes, the strings of each categorical field are kept in a lookup dataset
+    # The group is prefixed so it cannot take the name of an event type
+    GROUP_NAME = "_Categories"
+    CODE_DTYPE = np.dtype(np.uint32)
+
+    # Instantiation, Copy, Destruction
+    def __init__(self, h5_container=None, init=True):
+        self.h5_container = None
+
+        self.values = {}
+        self.codes = {}
+        self.lookups = {}
+        self.written = {}
+
+        if init:
+            self.construct(h5_container)
+
+    @property
+    def is_modified(self):
+        return any(len(values) > self.written.get(name, 0) for name, values in self.values.items())
+
+    # Container Magic Methods
+    def __contains__(self, item):
+        return item in self.codes
+
+    # Constructors Methods
+    def construct(self, h5_container=None):
+        self.h5_container = h5_container
+        if h5_container is not None and h5_container.h5_fobj:
+            self.load()
+
+    # File Methods
+    def load(self):
+        self.clear()
+        fobj = self.h5_container.h5_fobj
+        if isinstance(fobj.get(self.GROUP_NAME), h5py.Group):
+            for name, dataset in fobj[self.GROUP_NAME].items():
+                values = decode_strings(dataset[...]).tolist()
+                self.values[name] = values
+                self.codes[name] = {value: code for code, value in enumerate(values)}
+                self.written[name] = len(values)
+
+    def write(self):
+        # The lookups must be stored before any code that refers to them
+        op = self.h5_container.is_open
+        self.h5_container.open()
+        group = self.h5_container.h5_fobj.require_group(self.GROUP_NAME)
+        for name, values in self.values.items():
+            written = self.written.get(name, 0)
+            if len(values) > written:
+                if name not in group:
+                    group.create_dataset(name, shape=(0,), maxshape=(None,), chunks=(256,),
+                                         dtype=h5py.string_dtype(encoding="utf-8"))
+                group[name].resize((len(values),))
+                group[name][written:] = values[written:]
+                self.written[name] = len(values)
+        self.h5_container.cache_metadata(datasets=(self.GROUP_NAME,))
+        if not op:
+            self.h5_container.release()
+
+    def clear(self):
+        self.values.clear()
+        self.codes.clear()
+        self.lookups.clear()
+        self.written.clear()
+
+    def set_values(self, values):
+        # Keeps the codes of values from another file, they are written to this container on the next write
+        self.clear()
+        for name, field_values in values.items():
+            self.values[name] = list(field_values)
+            self.codes[name] = {value: code for code, value in enumerate(field_values)}
+
+    # Encoding
+    def is_new(self, name, value):
+        return value not in self.codes.get(name, ())
+
+    def encode(self, name, value):
+        codes = self.codes.setdefault(name, {})
+        code = codes.get(value)
+        if code is None:
+            code = len(codes)
+            codes[value] = code
+            self.values.setdefault(name, []).append(value)
+            self.lookups.pop(name, None)
+        return code
+
+    def encode_item(self, item, fields):
+        item = item.copy()
+        for name in fields:
+            value = item.get(name)
+            if value is not None and not isinstance(value, (int, np.integer)):
+                item[name] = self.encode(name, str(value))
+        return item
+
+    def code(self, name, value):
+        return self.codes.get(name, {}).get(value)
+
+    # Decoding
+    def decode(self, name, codes):
+        lookup = self.lookups.get(name)
+        if lookup is None:
+            lookup = np.empty(len(self.values[name]), dtype=object)
+            lookup[:] = self.values[name]
+            self.lookups[name] = lookup
+        return lookup[np.asarray(codes, dtype=np.intp)]
+
+    def decode_item(self, item):
+        for name, value in item.items():
+            if name in self.codes and isinstance(value, (int, np.integer)):
+                item[name] = self.values[name][value]
+        return item
+
+    # Dtypes
+    @classmethod
+    def categorical_fields(cls, dtype):
+        dtype = np.dtype(dtype)
+        return [name for name in dtype.names if dtype[name] == cls.CODE_DTYPE]
+
+    @classmethod
+    def categorical_descr(cls, descr, fields=True, exclude=()):
+        # Replaces the string fields with code fields, fields is True for every string field or the names to replace
+        result = []
+        for name, dtype in descr:
+            if name not in exclude and (fields is True or name in fields) and \
+                    h5py.check_string_dtype(np.dtype(dtype)) is not None:
+                dtype = cls.CODE_DTYPE
+            result.append((name, dtype))
+        return result
 
 
 class HDF5hierarchicalDatasets(object):
     # Instantiation, Copy, Destruction
-    def __init__(self, h5_container=None, dataset=None, name="", child_name="", link_name="", init=True, **kwargs):
+    def __init__(self, h5_container=None, dataset=None, name="", child_name="", link_name="", children=None,
+                 categories=None, time_fields=None, init=True, **kwargs):
         self.h5_container = None
+        self.categories = categories
+        # The time, delta time, and start time fields when the parent stores its times as residuals
+        self.time_fields = time_fields
 
         self.parent_name = None
         self.parent_dtype = None
@@ -1164,7 +1885,7 @@ class HDF5hierarchicalDatasets(object):
         self.child_name_field = None
 
         if init:
-            self.construct(h5_container, dataset, name, child_name, link_name, **kwargs)
+            self.construct(h5_container, dataset, name, child_name, link_name, children, **kwargs)
 
     # Container Magic Methods
     def __getitem__(self, item):
@@ -1172,11 +1893,11 @@ class HDF5hierarchicalDatasets(object):
 
     # Generic Methods #
     # Constructors Methods
-    def construct(self, h5_container, dataset=None, name="", child_name="", link_name="", **kwargs):
+    def construct(self, h5_container, dataset=None, name="", child_name="", link_name="", children=None, **kwargs):
         self.h5_container = h5_container
         self.child_name_field = child_name
         if dataset:
-            self.set_parent_dataset(name=name, dataset=dataset, link_name=link_name)
+            self.set_parent_dataset(name=name, dataset=dataset, link_name=link_name, children=children)
         else:
             self.create_parent_dataset(name=name, link_name=link_name, **kwargs)
 
@@ -1190,7 +1911,7 @@ class HDF5hierarchicalDatasets(object):
         self.parent_link_name = link_name
         self.dataset_links.add_datset(name, self.parent_dataset, link_name)
 
-    def set_parent_dataset(self, name, dataset, link_name):
+    def set_parent_dataset(self, name, dataset, link_name, children=None):
         if self.parent_name is not None:
             self.dataset_links.pop_dataset(self.parent_name)
         self.parent_name = name
@@ -1198,7 +1919,7 @@ class HDF5hierarchicalDatasets(object):
         self.parent_dtype = self.parent_dataset.dtype.descr
         self.parent_link_name = link_name
         self.dataset_links.add_datset(name, self.parent_dataset, link_name)
-        self.load_parent_dataset()
+        self.load_parent_dataset(children)
 
     def remove_parent_dataset(self):
         self.dataset_links.pop_dataset(self.parent_name)
@@ -1229,37 +1950,76 @@ class HDF5hierarchicalDatasets(object):
         self.child_datasets.pop(name)
 
     # Parent Dataset
-    def load_parent_dataset(self):
+    def load_parent_dataset(self, children=None):
         self.clear_child_datasets()
 
-        array = self.parent_dataset[self.child_name_field]
+        if children is None:
+            array = np.unique(np.ravel(self.parent_dataset.read_field(self.child_name_field)))
+            array = decode_column(array, self.child_name_field, self.categories)
+            children = array.flatten().tolist() if array.size > 0 else []
 
-        if array.size > 0:
-            for child in array.flatten().tolist():
-                if child not in self.child_datasets:
-                    self.add_child_dataset(child, self.h5_container[child])
+        for child in children:
+            if child not in self.child_datasets:
+                self.add_child_dataset(child, self.h5_container[child])
 
     # Item Getter and Setters
-    def get_dataset(self, name, id_info=False):
-        data = self.parent_dataset
-        child_names = data[self.child_name_field]
-        if name != self.parent_name:
-            data = data[child_names == name]
-            child_names = data[self.child_name_field]
-        link_ids = data[self.parent_link_name]
-        if isinstance(data, np.void):
-            return self.get_data(link_ids, child_names, id_info)
+    def get_dataset(self, name, id_info=False, dict_=True):
+        if dict_:
+            records = decode_times(np.ravel(self.parent_dataset[:self.parent_dataset.len()]), self.time_fields)
+            if name != self.parent_name:
+                records = records[match_column(records[self.child_name_field], self.child_name_field, name,
+                                               self.categories)]
+            return self.records_to_items(records, id_info)
         else:
-            shape = data.shape
-
-            loops = [range(0, x) for x in shape]
-
-            return recursive_looping(loops, self.arrays_to_items, names=child_names, ids=link_ids, id_info=id_info)
+            return self.get_columns(name, id_info)
+
+    def get_columns(self, name, id_info=False):
+        records = decode_times(np.ravel(self.parent_dataset[:self.parent_dataset.len()]), self.time_fields)
+        return self.records_to_columns(records, name, id_info)
+
+    def iter_columns(self, name=None, start=0, stop=None, chunk_rows=None, id_info=False, where=None):
+        # Reads the parent dataset in batches aligned to its chunks and yields the columns of each batch
+        dataset = self.parent_dataset
+        if stop is None or stop > dataset.len():
+            stop = dataset.len()
+        # Virtual datasets have no chunks of their own
+        chunk = dataset.chunks[0] if dataset.chunks else 1
+        if chunk_rows is None:
+            chunk_rows = chunk if dataset.chunks else 65536
+        chunk_rows = max(chunk, -(-chunk_rows // chunk) * chunk)
+
+        for offset in range(start - start % chunk, stop, chunk_rows):
+            records = decode_times(np.ravel(dataset[max(offset, start):min(offset + chunk_rows, stop)]),
+                                   self.time_fields)
+            if where is not None:
+                records = records[where(records)]
+            columns = self.records_to_columns(records, name, id_info)
+            if columns.shape[0] > 0:
+                yield columns
+
+    def records_to_columns(self, records, name=None, id_info=False):
+        exclude = () if id_info else (self.parent_link_name,)
+        if name is None or name == self.parent_name:
+            return merge_records(records, exclude=exclude, categories=self.categories)
+
+        records = records[match_column(records[self.child_name_field], self.child_name_field, name, self.categories)]
+        if name not in self.child_datasets:
+            # A type that was never stored has no rows and no fields of its own
+            return merge_records(records, exclude=exclude, categories=self.categories)
+        _, children = self.read_children(records)
+        if name in children:
+            child = children[name][1]
+        else:
+            child = np.empty(0, dtype=self.child_datasets[name].dtype)
+        if not id_info:
+            exclude += (self.dataset_links.references[name].reference_field,)
+        return merge_records(records, child, exclude=exclude, categories=self.categories)
 
     def get_item(self, index, name=None, id_info=False):
         if name is None or name == self.parent_name:
             parent_index = index
-            child_name = self.parent_dataset[parent_index][self.child_name_field]
+            child_name = decode_column(self.parent_dataset[parent_index][self.child_name_field],
+                                       self.child_name_field, self.categories)
         else:
             parent_index = self.dataset_links.get_linked_indices(name, index, self.parent_name)[self.parent_name]
             child_name = name
@@ -1267,25 +2027,39 @@ class HDF5hierarchicalDatasets(object):
 
     def get_items(self, indices, id_info=False):
         data = self.parent_dataset[indices]
-        child_names = data[self.child_name_field]
-        link_ids = data[self.parent_link_name]
         if isinstance(data, np.void):
-            return self.get_data(link_ids, child_names, id_info)
+            return self.records_to_items(decode_times(np.array([data], dtype=data.dtype), self.time_fields),
+                                         id_info)[0]
         else:
-            shape = data.shape
-
-            loops = [range(0, x) for x in shape]
-
-            return recursive_looping(loops, self.arrays_to_items, names=child_names, ids=link_ids, id_info=id_info)
-
-    def arrays_to_items(self, items, names, ids, id_info=False):
-        child_name = names[items]
-        if isinstance(child_name, np.ndarray):
-            child_name = child_name.tolist()[0]
-        parent_id = ids[items]
-        if isinstance(parent_id, np.ndarray):
-            parent_id = parent_id.tolist()[0]
-        return self.get_data(parent_id, child_name, id_info)
+            items = np.empty(data.size, dtype=object)
+            items[:] = self.records_to_items(decode_times(np.ravel(data), self.time_fields), id_info)
+            return items.reshape(data.shape).tolist()
+
+    def read_children(self, records):
+        # Joins child rows to the parent records through the LinkID index, reading each child dataset once
+        names = decode_column(records[self.child_name_field], self.child_name_field, self.categories)
+        links = link_ids_to_bytes(records[self.parent_link_name])
+        children = {}
+        for name in set(names.tolist()):
+            positions = np.flatnonzero(names == name)
+            references = self.dataset_links.references[name]
+            rows = references.references.get_rows(links[positions])
+            if np.any(rows < 0):
+                raise KeyError("Missing linked rows in " + name)
+            children[name] = (positions, read_rows(references.dataset, rows))
+        return names, children
+
+    def records_to_items(self, records, id_info=False):
+        parent_exclude = () if id_info else (self.parent_link_name,)
+        items = records_to_dicts(merge_records(records, exclude=parent_exclude, categories=self.categories))
+        _, children = self.read_children(records)
+        for name, (positions, child) in children.items():
+            child_exclude = () if id_info else (self.dataset_links.references[name].reference_field,)
+            child_items = records_to_dicts(merge_records(child, exclude=child_exclude + parent_exclude,
+                                                         categories=self.categories))
+            for position, child_item in zip(positions.tolist(), child_items):
+                items[position].update(child_item)
+        return items
 
     def get_data(self, parent_ref, child_name, id_info=False):
         parent_link = self.dataset_links.references[self.parent_name].reference_field
@@ -1296,6 +2070,11 @@ class HDF5hierarchicalDatasets(object):
         parent = data[self.parent_name]
         child = data[child_name]
         result = merge_dict(parent, child)
+        if self.categories is not None:
+            self.categories.decode_item(result)
+        if self.time_fields is not None:
+            time_, delta, start = self.time_fields
+            result[time_] += result[start] + result[delta]
 
         if not id_info:
             if parent_link in result:
@@ -1324,50 +2103,836 @@ class HDF5hierarchicalDatasets(object):
         else:
             children_names = children
 
+        if self.time_fields is not None:
+            time_, delta, start = self.time_fields
+            item = item.copy()
+            item[time_] = item_to_np(item[time_]) - (item_to_np(item[start]) + item_to_np(item[delta]))
         self.dataset_links.append_linked_data(self.parent_name, item, children_names, axis=axis)
 
+    def extend_items(self, arrays):
+        # Stores whole batches of parent and child rows, arrays maps each dataset name to its new rows
+        if self.time_fields is not None:
+            arrays = arrays.copy()
+            arrays[self.parent_name] = encode_times(arrays[self.parent_name], self.time_fields)
+        return self.dataset_links.extend_linked_data(arrays)
 
-class HDF5eventLogger(HDF5container):
-    FILE_TYPE = "EventLog"
-    VERSION = "0.0.1"
-    EVENT_FIELDS = bidict(Time=0, DeltaTime=1, StartTime=2, Type=3)
-    TIME_NAME = "Time"
-    DELTA_NAME = "DeltaTime"
-    START_NAME = "StartTime"
-    TYPE_NAME = "Type"
-    LINK_NAME = "LinkID"
-    EVENT_DTYPE = np.dtype([(TIME_NAME, np.float64),
-                            (DELTA_NAME, np.float64),
-                            (START_NAME, np.float64),
-                            (TYPE_NAME, h5py.string_dtype(encoding="utf-8")),
-                            (LINK_NAME, h5py.string_dtype(encoding="utf-8"))])
-
-    # Instantiation/Destruction
-    def __init__(self, path=None, io_trigger=None, init=False):
-        super().__init__(path=path)
 
-        self.default_child_kwargs = {}
-        self.event_types = {}
-        self.start_datetime = None
-        self.start_time_counter = None
-        self.start_time_offset = None
-        self.hierarchy = None
-        if io_trigger is None:
-            self.io_trigger = AudioTrigger()
-        else:
-            self.io_trigger = io_trigger
+class NumpyRecordBuffer(object):
+    # Instantiation, Copy, Destruction
+    def __init__(self, dtype=None, capacity=1024, init=True):
+        self.dtype = None
+        self.array = None
+        self.length = 0
+
+        if init:
+            self.construct(dtype, capacity)
+
+    @property
+    def data(self):
+        return self.array[:self.length]
+
+    # Container Magic Methods
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, item):
+        return self.data[item]
+
+    # Constructors Methods
+    def construct(self, dtype, capacity=1024):
+        self.dtype = np.dtype(dtype)
+        self.array = np.empty(max(capacity, 1), dtype=self.dtype)
+        self.length = 0
+
+    # Buffer Methods
+    def append(self, record):
+        if self.length >= self.array.shape[0]:
+            self.reserve(self.array.shape[0] * 2)
+        self.array[self.length] = record
+        self.length += 1
+
+    def extend(self, records):
+        stop = self.length + records.shape[0]
+        if stop > self.array.shape[0]:
+            self.reserve(max(stop, self.array.shape[0] * 2))
+        self.array[self.length:stop] = records
+        self.length = stop
+
+    def reserve(self, capacity):
+        if capacity > self.array.shape[0]:
+            array = np.empty(capacity, dtype=self.dtype)
+            array[:self.length] = self.data
+            self.array = array
+
+    def clear(self):
+        self.length = 0
+
+
+class HDF5eventBuffer(object):
+    # Instantiation, Copy, Destruction
+    def __init__(self, parent_name="Events", dtype=None, type_name="Type", link_name="LinkID", capacity=1024,
+                 init=True):
+        self.parent_name = None
+        self.type_name = None
+        self.link_name = None
+        self.capacity = capacity
+
+        self.parent = None
+        self.child_rows = None
+        self.children = {}
+        self.descrs = {}
+        self.stamps = {}
+        self.categories = None
+
+        self.flush_time = time.perf_counter()
+
+        if init:
+            self.construct(parent_name, dtype, type_name, link_name)
+
+    # Container Magic Methods
+    def __len__(self):
+        return len(self.parent)
+
+    def __getitem__(self, item):
+        return self.get_event(item)
+
+    # Constructors Methods
+    def construct(self, parent_name, dtype, type_name, link_name):
+        self.parent_name = parent_name
+        self.type_name = type_name
+        self.link_name = link_name
+        self.parent = NumpyRecordBuffer(dtype, self.capacity)
+        self.child_rows = NumpyRecordBuffer(np.int64, self.capacity)
+        self.descrs[parent_name] = self.parent.dtype.descr
+
+    def add_child(self, name, dtype):
+        self.children[name] = NumpyRecordBuffer(dtype, self.capacity)
+        self.descrs[name] = self.children[name].dtype.descr
+
+    @property
+    def is_stamped(self):
+        return any(rows for rows, _ in self.stamps.values())
+
+    # Buffer Methods
+    def append(self, parent, child_name, child):
+        child_buffer = self.children[child_name]
+        self.child_rows.append(len(child_buffer))
+        child_buffer.append(child)
+        self.parent.append(parent)
+
+    def stamp(self, child_name, counter):
+        # Marks the last event as timed by a counter in nanoseconds, its times are filled in later
+        stamps = self.stamps.get(child_name)
+        if stamps is None:
+            stamps = self.stamps[child_name] = ([], [])
+        stamps[0].append(self.parent.length - 1)
+        stamps[1].append(counter)
+
+    def arrays(self):
+        arrays = {self.parent_name: self.parent.data}
+        for name, child in self.children.items():
+            if len(child) > 0:
+                arrays[name] = child.data
+        return arrays
+
+    def clear(self):
+        self.parent.clear()
+        self.child_rows.clear()
+        for child in self.children.values():
+            child.clear()
+        self.stamps.clear()
+        self.flush_time = time.perf_counter()
+
+    # Event Getters
+    def get_event(self, index, id_info=False):
+        parent = self.parent.data[[index]]
+        child_name = decode_column(parent[self.type_name], self.type_name, self.categories)[0]
+        child = self.children[child_name].data[self.child_rows.data[[index]]]
+
+        exclude = () if id_info else (self.link_name,)
+        return records_to_dicts(merge_records(parent, child, exclude=exclude, categories=self.categories))[0]
+
+    def get_events(self, name=None, id_info=False):
+        if name is None or name == self.parent_name:
+            return [self.get_event(i, id_info) for i in range(0, len(self))]
+        else:
+            return records_to_dicts(self.get_columns(name, id_info))
+
+    def get_columns(self, name=None, id_info=False):
+        exclude = () if id_info else (self.link_name,)
+        if name is None or name == self.parent_name:
+            return merge_records(self.parent.data, exclude=exclude, categories=self.categories)
+        else:
+            mask = match_column(self.parent.data[self.type_name], self.type_name, name, self.categories)
+            parent = self.parent.data[mask]
+            if name in self.children:
+                child = self.children[name].data[self.child_rows.data[mask]]
+            else:
+                child = None
+            return merge_records(parent, child, exclude=exclude, categories=self.categories)
+
+
+class HDF5eventTimeIndex(object):
+    # Times are kept sorted per event type with the row of each event, the None type holds every event
+    # Instantiation, Copy, Destruction
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self.length = 0
+        self.is_built = False
+
+        self.times = {}
+        self.rows = {}
+        self.modified = {}
+        self.sorted_lengths = {}
+
+    # Container Magic Methods
+    def __len__(self):
+        return self.length
+
+    def __contains__(self, item):
+        return item in self.times
+
+    # Index Methods
+    def build(self, times, names):
+        self.clear()
+        self.length = times.shape[0]
+        self.set_type(None, times, np.arange(0, self.length, dtype=np.int64))
+        for name in set(names.tolist()):
+            rows = np.flatnonzero(names == name)
+            self.set_type(name, times[rows], rows)
+        self.is_built = True
+
+    def set_type(self, name, times, rows):
+        order = np.argsort(times, kind="stable")
+        self.load_type(name, times[order], rows[order])
+
+    def load_type(self, name, times, rows):
+        self.times[name] = NumpyRecordBuffer(np.float64, max(self.capacity, times.shape[0]))
+        self.rows[name] = NumpyRecordBuffer(np.int64, max(self.capacity, times.shape[0]))
+        self.times[name].extend(times)
+        self.rows[name].extend(rows)
+        self.sorted_lengths.pop(name, None)
+
+    def add(self, name, time_):
+        row = self.length
+        self.length += 1
+        for key in (None, name):
+            if key not in self.times:
+                self.set_type(key, np.empty(0, dtype=np.float64), np.empty(0, dtype=np.int64))
+            times = self.times[key]
+            if key not in self.sorted_lengths and len(times) > 0 and time_ < times.data[-1]:
+                self.sorted_lengths[key] = len(times)
+            times.append(time_)
+            self.rows[key].append(row)
+
+    def extend(self, times, names):
+        # Adds the rows after the last one counted, names holds the type of each row
+        rows = np.arange(self.length, self.length + times.shape[0], dtype=np.int64)
+        self.length += times.shape[0]
+        self.extend_type(None, times, rows)
+        for name in set(names.tolist()):
+            selected = names == name
+            self.extend_type(name, times[selected], rows[selected])
+
+    def merge(self, name, times, rows):
+        # Adds sorted times of rows that were already counted, only the type given is changed
+        self.extend_type(name, times, rows)
+
+    def extend_type(self, name, times, rows):
+        # Times that come before the last one are appended as they are and sorted in when the type is next read
+        if name not in self.times:
+            self.set_type(name, np.empty(0, dtype=np.float64), np.empty(0, dtype=np.int64))
+        sorted_times = self.times[name]
+        if times.shape[0] == 0:
+            return
+        if name not in self.sorted_lengths:
+            earlier = len(sorted_times) > 0 and times[0] < sorted_times.data[-1]
+            if earlier or np.any(times[1:] < times[:-1]):
+                self.sorted_lengths[name] = len(sorted_times)
+        sorted_times.extend(times)
+        self.rows[name].extend(rows)
+
+    def sort_type(self, name):
+        length = self.sorted_lengths.pop(name, None)
+        if length is None:
+            return
+        times = self.times[name].data
+        rows = self.rows[name].data
+        # Only the times after the first one the new times come before are moved
+        position = int(np.searchsorted(times[:length], times[length:].min(), "right"))
+        order = np.argsort(times[position:], kind="stable") + position
+        times[position:] = times[order]
+        rows[position:] = rows[order]
+        self.modified[name] = min(position, self.modified.get(name, position))
+
+    def sort(self):
+        for name in list(self.sorted_lengths.keys()):
+            self.sort_type(name)
+
+    def clear(self):
+        self.length = 0
+        self.is_built = False
+        self.times.clear()
+        self.rows.clear()
+        self.modified.clear()
+        self.sorted_lengths.clear()
+
+    # Getters
+    def get_times(self, name=None):
+        if name in self.times:
+            self.sort_type(name)
+            return self.times[name].data
+        else:
+            return np.empty(0, dtype=np.float64)
+
+    def get_rows(self, name=None):
+        if name in self.rows:
+            self.sort_type(name)
+            return self.rows[name].data
+        else:
+            return np.empty(0, dtype=np.int64)
+
+    def search(self, times, name=None, bisect_="bisect"):
+        sorted_times = self.get_times(name)
+        n = sorted_times.shape[0]
+        times = np.asarray(times, dtype=np.float64)
+        if n == 0:
+            return np.full(times.shape, -1, dtype=np.int64)
+
+        indices = np.searchsorted(sorted_times, times, "left")
+        end = indices >= n
+        clipped = np.minimum(indices, n - 1)
+        exact = ~end & (sorted_times[clipped] == times)
+        if bisect_ == "bisect":
+            left = np.maximum(indices - 1, 0)
+            closer_left = np.abs(sorted_times[left] - times) <= np.abs(sorted_times[clipped] - times)
+            result = np.where(closer_left & (indices > 0), left, clipped)
+        elif bisect_ == "left":
+            result = np.maximum(indices - 1, 0)
+        elif bisect_ == "right":
+            result = clipped
+        else:
+            return np.full(times.shape, -1, dtype=np.int64)
+        return np.where(end, n - 1, np.where(exact, indices, result))
+
+
+class HDF5flushPolicy(object):
+    # Decides when a logger flushes its file, without events, interval, or types it only flushes when asked
+    # Instantiation, Copy, Destruction
+    def __init__(self, events=None, interval=None, types=(), recent_size=1024):
+        self.events = events
+        self.interval = interval
+        self.types = set(types)
+
+        self.pending = 0
+        self.last_time = time.perf_counter()
+        # Running totals, an unbuffered logger flushes for every event so only the recent durations are kept
+        self.flush_count = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.durations = collections.deque(maxlen=recent_size)
+        self.reasons = collections.Counter()
+
+    # Policy Methods
+    def due(self, name):
+        # Counts an event of the type and returns why the file should be flushed now, None if it should not
+        self.pending += 1
+        if name in self.types:
+            return "type"
+        elif self.events is not None and self.pending >= self.events:
+            return "events"
+        elif self.interval is not None and time.perf_counter() - self.last_time >= self.interval:
+            return "interval"
+        else:
+            return None
+
+    def is_idle_due(self):
+        if self.pending == 0 or self.interval is None:
+            return False
+        return time.perf_counter() - self.last_time >= self.interval
+
+    def record(self, duration, reason):
+        self.pending = 0
+        self.last_time = time.perf_counter()
+        self.flush_count += 1
+        self.total_time += duration
+        self.max_time = max(self.max_time, duration)
+        self.durations.append(duration)
+        self.reasons[reason] += 1
+
+    def clear(self):
+        self.pending = 0
+        self.last_time = time.perf_counter()
+        self.flush_count = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.durations.clear()
+        self.reasons.clear()
+
+    def stats(self):
+        # The 99th percentile is of the recent flushes
+        count = self.flush_count
+        return {"flushes": count, "pending": self.pending, "reasons": dict(self.reasons),
+                "total_time": self.total_time,
+                "mean_time": self.total_time / count if count else 0.0,
+                "max_time": self.max_time,
+                "p99_time": float(np.percentile(self.durations, 99)) if self.durations else 0.0}
+
+
+class HDF5storageConfig(object):
+    # How the event datasets are laid out, chunked, compressed, and cached, type_storage overrides these by type name
+    # Instantiation, Copy, Destruction
+    def __init__(self, chunk_rows=None, compression="gzip", compression_opts=None, shuffle=False, growth_factor=2.0,
+                 delta_time=False, categorical=False, type_storage=None, rdcc_nbytes=None, rdcc_nslots=None):
+        self.chunk_rows = chunk_rows
+        self.compression = compression
+        self.compression_opts = compression_opts
+        self.shuffle = shuffle
+        self.growth_factor = growth_factor
+        self.delta_time = delta_time
+        self.categorical = categorical
+        self.type_storage = {} if type_storage is None else type_storage
+        self.rdcc_nbytes = rdcc_nbytes
+        self.rdcc_nslots = rdcc_nslots
+
+
+class HDF5durabilityConfig(object):
+    # How events get from the task to the file, and how much of a session survives a crash
+    # Instantiation, Copy, Destruction
+    def __init__(self, buffered=False, buffer_size=1024, flush_interval=1.0, threaded=False, queue_size=4096,
+                 backpressure="block", journaled=False, sync="interval", sync_interval=1.0, swmr=False,
+                 swmr_pending_size=4096):
+        self.buffered = buffered
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.threaded = threaded
+        self.queue_size = queue_size
+        self.backpressure = backpressure
+        self.journaled = journaled
+        self.sync = sync
+        self.sync_interval = sync_interval
+        self.swmr = swmr
+        self.swmr_pending_size = swmr_pending_size
+
+
+class HDF5segmentConfig(object):
+    # A segmented log rolls over to a new file past any of these limits, without limits the log is one file
+    # Instantiation, Copy, Destruction
+    def __init__(self, size=None, events=None, interval=None):
+        self.size = size
+        self.events = events
+        self.interval = interval
+
+    @property
+    def is_segmented(self):
+        return self.size is not None or self.events is not None or self.interval is not None
+
+
+class HDF5eventWriter(threading.Thread):
+    # Instantiation, Copy, Destruction
+    def __init__(self, logger, maxsize=4096, backpressure="block", timeout=None, poll_interval=0.1):
+        super().__init__(name="HDF5eventWriter", daemon=True)
+        self.logger = logger
+        self.queue = queue.Queue(maxsize)
+        self.backpressure = backpressure
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+
+        self.max_depth = 0
+        self.blocked_count = 0
+        self.blocked_time = 0.0
+        self.dropped_count = 0
+        self.written_count = 0
+        self.exception = None
+
+        self._stop_item = object()
+
+    @property
+    def depth(self):
+        return self.queue.qsize()
+
+    # Producer Methods
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            if self.backpressure == "block":
+                self.blocked_count += 1
+                start = time.perf_counter()
+                try:
+                    self.queue.put(event, timeout=self.timeout)
+                except queue.Full:
+                    self.dropped_count += 1
+                    warn("Event writer queue is full, dropped a " + self.event_name(event) + " event", stacklevel=3)
+                self.blocked_time += time.perf_counter() - start
+            else:
+                self.dropped_count += 1
+                return False
+
+        depth = self.queue.qsize()
+        if depth > self.max_depth:
+            self.max_depth = depth
+        return True
+
+    @staticmethod
+    def event_name(event):
+        # Appenders queue themselves with their counter and values instead of an event
+        return event[0].name if isinstance(event, tuple) else str(event.get("Type"))
+
+    def drain(self):
+        if self.is_alive() and threading.current_thread() is not self:
+            self.queue.join()
+
+    def stop(self):
+        if self.is_alive():
+            self.queue.put(self._stop_item)
+            self.join()
+
+    def stats(self):
+        return {"depth": self.depth, "max_depth": self.max_depth, "blocked": self.blocked_count,
+                "blocked_time": self.blocked_time, "dropped": self.dropped_count, "written": self.written_count}
+
+    # Consumer Methods
+    def run(self):
+        running = True
+        while running:
+            try:
+                event = self.queue.get(timeout=self.poll_interval)
+            except queue.Empty:
+                self.write_idle()
+                continue
+
+            if event is self._stop_item:
+                running = False
+            else:
+                self.write(event)
+            self.queue.task_done()
+
+    def write(self, event):
+        try:
+            if isinstance(event, tuple):
+                appender, counter, values = event
+                appender.write(counter, values)
+            else:
+                self.logger.append_event(event)
+        except Exception as e:
+            self.exception = e
+            warn("Could not write event due to error: " + str(e), stacklevel=2)
+        else:
+            self.written_count += 1
+
+    def write_idle(self):
+        logger = self.logger
+        interval = logger.flush_interval
+        if len(logger.buffer) > 0 and interval is not None and time.perf_counter() - logger.buffer.flush_time >= interval:
+            try:
+                logger.request_flush()
+            except Exception as e:
+                self.exception = e
+                warn("Could not flush events due to error: " + str(e), stacklevel=2)
+        if logger.flush_policy.is_idle_due():
+            try:
+                logger.request_flush("interval")
+            except Exception as e:
+                self.exception = e
+                warn("Could not flush the file due to error: " + str(e), stacklevel=2)
+
+
+class HDF5eventAppender(object):
+    # Logs events of one registered type from positional values, the row is filled in without making a dict
+    # Instantiation, Copy, Destruction
+    def __init__(self, logger, name, fields, dtype=None):
+        self.logger = logger
+        self.name = name
+        self.fields = tuple(fields)
+        self.dtype = dtype
+
+        self.parent = None
+        self.link = None
+        self.categorical = ()
+        # The name and journal kind of each field, for the journal and publisher which take the values as given
+        self.kinds = []
+
+        if dtype is not None:
+            self.construct()
+
+    # Container Magic Methods
+    def __call__(self, *values):
+        self.append(*values)
+
+    # Constructors Methods
+    def construct(self):
+        logger = self.logger
+        category_fields = logger.get_category_fields(self.name)
+        type_value = self.name
+        if logger.TYPE_NAME in category_fields:
+            type_value = logger.categories.encode(logger.TYPE_NAME, self.name)
+
+        # The times and LinkIDs are left empty until the buffer is resolved
+        parent_dtype = logger.buffer.parent.dtype
+        parent = {logger.TIME_NAME: 0.0, logger.DELTA_NAME: 0.0, logger.START_NAME: 0.0, logger.TYPE_NAME: type_value,
+                  logger.LINK_NAME: empty_link_id(parent_dtype[logger.LINK_NAME])}
+        self.parent = tuple(parent[name] for name in parent_dtype.names)
+        self.link = (empty_link_id(self.dtype[logger.LINK_NAME]),)
+        self.categorical = tuple((i, name) for i, name in enumerate(self.fields) if name in category_fields)
+        self.kinds = [(name, dtype_kind(self.dtype[name])) for name in self.fields]
+
+    # Event Methods
+    def append(self, *values):
+        # The time is taken in turn with the other producers so the rows stay in time order
+        logger = self.logger
+        with logger.order_lock:
+            counter = time.perf_counter_ns()
+            logger.is_closed = False
+            if self.dtype is None:
+                # The type has no dataset, it was registered while readers were attached, so it waits as an event
+                logger.append(self.create_event(counter, values))
+                return
+            if logger.start_time_ns is None:
+                raise RuntimeError("The time must be set before events are appended")
+            if logger.publisher is not None:
+                logger.publisher.publish_values(self.name, self.kinds, self.wall_times(counter), values)
+            if logger.is_threaded:
+                # The writer thread buffers the values, the counter is turned into time with the rest of the buffer
+                logger.put_event((self, counter, values))
+            else:
+                self.write(counter, values)
+
+    def write(self, counter, values):
+        logger = self.logger
+        with logger.io_lock:
+            self.buffer_values(counter, values)
+            if logger.is_swmr_writing:
+                logger.flush_swmr()
+
+    def buffer_values(self, counter, values):
+        logger = self.logger
+        if logger.is_indexed:
+            logger.index_dirty = True
+        stored = self.encode_values(values) if self.categorical else values
+
+        buffer = logger.buffer
+        if self.name not in buffer.children:
+            buffer.add_child(self.name, self.dtype)
+        buffer.append(self.parent, self.name, stored + self.link)
+        buffer.stamp(self.name, counter)
+        if logger.is_journaled:
+            # Buffered first so an event the file cannot store is never journaled and replayed
+            logger.journal.write_values(self.name, self.kinds, self.wall_times(counter), values)
+        if logger.time_index.is_built:
+            # The row is counted now and its time is indexed once it is known
+            logger.time_index.length += 1
+        if not (logger.is_buffered or logger.is_journaled) or logger.is_flush_due():
+            # buffer_size and flush_interval only apply to buffers, an unbuffered logger stores each event as it comes
+            logger.request_flush()
+        logger.count_event(self.name)
+
+    def encode_values(self, values):
+        values = list(values)
+        for i, name in self.categorical:
+            values[i] = self.logger.categories.encode(name, str(values[i]))
+        return tuple(values)
+
+    def wall_times(self, counter):
+        # The time, delta time, and start time as timestamps, without making datetimes
+        logger = self.logger
+        seconds = logger.start_time_offset + round((counter - logger.start_time_ns) * 1e-9, 6)
+        start = logger.start_timestamp
+        return start + seconds, seconds, start
+
+    def create_event(self, counter, values):
+        logger = self.logger
+        seconds = logger.start_time_offset + round((counter - logger.start_time_ns) * 1e-9, 6)
+        now = logger.start_datetime + datetime.timedelta(seconds=seconds)
+        return {logger.TIME_NAME: now, logger.DELTA_NAME: seconds, logger.START_NAME: logger.start_datetime,
+                logger.TYPE_NAME: self.name, **dict(zip(self.fields, values))}
+
+
+class HDF5eventProducer(object):
+    # Logs the events of one source, such as a thread or device callback, and numbers them in the order it made them
+    # Instantiation, Copy, Destruction
+    def __init__(self, logger, name):
+        self.logger = logger
+        self.name = name
+        self.sequence = 0
+
+    # Container Magic Methods
+    def __len__(self):
+        return self.sequence
+
+    # Event Methods
+    def append(self, type_, **kwargs):
+        # The sequence number and time are taken together so both follow the order the events were logged in
+        logger = self.logger
+        with logger.order_lock:
+            kwargs[logger.PRODUCER_NAME] = self.name
+            kwargs[logger.SEQUENCE_NAME] = self.sequence
+            self.sequence += 1
+            logger.append(type_, **kwargs)
+
+
+class HDF5eventLogger(HDF5container):
+    FILE_TYPE = "EventLog"
+    VERSION = "0.0.1"
+    EVENT_FIELDS = bidict(Time=0, DeltaTime=1, StartTime=2, Type=3)
+    TIME_NAME = "Time"
+    DELTA_NAME = "DeltaTime"
+    START_NAME = "StartTime"
+    TYPE_NAME = "Type"
+    LINK_NAME = "LinkID"
+    TIME_ENCODING_NAME = "TimeEncoding"
+    SEGMENTS_NAME = "Segments"
+    PRODUCER_NAME = "Producer"
+    SEQUENCE_NAME = "Sequence"
+    EVENT_DTYPE = np.dtype([(TIME_NAME, np.float64),
+                            (DELTA_NAME, np.float64),
+                            (START_NAME, np.float64),
+                            (TYPE_NAME, h5py.string_dtype(encoding="utf-8")),
+                            (LINK_NAME, LINK_DTYPE)])
+    SWMR_STRING_LENGTHS = {TYPE_NAME: 64, LINK_NAME: 36}
+    SWMR_STRING_LENGTH = 256
+    # Types the logger appends itself, these are made with the declared types before readers are allowed in
+    SWMR_EVENT_TYPES = {"TimeSet": {}, "ResumeTime": {}}
+    # The index group is prefixed like the category lookups so it cannot take the name of an event type
+    INDEX_NAME = "_Index"
+    # The datasets and groups the logger keeps beside the event types
+    RESERVED_NAMES = {"Events", INDEX_NAME, HDF5categories.GROUP_NAME}
+    INDEX_VERSION = 1
+    LINK_INDEX_DTYPE = np.dtype([("LinkID", "S16"), ("Dataset", np.int32), ("Row", np.int64)])
+
+    # Instantiation/Destruction
+    def __init__(self, path=None, io_trigger=None, storage=None, durability=None, segmentation=None, flush_policy=None,
+                 indexed=True, mmap=False, event_types=None, publisher=None, io_scheduler=None, archiver=None,
+                 init=False):
+        durability = HDF5durabilityConfig() if durability is None else durability
+        if storage is None:
+            # Readers of single writer multiple reader files go by the shape, so those datasets grow exactly
+            storage = HDF5storageConfig(growth_factor=None if durability.swmr else 2.0)
+        segmentation = HDF5segmentConfig() if segmentation is None else segmentation
+        super().__init__(path=path, mmap=mmap, compression=storage.compression,
+                         compression_opts=storage.compression_opts, shuffle=storage.shuffle,
+                         rdcc_nbytes=storage.rdcc_nbytes, rdcc_nslots=storage.rdcc_nslots)
+        # Set before anything can fail so a logger that was refused is still collected quietly
+        self.is_closed = True
+        self.check_configs(storage, durability, segmentation, archiver)
+        self.growth_factor = storage.growth_factor
+
+        # How event datasets are chunked and compressed, type_storage overrides these for each event type by name
+        self.storage = {"chunk_rows": storage.chunk_rows, "compression": storage.compression,
+                        "compression_opts": storage.compression_opts, "shuffle": storage.shuffle}
+        self.type_storage = storage.type_storage
+        self.delta_time = storage.delta_time
+
+        self.default_child_kwargs = {}
+        self.event_types = {} if event_types is None else event_types
+        self.start_datetime = None
+        self.start_time_counter = None
+        self.start_time_ns = None
+        self.start_time_offset = None
+        self.hierarchy = None
+        if io_trigger is None:
+            self.io_trigger = AudioTrigger()
+        else:
+            self.io_trigger = io_trigger
+
+        self.is_buffered = durability.buffered
+        self.buffer_size = durability.buffer_size
+        self.flush_interval = durability.flush_interval
+        # When the file itself is flushed, which costs a stall but keeps what was logged if the session dies
+        self.flush_policy = HDF5flushPolicy() if flush_policy is None else flush_policy
+        # Defers flushes and holds events in the buffer while a task is in a timing critical phase
+        self.io_scheduler = io_scheduler
+
+        # A segmented log rolls over to a new file past any of these limits, the path given becomes the master file
+        self.segment_size = segmentation.size
+        self.segment_events = segmentation.events
+        self.segment_interval = segmentation.interval
+        self.master_path = None
+        self.segment_paths = []
+        self.segment_types = {}
+        self.segment_count = 0
+        self.segment_time = None
+        self.segment_warned = False
+        # Copies the finished files to an archive once the log is closed
+        self.archiver = archiver
+
+        self.is_swmr = durability.swmr
+        self.swmr_ready = False
+        self.swmr_pending = []
+        self.swmr_pending_size = durability.swmr_pending_size
+        self.swmr_dropped = 0
+        self.swmr_flush_time = time.perf_counter()
+        self.categorical = storage.categorical
+        self.categories = HDF5categories()
+        self.category_fields = {}
+        if self.is_swmr:
+            self.event_dtype = np.dtype(self.fixed_string_descr([(n, self.EVENT_DTYPE[n]) for n in self.EVENT_DTYPE.names]))
+        elif self.categorical:
+            self.event_dtype = np.dtype(self.categorical_descr([(n, self.EVENT_DTYPE[n]) for n in self.EVENT_DTYPE.names]))
+        else:
+            self.event_dtype = self.EVENT_DTYPE
+
+        self.buffer = HDF5eventBuffer(dtype=self.event_dtype, type_name=self.TYPE_NAME, link_name=self.LINK_NAME,
+                                      capacity=self.buffer_size or 1024)
+        self.buffer.categories = self.categories
+
+        self.is_threaded = durability.threaded
+        self.queue_size = durability.queue_size
+        self.backpressure = durability.backpressure
+        self.writer = None
+
+        # Producers on other threads take turns, the order lock keeps the rows in the order their times were taken
+        # and the IO lock keeps the file and buffer whole, the writer thread only needs the IO lock
+        self.order_lock = threading.RLock()
+        self.io_lock = threading.RLock()
+        self.producers = {}
+
+        self.time_index = HDF5eventTimeIndex()
+
+        self.is_indexed = indexed
+        self.index_valid = False
+        self.index_dirty = False
+        self.index_links = {}
+        self.index_datasets = []
+        self.index_written = {}
+        self.index_links_written = {}
+
+        self.publisher = publisher
+
+        self.is_journaled = durability.journaled
+        self.journal = EventJournal(sync=durability.sync, sync_interval=durability.sync_interval,
+                                    type_name=self.TYPE_NAME, link_name=self.LINK_NAME)
 
         if init:
             self.construct()
 
+    @staticmethod
+    def check_configs(storage, durability, segmentation, archiver=None):
+        # Settings that cannot work together are refused before anything is logged
+        if durability.swmr and storage.categorical:
+            # The lookups are variable length strings, which cannot be written while readers are attached
+            raise ValueError("Categorical fields cannot be used with single writer multiple reader files")
+        if durability.swmr and storage.growth_factor is not None:
+            # Readers go by the shape of a dataset, so rows past the end would be read as events
+            raise ValueError("Single writer multiple reader files must grow exactly, set growth_factor to None")
+        if durability.threaded and durability.journaled:
+            # Events waiting in the writer's queue are not journaled yet, so a crash would lose them anyway
+            raise ValueError("A threaded logger cannot be journaled, buffer the events instead")
+        if segmentation.is_segmented and archiver is not None:
+            raise ValueError("A segmented log cannot be archived, its segments are still read through the master")
+
     # Container Magic Methods
     def __len__(self):
-        return self.Events.len()
+        self.drain()
+        self.check_segments()
+        with self.io_lock:
+            return self.Events.len() + len(self.buffer)
 
     def __getitem__(self, item):
         if isinstance(item, str):
             return super().__getitem__(item)
-        elif isinstance(item, int) or isinstance(item, slice):
+        self.check_segments()
+        if isinstance(item, int) or isinstance(item, slice):
             return self.get_item((item, 0))
         else:
             return self.get_item(item)
@@ -1378,13 +2943,69 @@ class HDF5eventLogger(HDF5container):
 
     # Constructors
     def construct(self, open_=False, **kwargs):
+        if self.archiver is not None and not self.path.exists():
+            # A new log is written in the staging directory, the archive only receives it once it is closed
+            self.path = self.archiver.stage_path(self.path.name, default=self.path.parent)
+        if self.is_segmented and self.master_path is None:
+            self.master_path = self.path
+            self.path = self.segment_path(0)
+            self.segment_paths = [self.path]
+        self.segment_count = 0
+        self.segment_time = time.perf_counter()
+        self.swmr_ready = False
+        self.is_closed = False
         super().construct(open_=open_, **kwargs)
+        self.time_index.clear()
+
+        op = self.is_open
+        self.open()
+        self.recover_lengths()
+        self.categories.construct(self)
+        self.category_fields.clear()
+        if self.Events.dtype != self.buffer.parent.dtype and len(self.buffer) == 0:
+            # The file decides whether its fields are categorical
+            self.buffer = HDF5eventBuffer(dtype=self.Events.dtype, type_name=self.TYPE_NAME, link_name=self.LINK_NAME,
+                                          capacity=self.buffer_size or 1024)
+            self.buffer.categories = self.categories
+        self.load_hierarchy()
+        if self.is_journaled:
+            # The file is left complete on disk so a crash only loses what is not in the journal
+            self.h5_fobj.flush()
+        if self.is_swmr:
+            self.start_swmr()
+        if not op:
+            self.release()
+
+        # A journal is left by a session that crashed, or by stop_swmr when readers kept it from storing events of
+        # undeclared types, either way its events are stored once the file can be opened for writing again
+        self.journal.path = self.path.with_name(self.path.name + ".journal")
+        if self.journal.exists():
+            self.replay_journal()
+
+    def load_hierarchy(self):
+        children = self.load_indexes()
+        # The file decides how its times are stored
+        if self.Events.attrs.get(self.TIME_ENCODING_NAME) == "Delta":
+            time_fields = (self.TIME_NAME, self.DELTA_NAME, self.START_NAME)
+        else:
+            time_fields = None
         self.hierarchy = HDF5hierarchicalDatasets(h5_container=self, dataset=self.Events, name="Events",
-                                                  child_name=self.TYPE_NAME, link_name=self.LINK_NAME)
+                                                  child_name=self.TYPE_NAME, link_name=self.LINK_NAME,
+                                                  children=children, categories=self.categories,
+                                                  time_fields=time_fields)
+        if self.index_valid:
+            for name, references in self.hierarchy.dataset_links.references.items():
+                references.index_loader = functools.partial(self.load_link_ids, name)
 
     def create_file(self, open_=False):
         super().create_file(open_=open_)
-        self.create_event_dataset(name="Events", dtype=self.EVENT_DTYPE)
+        events = self.create_event_dataset(name="Events", dtype=self.event_dtype)
+        if self.delta_time:
+            with events:
+                events.attrs[self.TIME_ENCODING_NAME] = "Delta"
+        # A new segment starts with the event types of the one before it
+        for name, dtype in self.segment_types.items():
+            self.create_event_dataset(name, dtype=dtype)
 
     # Datasets
     def create_event_dataset(self, name, dtype=None, data=None, **kwargs):
@@ -1394,20 +3015,59 @@ class HDF5eventLogger(HDF5container):
         else:
             m = 0
             n = 1
-        defaults = {"shape": (m, n), "dtype": dtype, "maxshape": (None, n)}
+        defaults = merge_dict({"shape": (m, n), "dtype": dtype, "maxshape": (None, n)}, self.storage_args(name, n))
         args = merge_dict(defaults, kwargs)
         return self.create_dataset(name=name, data=data, **args)
 
+    def storage_args(self, name, n=1):
+        # The codec is always given so an event type can store its data uncompressed when the logger does not
+        storage = merge_dict(self.storage, self.type_storage.get(name))
+        args = {"compression": None, "compression_opts": None, "shuffle": False}
+        args.update(compression_args(storage["compression"], storage["compression_opts"], storage["shuffle"]))
+        if storage["chunk_rows"] is not None:
+            args["chunks"] = (storage["chunk_rows"], n)
+        return args
+
     # Sequence Methods
     def get_item(self, item):
-        return self.hierarchy.get_items(item)
+        self.drain()
+        with self.io_lock:
+            # Split the request between the rows in the file and the rows still in the buffer
+            index = item[0] if isinstance(item, tuple) else item
+            stored = self.Events.len()
+            if isinstance(index, slice):
+                indices = range(*index.indices(stored + len(self.buffer)))
+                # Reversed slices are read forwards and turned around, draining again here could wait on the lock
+                step = indices.step
+                if step < 0:
+                    indices = indices[::-1]
+                split = len(range(indices.start, min(indices.stop, stored), indices.step))
+                disk = indices[:split]
+                result = self.hierarchy.get_items((slice(disk.start, disk.stop, disk.step), 0)) if disk else []
+                result += [self.buffer.get_event(i - stored) for i in indices[split:]]
+                return result[::-1] if step < 0 else result
+            else:
+                if index < 0:
+                    index += stored + len(self.buffer)
+                if index < stored:
+                    return self.hierarchy.get_items((index, 0))
+                else:
+                    return self.buffer.get_event(index - stored)
 
     def append(self, type_, **kwargs):
-        if isinstance(type_, dict):
-            self.append_event(type_)
-        else:
-            event = self.create_event(type_=type_, **kwargs)
-            self.append_event(event)
+        with self.order_lock:
+            self.is_closed = False
+            if isinstance(type_, dict):
+                event = type_
+            else:
+                event = self.create_event(type_=type_, **kwargs)
+
+            if self.publisher is not None:
+                self.publisher.publish(event)
+            if self.is_threaded:
+                self.put_event(event)
+            else:
+                self.append_event(event)
 
     def insert(self, i, type_, **kwargs):
         if isinstance(type_, dict):
@@ -1417,9 +3077,27 @@ class HDF5eventLogger(HDF5container):
             super().insert(i, event)
 
     def clear(self):
+        # What is left of the session is stored before the times and paths are reset for the next one
+        if self.is_open or not self.is_closed:
+            # The next session has its own file, so this one is closed instead of held open without a path
+            self.close()
+        else:
+            self.stop_writer()
+            self.drain()
+            self.flush_buffer()
+        self.time_index.clear()
+        self.flush_policy.clear()
+        self.producers.clear()
         self.start_datetime = None
         self.start_time_counter = None
+        self.start_time_ns = None
         self._path = None
+        self.master_path = None
+        self.segment_paths = []
+        self.segment_types = {}
+        self.segment_warned = False
+        self.swmr_pending = []
+        self.swmr_dropped = 0
 
     # User Event Methods
     def create_event(self,  type_, **kwargs):
@@ -1428,30 +3106,851 @@ class HDF5eventLogger(HDF5container):
         return {"Time": now, "DeltaTime": seconds, "StartTime": self.start_datetime, self.TYPE_NAME: type_, **kwargs}
 
     def append_event(self, event, axis=0, child_kwargs=None):
-        child_name = event[self.TYPE_NAME]
-        if child_name not in self.hierarchy.child_datasets:
-            child_event = event.copy()
-            for field in self.EVENT_FIELDS.keys():
-                if field in child_event:
-                    child_event.pop(field)
-            if self.LINK_NAME not in child_event:
-                child_event[self.LINK_NAME] = str(uuid.uuid4())
-            child_dtype = self.event2dtype(child_event)
-            if child_kwargs is None:
-                child_kwargs = self.default_child_kwargs
-            child_dataset = self.create_event_dataset(child_name, dtype=child_dtype, **child_kwargs)
-            self.hierarchy.add_child_dataset(child_name, child_dataset)
-        self.hierarchy.append_item(event, (child_name,), axis)
+        with self.io_lock:
+            child_name = event[self.TYPE_NAME]
+            if self.is_swmr_writing and self.is_swmr_held(event):
+                self.hold_swmr_event(event)
+                return
+            deferring = self.is_deferring
+            if len(self.buffer) > 0 and not (self.is_buffered or self.is_journaled or deferring):
+                # Events from appenders are stored first to keep the order
+                self.write_buffer()
+            if self.is_indexed:
+                self.index_dirty = True
+            if child_name not in self.hierarchy.child_datasets:
+                self.create_event_type(event, child_kwargs)
+            # Indexed before it is stored, storing can fill the buffer and save the index with the event in it
+            if self.time_index.is_built:
+                self.time_index.add(child_name, item_to_np(event[self.TIME_NAME]))
+            self.store_event(event, child_name, deferring, axis)
+            if self.is_swmr_writing:
+                self.flush_swmr()
+            self.count_event(child_name)
+
+    def store_event(self, event, child_name, deferring=False, axis=0):
+        if self.is_buffered or self.is_journaled:
+            self.buffer_event(event)
+        elif deferring:
+            # Held until the scheduler reaches an idle phase
+            self.buffer_event(event)
+            self.request_flush()
+        else:
+            item = self.encode_event(event)
+            if self.categories.is_modified:
+                self.categories.write()
+            self.hierarchy.append_item(item, (child_name,), axis)
+
+    def count_event(self, name):
+        # Flushes the file and rolls the log over when the event just logged makes them due
+        reason = self.flush_policy.due(name)
+        if reason is not None:
+            self.request_flush(reason)
+        if self.is_segmented:
+            self.segment_count += 1
+            if self.is_rollover_due():
+                self.request_rollover()
+
+    def create_event_type(self, event, child_kwargs=None):
+        child_event = event.copy()
+        for field in self.EVENT_FIELDS.keys():
+            if field in child_event:
+                child_event.pop(field)
+        if self.LINK_NAME not in child_event:
+            child_event[self.LINK_NAME] = str(uuid.uuid4())
+        return self.create_child_type(event[self.TYPE_NAME], self.event2dtype(child_event), child_kwargs)
+
+    def create_child_type(self, child_name, descr, child_kwargs=None):
+        if child_name in self.RESERVED_NAMES:
+            raise ValueError("Event type " + child_name + " has a name the event log reserves for itself")
+        # Children store their LinkIDs the same way as the events, files made before binary LinkIDs use strings
+        child_dtype = [(name, self.Events.dtype[name] if name == self.LINK_NAME else dtype) for name, dtype in descr]
+        if self.is_swmr:
+            child_dtype = self.fixed_string_descr(child_dtype)
+        elif self.categorical:
+            child_dtype = self.categorical_descr(child_dtype)
+        if child_kwargs is None:
+            child_kwargs = self.default_child_kwargs
+        child_dataset = self.create_event_dataset(child_name, dtype=child_dtype, **child_kwargs)
+        self.hierarchy.add_child_dataset(child_name, child_dataset)
+        if self.is_journaled and self.is_open:
+            self.h5_fobj.flush()
+        return child_dataset
+
+    def register_event_type(self, name, fields, child_kwargs=None):
+        # Declares the fields of an event type up front and returns an appender that logs it from positional values
+        if isinstance(fields, dict):
+            fields = fields.items()
+        descr = [(field, self.field_dtype(dtype)) for field, dtype in fields]
+        names = tuple(field for field, _ in descr)
+
+        with self.io_lock:
+            op = self.is_open
+            self.open()
+            if name in self.hierarchy.child_datasets:
+                dtype = self.hierarchy.child_datasets[name].dtype
+            elif name in self.h5_fobj:
+                self.hierarchy.add_child_dataset(name, self.get_dataset(name))
+                dtype = self.hierarchy.child_datasets[name].dtype
+            elif self.is_swmr_writing:
+                # Datasets cannot be made now, the events wait for the file to be reopened like other undeclared types
+                dtype = None
+            else:
+                dtype = self.create_child_type(name, descr + [(self.LINK_NAME, LINK_DTYPE)], child_kwargs).dtype
+            if not op:
+                self.release()
+
+        if dtype is not None and dtype.names != names + (self.LINK_NAME,):
+            raise ValueError("Event type " + name + " is stored with the fields " + ", ".join(dtype.names))
+        return HDF5eventAppender(self, name, names, dtype)
+
+    def producer(self, name):
+        # Returns the front end for a source of events, each source should log through its own producer
+        with self.order_lock:
+            producer = self.producers.get(name)
+            if producer is None:
+                producer = self.producers[name] = HDF5eventProducer(self, name)
+            return producer
+
+    @property
+    def start_timestamp(self):
+        return self.start_datetime.timestamp()
+
+    # Buffering
+    @property
+    def is_deferring(self):
+        # The buffer is still bounded, past the scheduler's limit it is written even in a critical phase
+        scheduler = self.io_scheduler
+        return scheduler is not None and scheduler.is_critical and len(self.buffer) < scheduler.max_buffered
+
+    def is_flush_due(self):
+        if self.buffer_size is not None and len(self.buffer) >= self.buffer_size:
+            return True
+        else:
+            return self.flush_interval is not None and time.perf_counter() - self.buffer.flush_time >= self.flush_interval
+
+    def buffer_event(self, event):
+        item = event.copy()
+        item[self.LINK_NAME] = uuid.uuid4()
+        # Buffered first so an event the file cannot store is never journaled and replayed
+        self.buffer_item(item)
+        if self.is_journaled:
+            self.journal.write(item)
+
+        if (self.is_buffered or self.is_journaled) and self.is_flush_due():
+            self.request_flush()
+
+    def buffer_item(self, item):
+        child_name = item[self.TYPE_NAME]
+        if child_name not in self.buffer.children:
+            self.buffer.add_child(child_name, self.hierarchy.child_datasets[child_name].dtype)
+        item = self.encode_event(item)
+
+        parent = tuple(dict_to_np(item, self.buffer.descrs[self.buffer.parent_name]))
+        child = tuple(dict_to_np(item, self.buffer.descrs[child_name]))
+        self.buffer.append(parent, child_name, child)
+
+    def resolve_buffer(self):
+        # Fills in the times and LinkIDs of the events from appenders, the counter is turned into time once per batch
+        with self.io_lock:
+            buffer = self.buffer
+            if not buffer.is_stamped:
+                return
+            start = self.start_timestamp
+            stored = self.Events.len() if self.time_index.is_built else 0
+            parent = buffer.parent.data
+            all_times = []
+            all_rows = []
+            for name, (rows, counters) in buffer.stamps.items():
+                if not rows:
+                    continue
+                rows = np.array(rows, dtype=np.int64)
+                seconds = self.start_time_offset + np.round((np.array(counters) - self.start_time_ns) * 1e-9, 6)
+                times = start + seconds
+                parent[self.TIME_NAME][rows] = times
+                parent[self.DELTA_NAME][rows] = seconds
+                parent[self.START_NAME][rows] = start
+
+                links = new_link_ids(rows.shape[0], parent.dtype[self.LINK_NAME])
+                parent[self.LINK_NAME][rows] = links
+                child = buffer.children[name].data
+                child[self.LINK_NAME][buffer.child_rows.data[rows]] = links
+
+                if self.time_index.is_built:
+                    self.time_index.merge(name, times, rows + stored)
+                    all_times.append(times)
+                    all_rows.append(rows + stored)
+            buffer.stamps.clear()
+
+            if all_times:
+                times = np.concatenate(all_times)
+                rows = np.concatenate(all_rows)
+                order = np.argsort(times, kind="stable")
+                self.time_index.merge(None, times[order], rows[order])
+
+    def flush_buffer(self, record=True):
+        with self.io_lock:
+            if len(self.buffer) > 0:
+                start = time.perf_counter()
+                op = self.is_open
+                self.open()
+                self.write_buffer()
+                self.write_indexes(build=False)
+                self.write_lengths()
+                self.h5_fobj.flush()
+                self.journal.checkpoint()
+                if not op:
+                    self.release()
+                if record:
+                    self.flush_policy.record(time.perf_counter() - start, "buffer")
+
+    def request_flush(self, reason="buffer"):
+        # Flushes now unless the scheduler is in a timing critical phase, then the flush waits for an idle phase
+        if self.is_deferring:
+            # Queued once for each reason so the flush stats still tell why the file was flushed
+            self.io_scheduler.submit(("flush", reason), self.flush, reason)
+        elif reason != "buffer":
+            self.flush(reason)
+        elif self.is_buffered or self.is_journaled:
+            # The journal is only checkpointed once what it holds is flushed to the file
+            self.flush_buffer()
+        else:
+            # Unbuffered loggers leave flushing the file to their flush policy
+            self.write_buffer()
+
+    def write_buffer(self):
+        # Stores the buffered events without flushing the file
+        with self.io_lock:
+            if len(self.buffer) > 0:
+                self.resolve_buffer()
+                op = self.is_open
+                self.open()
+                if self.categories.is_modified:
+                    self.categories.write()
+                self.hierarchy.extend_items(self.buffer.arrays())
+                self.buffer.clear()
+                if not op:
+                    self.release()
+
+    # Journal
+    def replay_journal(self):
+        # Stores the events of a journal left behind by a session that did not close
+        events = self.journal.read()
+        op = self.is_open
+        self.open()
+        if events:
+            links = uuid_strings_to_bytes(np.array([event[self.LINK_NAME] for event in events], dtype=object))
+            stored = self.hierarchy.dataset_links.references[self.hierarchy.parent_name].references.get_rows(links)
+            events = [event for event, row in zip(events, stored.tolist()) if row < 0]
+        if events:
+            warn("Recovering " + str(len(events)) + " events from " + self.journal.path.as_posix(), stacklevel=2)
+            if self.is_indexed:
+                self.index_dirty = True
+            for event in events:
+                child_name = event[self.TYPE_NAME]
+                if child_name in self.hierarchy.child_datasets:
+                    pass
+                elif child_name in self.h5_fobj:
+                    self.hierarchy.add_child_dataset(child_name, self.get_dataset(child_name))
+                else:
+                    self.create_event_type(event)
+                self.buffer_item(event)
+                if self.time_index.is_built:
+                    self.time_index.add(child_name, event[self.TIME_NAME])
+            if self.categories.is_modified:
+                self.categories.write()
+            self.hierarchy.extend_items(self.buffer.arrays())
+            self.buffer.clear()
+            self.write_indexes()
+            self.h5_fobj.flush()
+        self.journal.close(remove=True)
+        if not op:
+            self.release()
+        return len(events)
+
+    # Categorical Fields
+    def get_category_fields(self, name):
+        fields = self.category_fields.get(name)
+        if fields is None:
+            fields = HDF5categories.categorical_fields(self.hierarchy.parent_dataset.dtype)
+            if name in self.hierarchy.child_datasets:
+                fields += HDF5categories.categorical_fields(self.hierarchy.child_datasets[name].dtype)
+            self.category_fields[name] = fields
+        return fields
+
+    def encode_event(self, event):
+        fields = self.get_category_fields(event[self.TYPE_NAME])
+        return self.categories.encode_item(event, fields) if fields else event
+
+    def has_new_category(self, event):
+        if event[self.TYPE_NAME] not in self.hierarchy.child_datasets:
+            return False
+        fields = self.get_category_fields(event[self.TYPE_NAME])
+        return any(self.categories.is_new(name, str(event[name])) for name in fields if name in event)
+
+    def categorical_descr(self, descr):
+        return HDF5categories.categorical_descr(descr, self.categorical, exclude=(self.LINK_NAME,))
+
+    # Writer Thread
+    def start_writer(self):
+        if self.writer is None or not self.writer.is_alive():
+            self.writer = HDF5eventWriter(self, maxsize=self.queue_size, backpressure=self.backpressure)
+            self.writer.start()
+        return self.writer
+
+    def stop_writer(self):
+        if self.writer is not None:
+            self.writer.stop()
+
+    def put_event(self, event):
+        if self.writer is None or not self.writer.is_alive():
+            self.start_writer()
+        return self.writer.put(event)
+
+    def drain(self):
+        if self.writer is not None:
+            self.writer.drain()
+        self.resolve_buffer()
+
+    def writer_stats(self):
+        if self.writer is None:
+            return None
+        else:
+            return self.writer.stats()
+
+    def flush(self, reason="demand"):
+        start = time.perf_counter()
+        # The writer is drained first since it needs the lock to store what is queued
+        self.drain()
+        with self.io_lock:
+            self.flush_buffer(record=False)
+            # Flushes the policy makes while appending save an index that is already built but do not build one
+            self.write_indexes(build=reason == "demand")
+            # A released file can still be held open by the handle manager, so it is leased again to be flushed
+            op = self.is_open
+            if op or (self.is_managed and self.path is not None and self.path in self.handles):
+                self.open()
+                self.write_lengths()
+                self.h5_fobj.flush()
+                if not op:
+                    self.release()
+            self.flush_policy.record(time.perf_counter() - start, reason)
+
+    def flush_stats(self):
+        return self.flush_policy.stats()
+
+    # Growable Datasets
+    def recover_lengths(self):
+        # A file left open keeps its spare rows, the rows written after its lengths were stored have LinkIDs
+        for dataset in self.h5_fobj.values():
+            if isinstance(dataset, h5py.Dataset) and HDF5dataset.LENGTH_NAME in dataset.attrs:
+                length = int(dataset.attrs[HDF5dataset.LENGTH_NAME])
+                names = dataset.dtype.names or ()
+                if self.LINK_NAME in names and dataset.shape[0] > length:
+                    written = link_ids_to_bytes(np.ravel(dataset.fields(self.LINK_NAME)[length:])) != b""
+                    length += written.shape[0] if written.all() else int(np.argmin(written))
+                self.dataset_lengths[dataset.name] = length
+        self.trim_datasets()
+
+    # Persisted Indexes
+    def load_indexes(self):
+        # Returns the event types listed in the index if the index matches the Events dataset
+        self.index_valid = False
+        self.index_dirty = False
+        self.index_links = {}
+        self.index_datasets = []
+        self.index_written = {}
+        self.index_links_written = {}
+        if not self.is_indexed or self.INDEX_NAME not in self.h5_fobj:
+            return None
+
+        group = self.h5_fobj[self.INDEX_NAME]
+        attrs = group.attrs
+        try:
+            valid = attrs["Version"] == self.INDEX_VERSION and attrs["Rows"] == self.Events.len() and \
+                attrs["Links"] == group["Links"].shape[0]
+            # Each type's times must cover its dataset, an index saved part way through an append would not
+            for name in decode_strings(np.ravel(attrs["Types"])).tolist():
+                if valid and name in self.h5_fobj and self.get_dataset(name).len() > 0:
+                    valid = name in group["Times"] and group["Times"][name].shape[0] == self.get_dataset(name).len()
+            if valid and self.Events.len() > 0:
+                valid = group["Times"]["Events"].shape[0] == self.Events.len()
+        except KeyError:
+            valid = False
+        if not valid:
+            warn(self.path.as_posix() + " has an out of date event index, it will be rebuilt", stacklevel=2)
+            return None
+
+        self.index_datasets = decode_strings(np.ravel(attrs["Datasets"])).tolist()
+        links = group["Links"][...]
+        for code, name in enumerate(self.index_datasets):
+            self.index_links[name] = links[links["Dataset"] == code]
+            self.index_links_written[name] = self.get_dataset(name).len()
+        self.index_valid = True
+        return decode_strings(np.ravel(attrs["Types"])).tolist()
+
+    def load_link_ids(self, name):
+        references = self.hierarchy.dataset_links.references[name]
+        ids = np.zeros(references.dataset.len(), dtype="S16")
+        links = self.index_links.pop(name, None)
+        if links is not None:
+            rows = links["Row"]
+            valid = rows < ids.shape[0]
+            ids[rows[valid]] = links["LinkID"][valid]
+        return ids
+
+    def load_time_index(self):
+        group = self.h5_fobj[self.INDEX_NAME]
+        self.time_index.clear()
+        self.time_index.length = int(group.attrs["Rows"])
+        for name in group["Times"]:
+            key = None if name == "Events" else name
+            self.time_index.load_type(key, group["Times"][name][...], group["Rows"][name][...])
+            self.index_written[key] = group["Times"][name].shape[0]
+        self.time_index.is_built = True
+        # The events appended since the index was saved are added to it
+        times, names = self.read_index_times(self.time_index.length)
+        self.time_index.extend(times, names)
+
+    def write_indexes(self, build=True):
+        # An index that was never queried is only built when asked to, so a flush during appending does not build it
+        if not self.is_indexed or not self.index_dirty or len(self.buffer) > 0 or self.is_swmr_writing:
+            return
+        if not self.time_index.is_built and not build:
+            return
+
+        op = self.is_open
+        self.open()
+        group = self.h5_fobj.require_group(self.INDEX_NAME)
+        self.cache_metadata(datasets=(self.INDEX_NAME,))
+        if not self.time_index.is_built:
+            self.build_time_index()
+        if not self.index_valid:
+            # Rebuild the whole index from the datasets
+            for name in list(group.keys()):
+                del group[name]
+            self.index_written.clear()
+            self.index_links_written.clear()
+            self.index_datasets.clear()
+            for references in self.hierarchy.dataset_links.references.values():
+                references.build_index()
+            self.index_valid = True
+
+        self.write_time_index(group.require_group("Times"), group.require_group("Rows"))
+        self.write_link_index(group)
+        group.attrs["Version"] = self.INDEX_VERSION
+        group.attrs["Rows"] = self.Events.len()
+        group.attrs["Links"] = group["Links"].shape[0]
+        group.attrs["Types"] = np.array(list(self.hierarchy.child_datasets.keys()), dtype=h5py.string_dtype())
+        group.attrs["Datasets"] = np.array(self.index_datasets, dtype=h5py.string_dtype())
+        self.index_dirty = False
+        if not op:
+            self.release()
+
+    def write_time_index(self, times_group, rows_group):
+        if not self.time_index.is_built:
+            return
+        self.time_index.sort()
+        for key in list(self.time_index.times.keys()):
+            name = "Events" if key is None else key
+            # Only the part after the first changed position is written again
+            start = self.index_written.get(key, 0)
+            start = min(start, self.time_index.modified.get(key, start))
+            self.write_index_dataset(times_group, name, self.time_index.get_times(key)[start:], start)
+            self.write_index_dataset(rows_group, name, self.time_index.get_rows(key)[start:], start)
+            self.index_written[key] = len(self.time_index.times[key])
+        self.time_index.modified.clear()
+
+    def write_link_index(self, group):
+        references = self.hierarchy.dataset_links.references
+        if any(r.is_index_built and r.references.modified for r in references.values()):
+            # Rows were relinked so the table is written again from the start
+            for r in references.values():
+                r.references.modified = False
+            self.index_links_written.clear()
+            offset = 0
+        else:
+            offset = group["Links"].shape[0] if "Links" in group else 0
+
+        arrays = []
+        for name, reference in references.items():
+            if not reference.is_index_built:
+                continue
+            if name not in self.index_datasets:
+                self.index_datasets.append(name)
+            index = reference.references
+            start = self.index_links_written.get(name, 0)
+            if index.length > start:
+                array = np.empty(index.length - start, dtype=self.LINK_INDEX_DTYPE)
+                array["LinkID"] = index.ids[start:index.length]
+                array["Dataset"] = self.index_datasets.index(name)
+                array["Row"] = np.arange(start, index.length)
+                arrays.append(array)
+            self.index_links_written[name] = index.length
+
+        if arrays:
+            links = np.concatenate(arrays)
+        else:
+            links = np.empty(0, dtype=self.LINK_INDEX_DTYPE)
+        self.write_index_dataset(group, "Links", links, offset)
+
+    def write_index_dataset(self, group, name, array, start=0):
+        if name not in group:
+            group.create_dataset(name, shape=(0,), dtype=array.dtype, maxshape=(None,), chunks=(4096,), **self.cargs)
+        dataset = group[name]
+        dataset.resize((start + array.shape[0],))
+        if array.shape[0] > 0:
+            dataset[start:] = array
+
+    # Single Writer Multiple Reader
+    @property
+    def is_swmr_writing(self):
+        # Checked on every append, so loggers that never use single writer multiple reader skip asking h5py
+        return self.is_swmr and self.is_open and self.h5_fobj.mode == "r+" and self.h5_fobj.swmr_mode
+
+    def start_swmr(self):
+        # Datasets cannot be created once readers are allowed in, so the declared event types are made first
+        op = self.is_open
+        self.open()
+        for name, fields in {**self.SWMR_EVENT_TYPES, **self.event_types}.items():
+            if name in self.hierarchy.child_datasets:
+                pass
+            elif name in self.h5_fobj:
+                self.hierarchy.add_child_dataset(name, self.get_dataset(name))
+            else:
+                self.create_event_type({self.TYPE_NAME: name, **fields})
+        self.swmr_ready = True
+        self.h5_fobj.swmr_mode = True
+        if not op:
+            self.release()
+
+    def is_swmr_held(self, event):
+        # Datasets cannot be made while readers are attached, so new types and category values have to wait
+        return event[self.TYPE_NAME] not in self.hierarchy.child_datasets or self.has_new_category(event)
+
+    def flush_swmr(self):
+        # Readers only see what has been flushed, so a live file is flushed at least every flush interval
+        if time.perf_counter() - self.swmr_flush_time >= (self.flush_interval or 0):
+            self.h5_fobj.flush()
+            self.swmr_flush_time = time.perf_counter()
+
+    def hold_swmr_event(self, event):
+        # Events of types that were not declared wait for the readers to leave, past the limit they are dropped
+        if self.swmr_pending_size is not None and len(self.swmr_pending) >= self.swmr_pending_size:
+            if self.swmr_dropped == 0:
+                warn(str(self.swmr_pending_size) + " events of undeclared types are waiting for "
+                     + self.path.as_posix() + ", further ones are dropped, declare them in event_types", stacklevel=3)
+            self.swmr_dropped += 1
+            return False
+        self.swmr_pending.append(event)
+        return True
+
+    def stop_swmr(self):
+        # Reopens the file normally to store events of types that were not declared
+        super().close()
+        try:
+            self.open(swmr=False)
+        except OSError as e:
+            # Writing without file locking while readers are attached would corrupt their view, so the events are
+            # kept in the journal and replayed by construct the next time the file is opened for writing
+            pending = self.swmr_pending
+            self.swmr_pending = []
+            for event in pending:
+                self.journal.write({**event, self.LINK_NAME: uuid.uuid4()})
+            self.journal.close()
+            warn(self.path.as_posix() + " is still open by readers, " + str(len(pending)) + " events of undeclared "
+                 "types were kept in " + self.journal.path.as_posix() + " due to error: " + str(e), stacklevel=2)
+            return False
+        pending = self.swmr_pending
+        self.swmr_pending = []
+        for event in pending:
+            self.append_event(event)
+        self.flush_buffer()
+        return True
+
+    def fixed_string_descr(self, descr):
+        fixed = []
+        for name, dtype in descr:
+            if h5py.check_string_dtype(np.dtype(dtype)) is not None:
+                dtype = h5py.string_dtype("utf-8", self.SWMR_STRING_LENGTHS.get(name, self.SWMR_STRING_LENGTH))
+            fixed.append((name, dtype))
+        return fixed
+
+    # File Methods
+    def open(self, mode="a", exc=False, validate=False, swmr=None, **kwargs):
+        if swmr is None:
+            swmr = self.is_swmr
+        was_open = self.is_open
+        fobj = super().open(mode=mode, exc=exc, validate=validate, swmr=swmr, **kwargs)
+        if not was_open and swmr and mode != "r" and self.swmr_ready:
+            self.h5_fobj.swmr_mode = True
+        return fobj
+
+    def close(self):
+        # Closing a log that has no events since it was closed only releases the file
+        if self.is_closed:
+            return super().close()
+        self.stop_writer()
+        closed = self.close_file()
+        if self.is_segmented and self.master_path is not None:
+            self.write_master()
+        if self.archiver is not None:
+            self.archiver.submit(self.archive_paths(), self.archived)
+        self.is_closed = True
+        return closed
+
+    def archived(self, path, destination):
+        # Called by the archiver once a copy is verified, the log is read from the staged file until then and from the
+        # copy after, a staged file that is open is kept
+        with self.io_lock:
+            if path != self.path:
+                return True
+            elif self.is_open:
+                return False
+            self.path = destination
+            return True
+
+    def archive_paths(self):
+        # A journal is only left behind if the close failed
+        paths = [self.path, self.path.with_name(self.path.name + ".journal")]
+        return [path for path in paths if path.is_file()]
+
+    def close_file(self):
+        with self.io_lock:
+            self.flush_buffer()
+            if self.is_swmr_writing and (self.swmr_pending or self.index_dirty) and not self.stop_swmr():
+                # The file was already closed and the readers keep it from being opened again
+                return True
+            self.write_indexes()
+            if self.growth_factor is not None:
+                self.trim_datasets()
+            closed = super().close()
+            if len(self.buffer) == 0:
+                self.journal.close(remove=True)
+            return closed
+
+    # Segments
+    @property
+    def is_segmented(self):
+        return self.segment_size is not None or self.segment_events is not None or self.segment_interval is not None
+
+    def segment_path(self, index):
+        return self.master_path.with_name(self.master_path.stem + "_" + str(index).zfill(4) + self.master_path.suffix)
+
+    def check_segments(self):
+        # Queries only reach the open segment, the closed ones are read through the master once the log is closed
+        if self.is_segmented and len(self.segment_paths) > 1 and not self.segment_warned:
+            self.segment_warned = True
+            warn("Only the events in the current segment " + self.path.name + " are queried, "
+                 + str(len(self.segment_paths) - 1) + " closed segments are read through "
+                 + self.master_path.as_posix() + " after the log is closed", stacklevel=3)
+
+    def is_rollover_due(self):
+        if self.segment_events is not None and self.segment_count >= self.segment_events:
+            return True
+        elif self.segment_interval is not None and time.perf_counter() - self.segment_time >= self.segment_interval:
+            return True
+        else:
+            # The size is checked every so often, and lags the events still in the buffer
+            if self.segment_size is None or self.segment_count % 256 != 0 or not self.is_open:
+                return False
+            return self.h5_fobj.id.get_filesize() >= self.segment_size
+
+    def request_rollover(self):
+        if self.is_deferring:
+            self.io_scheduler.submit("rollover", self.rollover)
+        else:
+            self.rollover()
+
+    def rollover(self):
+        # Closes the current segment and continues the log in a new one, which keeps the event types and categories
+        self.flush()
+        with self.io_lock:
+            op = self.is_open
+            self.open()
+            attributes = dict(self.h5_fobj.attrs)
+            self.segment_types = {name: dataset.dtype for name, dataset in self.hierarchy.child_datasets.items()}
+            values = {name: list(values) for name, values in self.categories.values.items()}
+            self.close_file()
+            self.write_master()
+
+            self.path = self.segment_path(len(self.segment_paths))
+            self.segment_paths.append(self.path)
+            self.segment_warned = False
+            self.clear_datasets()
+            self.construct()
+            self.open()
+            self.add_file_attributes(attributes)
+            for name in self.segment_types:
+                if name not in self.hierarchy.child_datasets:
+                    self.hierarchy.add_child_dataset(name, self.get_dataset(name))
+            if values:
+                self.categories.set_values(values)
+                self.categories.write()
+            self.h5_fobj.flush()
+            if not op:
+                self.release()
+
+    def write_master(self):
+        # Presents the closed segments as one log through virtual datasets, readers open it like any other log
+        segments = self.scan_segments()
+        if segments is None:
+            return None
+        names, attributes, sources, indexes, rows = segments
+
+        # Written beside the master and moved over it so readers never see a partial file
+        temporary = self.master_path.with_name(self.master_path.name + ".tmp")
+        with h5py.File(temporary.as_posix(), "w", libver="latest") as master:
+            for key, value in attributes.items():
+                master.attrs[key] = value
+            master.attrs[self.SEGMENTS_NAME] = names
+            self.write_master_datasets(master, sources)
+            with h5py.File(self.master_path.with_name(names[-1]).as_posix(), "r") as file:
+                if HDF5categories.GROUP_NAME in file:
+                    file.copy(file[HDF5categories.GROUP_NAME], master, HDF5categories.GROUP_NAME)
+            # The master is only indexed if every segment was, otherwise the index is rebuilt when it is opened
+            if indexes is not None and self.is_indexed:
+                self.write_master_index(master, indexes, rows)
+        if self.is_managed:
+            self.handles.close(self.master_path)
+        os.replace(temporary, self.master_path)
+        return self.master_path
+
+    def scan_segments(self):
+        # Returns the closed segments' names, attributes, dataset parts, and indexes, None if there are none yet
+        sources = {}
+        attributes = {}
+        names = []
+        offsets = {}
+        indexes = []
+        for path in self.segment_paths:
+            if path == self.path and self.is_open or not path.is_file():
+                continue
+            with h5py.File(path.as_posix(), "r") as file:
+                attributes.update(file.attrs)
+                starts = offsets.copy()
+                lengths, matched = self.scan_segment_datasets(file, path.name, sources, offsets)
+                if indexes is not None and matched:
+                    index = self.read_segment_index(file, starts, lengths)
+                    indexes = None if index is None else indexes + [index]
+                else:
+                    indexes = None
+            names.append(path.name)
+        if not names:
+            return None
+        return names, attributes, sources, indexes, offsets.get("Events", 0)
+
+    def scan_segment_datasets(self, file, file_name, sources, offsets):
+        # Adds a segment's datasets to the parts of the virtual datasets, returns their lengths and whether each one
+        # is stored like it is in the segments before it
+        lengths = {}
+        matched = True
+        for name, dataset in file.items():
+            if not isinstance(dataset, h5py.Dataset):
+                continue
+            if name not in sources:
+                kept = {k: v for k, v in dataset.attrs.items() if k != HDF5dataset.LENGTH_NAME}
+                sources[name] = (dataset.dtype, dataset.shape[1:], kept, [])
+            dtype, shape, _, parts = sources[name]
+            length = int(dataset.attrs.get(HDF5dataset.LENGTH_NAME, dataset.shape[0]))
+            if dataset.dtype != dtype or dataset.shape[1:] != shape:
+                warn("Segment " + file_name + " stores " + name + " differently, it is left out", stacklevel=3)
+                matched = False
+            elif length > 0:
+                parts.append((file_name, dataset.shape, length))
+                lengths[name] = length
+                offsets[name] = offsets.get(name, 0) + length
+        return lengths, matched
+
+    @staticmethod
+    def write_master_datasets(master, sources):
+        # Each virtual dataset maps the written rows of every segment one after another
+        for name, (dtype, shape, attributes, parts) in sources.items():
+            layout = h5py.VirtualLayout(shape=(sum(part[2] for part in parts), *shape), dtype=dtype)
+            start = 0
+            for file_name, part_shape, length in parts:
+                source = h5py.VirtualSource(file_name, name, shape=part_shape)
+                layout[start:start + length] = source[:length]
+                start += length
+            dataset = master.create_virtual_dataset(name, layout)
+            for key, value in attributes.items():
+                dataset.attrs[key] = value
+
+    def read_segment_index(self, file, starts, lengths):
+        # Returns the saved index of a segment with its rows moved to where the segment starts in the master
+        if self.INDEX_NAME not in file:
+            return None
+        group = file[self.INDEX_NAME]
+        attrs = group.attrs
+        try:
+            datasets = decode_strings(np.ravel(attrs["Datasets"])).tolist()
+            types = decode_strings(np.ravel(attrs["Types"])).tolist()
+            valid = attrs["Version"] == self.INDEX_VERSION and attrs["Rows"] == lengths.get("Events", 0) and \
+                attrs["Links"] == group["Links"].shape[0]
+            # Like load_indexes, the times of each type and the links of each dataset must cover their rows
+            for name, length in lengths.items():
+                if valid and (name in types or name == "Events"):
+                    valid = name in group["Times"] and group["Times"][name].shape[0] == length
+                if valid and self.LINK_NAME in (file[name].dtype.names or ()):
+                    valid = name in datasets
+            if not valid:
+                return None
+            start = starts.get("Events", 0)
+            times = {name: (group["Times"][name][...], group["Rows"][name][...] + start) for name in group["Times"]}
+            links = group["Links"][...]
+        except KeyError:
+            return None
+        if links.shape[0] > 0:
+            links["Row"] += np.array([starts.get(name, 0) for name in datasets], dtype=np.int64)[links["Dataset"]]
+        return types, datasets, times, links
+
+    def write_master_index(self, master, indexes, rows):
+        types = []
+        datasets = []
+        times = {}
+        links = []
+        for segment_types, segment_datasets, segment_times, segment_links in indexes:
+            types += [name for name in segment_types if name not in types]
+            datasets += [name for name in segment_datasets if name not in datasets]
+            if segment_links.shape[0] > 0:
+                codes = np.array([datasets.index(name) for name in segment_datasets], dtype=np.int32)
+                segment_links["Dataset"] = codes[segment_links["Dataset"]]
+            links.append(segment_links)
+            for name, parts in segment_times.items():
+                times.setdefault(name, []).append(parts)
+
+        group = master.create_group(self.INDEX_NAME)
+        times_group = group.create_group("Times")
+        rows_group = group.create_group("Rows")
+        for name, parts in times.items():
+            # Segments follow each other in time, sorting only matters if the clock was set back
+            type_times = np.concatenate([part[0] for part in parts])
+            type_rows = np.concatenate([part[1] for part in parts])
+            order = np.argsort(type_times, kind="stable")
+            self.write_index_dataset(times_group, name, type_times[order])
+            self.write_index_dataset(rows_group, name, type_rows[order])
+        links = np.concatenate(links) if links else np.empty(0, dtype=self.LINK_INDEX_DTYPE)
+        self.write_index_dataset(group, "Links", links)
+        group.attrs["Version"] = self.INDEX_VERSION
+        group.attrs["Rows"] = rows
+        group.attrs["Links"] = links.shape[0]
+        group.attrs["Types"] = np.array(types, dtype=h5py.string_dtype())
+        group.attrs["Datasets"] = np.array(datasets, dtype=h5py.string_dtype())
 
     def set_time(self):
-        self.start_datetime = datetime.datetime.now()
-        self.start_time_counter = time.perf_counter()
-        self.start_time_offset = 0
-        self.append({"Time": self.start_datetime, "DeltaTime": 0, "StartTime": self.start_datetime, self.TYPE_NAME: "TimeSet"})
+        self.drain()
+        with self.order_lock:
+            self.start_datetime = datetime.datetime.now()
+            self.start_time_ns = time.perf_counter_ns()
+            self.start_time_counter = self.start_time_ns * 1e-9
+            self.start_time_offset = 0
+            self.append({"Time": self.start_datetime, "DeltaTime": 0, "StartTime": self.start_datetime, self.TYPE_NAME: "TimeSet"})
 
     def resume_time(self, name=None, index=None):
+        self.drain()
+        self.flush_buffer()
         now_datatime = datetime.datetime.now()
-        self.start_time_counter = time.perf_counter()
+        self.start_time_ns = time.perf_counter_ns()
+        self.start_time_counter = self.start_time_ns * 1e-9
         if name is None:
             name = "TimeSet"
         if index is None:
@@ -1463,50 +3962,161 @@ class HDF5eventLogger(HDF5container):
                      "StartTime": self.start_datetime, self.TYPE_NAME: "ResumeTime"})
 
     def get_event_type(self, name, id_info=False):
-        return self.hierarchy.get_dataset(name, id_info)
+        self.drain()
+        self.check_segments()
+        # Producers on other threads change the buffer and the file, so reads take the IO lock like writes do
+        with self.io_lock:
+            events = self.hierarchy.get_dataset(name, id_info)
+            if len(self.buffer) > 0:
+                events += self.buffer.get_events(name, id_info)
+        return events
+
+    def iter_events(self, type_=None, start=None, end=None, chunk_rows=None, id_info=False):
+        self.drain()
+        self.check_segments()
+        if type_ == "Events":
+            type_ = None
+
+        bounds = (0, None, None) if start is None and end is None else self.find_row_span(start, end, type_)
+        if bounds is None:
+            return
+        first, last, where = bounds
+
+        # The rows are fixed when iterating starts, the lock is only held while a chunk is read so producers are
+        # not held up by a slow consumer
+        with self.io_lock:
+            op = self.is_open
+            self.open()
+            stored = self.Events.len()
+            last = stored if last is None else min(last, stored)
+            buffered = self.buffer.get_columns(type_, id_info) if len(self.buffer) > 0 else None
+        chunks = self.hierarchy.iter_columns(type_, first, last, chunk_rows, id_info, where)
+        try:
+            while True:
+                with self.io_lock:
+                    columns = next(chunks, None)
+                if columns is None:
+                    break
+                yield columns
+        finally:
+            if not op:
+                with self.io_lock:
+                    self.release()
+
+        if buffered is not None:
+            if where is not None:
+                buffered = buffered[where(buffered)]
+            if buffered.shape[0] > 0:
+                yield buffered
+
+    def find_row_span(self, start=None, end=None, type_=None):
+        # The rows from the first to the last event between the times with a mask of the events that are between
+        # them, None if no event is
+        start = -np.inf if start is None else start
+        end = np.inf if end is None else end
+        start = start.timestamp() if isinstance(start, datetime.datetime) else start
+        end = end.timestamp() if isinstance(end, datetime.datetime) else end
+        index = self.require_time_index()
+        with self.io_lock:
+            times = index.get_times(type_)
+            rows = index.get_rows(type_)[np.searchsorted(times, start, "left"):np.searchsorted(times, end, "right")]
+        if rows.shape[0] == 0:
+            return None
+        where = functools.partial(time_mask, name=self.TIME_NAME, start=start, end=end)
+        return int(rows.min()), int(rows.max()) + 1, where
+
+    def get_event_columns(self, name, id_info=False):
+        self.drain()
+        self.check_segments()
+        with self.io_lock:
+            columns = self.hierarchy.get_columns(name, id_info)
+            if len(self.buffer) > 0:
+                buffered = self.buffer.get_columns(name, id_info)
+                if buffered.shape[0] > 0:
+                    columns = np.concatenate((columns, buffered.astype(columns.dtype)))
+        return columns
 
     # Event Querying
-    def find_event(self, time_, type_=None, bisect_="bisect"):
-        if isinstance(time_, datetime.datetime):
-            time_stamp = time_.timestamp()
-        else:
-            time_stamp = time_
-
-        if type_ is None or type_ == "Events":
-            events = self
-            times = self.Events[self.TIME_NAME]
-        else:
-            events = self.hierarchy.get_dataset(name=type_)
-            times = [e[self.TIME_NAME] for e in events]
+    def require_time_index(self):
+        # The index is built by the first query rather than the first append, which keeps appending fast
+        self.drain()
+        if not self.time_index.is_built:
+            self.build_time_index()
+        return self.time_index
+
+    def build_time_index(self):
+        with self.io_lock:
+            op = self.is_open
+            self.open()
+            if self.index_valid:
+                self.load_time_index()
+            else:
+                self.time_index.build(*self.read_index_times())
+            if not op:
+                self.release()
+
+    def read_index_times(self, start=0):
+        # The times and types of the stored events from the start row followed by the buffered events
+        index = slice(start, self.Events.len())
+        times = self.read_times(index)
+        names = decode_column(np.ravel(self.Events.read_field(self.TYPE_NAME, index)), self.TYPE_NAME, self.categories)
+        if len(self.buffer) > 0:
+            times = np.concatenate((times, self.buffer.parent.data[self.TIME_NAME]))
+            names = np.concatenate((names, decode_column(self.buffer.parent.data[self.TYPE_NAME], self.TYPE_NAME,
+                                                         self.categories)))
+        return times, names
+
+    def read_times(self, index=Ellipsis):
+        times = np.ravel(self.Events.read_field(self.TIME_NAME, index))
+        if self.hierarchy.time_fields is not None:
+            starts = np.ravel(self.Events.read_field(self.START_NAME, index))
+            times = times + (starts + np.ravel(self.Events.read_field(self.DELTA_NAME, index)))
+        return times
+
+    def get_events(self, rows, id_info=False):
+        self.drain()
+        self.check_segments()
+        rows = np.asarray(rows, dtype=np.int64)
+        with self.io_lock:
+            stored = self.Events.len()
+            on_file = rows[rows < stored]
+            events = []
+            if on_file.shape[0] > 0:
+                records = decode_times(read_rows(self.Events, on_file), self.hierarchy.time_fields)
+                events += self.hierarchy.records_to_items(records, id_info)
+            for row in rows[rows >= stored].tolist():
+                events.append(self.buffer.get_event(row - stored, id_info))
+        return events
+
+    def find_events(self, times, type_=None, bisect_="bisect"):
+        if type_ == "Events":
+            type_ = None
+        times = [t.timestamp() if isinstance(t, datetime.datetime) else t for t in np.ravel(times).tolist()]
+        self.check_segments()
+        index = self.require_time_index()
+        # Searching sorts the times appended since the last search, which producers are adding to
+        with self.io_lock:
+            return index.search(times, type_, bisect_)
 
-        index = bisect.bisect_left(times, time_stamp)
-        if index >= len(times):
-            index -= 1
-        elif times[index] == time_:
-            pass
-        elif bisect_ == "bisect":
-            if index > 0:
-                index -= 1 - (np.abs(times[index-1:index+1]-time_)).argmin()
-        elif bisect_ == "left":
-            if index > 0:
-                index -= 1
-        elif bisect_ == "right":
-            pass
-        else:
+    def find_event(self, time_, type_=None, bisect_="bisect"):
+        if type_ == "Events":
+            type_ = None
+        index = int(self.find_events([time_], type_, bisect_)[0])
+        if index < 0:
             return -1, None
-
-        return index, events[index]
+        # Draining the writer needs its thread to take the IO lock, so the lock is not held across the queries
+        with self.io_lock:
+            row = self.time_index.get_rows(type_)[index]
+        return index, self.get_events([row])[0]
 
     def find_event_range(self, start, end, type_=None):
-        if type_ is None or type_ == "Events":
-            events = self
-        else:
-            events = self.hierarchy.get_dataset(name=type_)
-
-        first, _ = self.find_event(start, type_=type_, bisect_="right")
-        last, _ = self.find_event(end, type_=type_, bisect_="left")
-
-        return range(first, last+1), events[first:last+1]
+        if type_ == "Events":
+            type_ = None
+        first = int(self.find_events([start], type_, "right")[0])
+        last = int(self.find_events([end], type_, "left")[0])
+        with self.io_lock:
+            rows = self.time_index.get_rows(type_)[first:last + 1].copy()
+        return range(first, last+1), self.get_events(rows)
 
     # Trigger Methods
     def trigger(self):
@@ -1517,6 +4127,17 @@ class HDF5eventLogger(HDF5container):
         self.append(type_="Trigger", **kwargs)
 
     # Static Methods
+    @staticmethod
+    def field_dtype(dtype):
+        if dtype is str:
+            return h5py.string_dtype(encoding="utf-8")
+        elif dtype is int or dtype is bool:
+            return np.dtype(np.int64)
+        elif dtype is float or dtype is datetime.datetime:
+            return np.dtype(np.float64)
+        else:
+            return np.dtype(dtype)
+
     @staticmethod
     def event2dtype(event):
         dtypes = []
@@ -1542,8 +4163,8 @@ class SubjectEventLogger(HDF5eventLogger):
     EXPERIMENT_NUMBER = "Block"
 
     # Instantiation/Destruction
-    def __init__(self, path=None, subject="", x_name="", x_number="", io_trigger=None, init=False):
-        super().__init__(path, io_trigger)
+    def __init__(self, path=None, subject="", x_name="", x_number="", io_trigger=None, init=False, **kwargs):
+        super().__init__(path, io_trigger, **kwargs)
         self._subject = subject
         self._experiment_name = x_name
         self._experiment_number = x_number
@@ -1561,7 +4182,174 @@ class SubjectEventLogger(HDF5eventLogger):
                                   self.EXPERIMENT_NUMBER: self._experiment_number})
 
 
+class HDF5eventTailer(object):
+    # Reads the events a log gains while another process is writing it in single writer multiple reader mode
+    # Instantiation, Copy, Destruction
+    def __init__(self, path=None, parent_name="Events", type_name="Type", link_name="LinkID",
+                 time_fields=("Time", "DeltaTime", "StartTime"), init=False):
+        self._path = None
+        self.path = path
+        self.h5_fobj = None
+
+        self.parent_name = parent_name
+        self.type_name = type_name
+        self.link_name = link_name
+        self.time_fields = time_fields
+
+        self.rows_read = 0
+        self.child_rows_read = {}
+        self.categories = HDF5categories(init=False)
+
+        if init:
+            self.open()
+
+    @property
+    def path(self):
+        return self._path
+
+    @path.setter
+    def path(self, value):
+        if isinstance(value, pathlib.Path) or value is None:
+            self._path = value
+        else:
+            self._path = pathlib.Path(value)
+
+    @property
+    def is_open(self):
+        return bool(self.h5_fobj)
+
+    # Container Magic Methods
+    def __iter__(self):
+        return self.tail()
+
+    # Context Managers
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    # File Methods
+    def open(self):
+        if not self.is_open:
+            self.h5_fobj = h5py.File(self.path.as_posix(), mode="r", libver="latest", swmr=True)
+        return self.h5_fobj
+
+    def close(self):
+        if self.is_open:
+            self.h5_fobj.close()
+        self.h5_fobj = None
+
+    # Reading
+    def seek_end(self):
+        # Skips the events already in the log
+        self.open()
+        parent = self.h5_fobj[self.parent_name]
+        parent.refresh()
+        self.categories.construct(self)
+        names = decode_column(np.ravel(parent[self.type_name]), self.type_name, self.categories)
+        self.rows_read = names.shape[0]
+        self.child_rows_read = {name: int(np.count_nonzero(names == name)) for name in set(names.tolist())}
+
+    def read(self, id_info=False):
+        self.open()
+        parent = self.h5_fobj[self.parent_name]
+        parent.refresh()
+        stop = parent.shape[0]
+        if stop <= self.rows_read:
+            return []
+
+        records = np.ravel(parent[self.rows_read:stop])
+        if parent.attrs.get(HDF5eventLogger.TIME_ENCODING_NAME) == "Delta":
+            records = decode_times(records, self.time_fields)
+        self.categories.construct(self)
+        names = decode_column(records[self.type_name], self.type_name, self.categories)
+        available = records.shape[0]
+
+        # Child rows are written in the same order as the events, but may become visible after the events do
+        children = {}
+        for name in set(names.tolist()):
+            positions = np.flatnonzero(names == name)
+            start = self.child_rows_read.get(name, 0)
+            if name in self.h5_fobj:
+                dataset = self.h5_fobj[name]
+                dataset.refresh()
+                count = min(positions.shape[0], dataset.shape[0] - start)
+            else:
+                dataset = None
+                count = 0
+            if count < positions.shape[0]:
+                available = min(available, int(positions[count]))
+            if count > 0:
+                children[name] = (positions[:count], np.ravel(dataset[start:start + count]))
+
+        exclude = () if id_info else (self.link_name,)
+        items = records_to_dicts(merge_records(records[:available], exclude=exclude, categories=self.categories))
+        for name, (positions, child) in children.items():
+            positions = positions[positions < available]
+            child_items = records_to_dicts(merge_records(child[:positions.shape[0]], exclude=(self.link_name,),
+                                                         categories=self.categories))
+            for position, child_item in zip(positions.tolist(), child_items):
+                items[position].update(child_item)
+            self.child_rows_read[name] = self.child_rows_read.get(name, 0) + positions.shape[0]
+        self.rows_read += available
+        return items
+
+    def tail(self, poll_interval=0.1, timeout=None, id_info=False):
+        last = time.perf_counter()
+        while timeout is None or time.perf_counter() - last < timeout:
+            events = self.read(id_info)
+            if events:
+                last = time.perf_counter()
+                yield from events
+            else:
+                time.sleep(poll_interval)
+
+
 # Functions #
+def close_handle_managers():
+    # Registered once for the module, every manager's files are closed when Python exits
+    for manager in list(HANDLE_MANAGERS):
+        manager.close_all(force=True)
+
+
+atexit.register(close_handle_managers)
+
+
+def compression_args(compression="gzip", compression_opts=None, shuffle=False):
+    # The dataset creation arguments of a codec, None stores the data uncompressed
+    if compression is None or compression == "none":
+        args = {}
+    elif compression == "gzip":
+        args = {"compression": "gzip", "compression_opts": 4 if compression_opts is None else compression_opts}
+    else:
+        args = {"compression": compression}
+        if compression_opts is not None:
+            args["compression_opts"] = compression_opts
+    if shuffle:
+        args["shuffle"] = True
+    return args
+
+
+def encode_times(records, time_fields):
+    # Replaces the times with their residuals from the start time plus the delta time, which are mostly zero
+    # Adding the base back is exact whenever the base is within a factor of two of the time, as logged times are
+    time_, delta, start = time_fields
+    records = records.copy()
+    records[time_] -= records[start] + records[delta]
+    return records
+
+
+def decode_times(records, time_fields):
+    if time_fields is None:
+        return records
+    time_, delta, start = time_fields
+    records = records.copy()
+    records[time_] += records[start] + records[delta]
+    return records
+
+
 def merge_dict(dict1, dict2, copy_=True):
     if dict2 is not None:
         if copy_:
@@ -1571,14 +4359,192 @@ def merge_dict(dict1, dict2, copy_=True):
     return dict1
 
 
+def copy_group(source, destination, compression=None):
+    for key, value in source.attrs.items():
+        destination.attrs[key] = value
+    for name, item in source.items():
+        if isinstance(item, h5py.Group):
+            copy_group(item, destination.create_group(name), compression)
+        else:
+            dataset = destination.create_dataset(name, data=item[...], dtype=item.dtype, compression=compression)
+            for key, value in item.attrs.items():
+                dataset.attrs[key] = value
+
+
+def dataset_memmap(dataset, fields=None):
+    # Maps the numeric fields of a contiguous, unfiltered dataset straight from the file, otherwise returns None
+    plist = dataset.id.get_create_plist()
+    offset = dataset.id.get_offset()
+    if plist.get_layout() != h5py.h5d.CONTIGUOUS or plist.get_nfilters() > 0 or offset is None or dataset.size == 0:
+        return None
+    if dataset.file.driver not in ("sec2", "stdio"):
+        return None
+
+    file_type = dataset.id.get_type()
+    if dataset.dtype.names is None:
+        if file_type.get_class() not in (h5py.h5t.INTEGER, h5py.h5t.FLOAT):
+            return None
+        dtype = file_type.dtype
+    else:
+        # Variable length members are reported at their memory size but are stored as larger heap references
+        heap_size = 8 + dataset.file.id.get_create_plist().get_sizes()[0]
+        names = []
+        formats = []
+        offsets = []
+        shift = 0
+        members = sorted(range(file_type.get_nmembers()), key=file_type.get_member_offset)
+        for i in members:
+            name = file_type.get_member_name(i).decode()
+            member_type = file_type.get_member_type(i)
+            if (fields is None or name in fields) and member_type.get_class() in (h5py.h5t.INTEGER, h5py.h5t.FLOAT):
+                names.append(name)
+                formats.append(member_type.dtype)
+                offsets.append(file_type.get_member_offset(i) + shift)
+            elif member_type.get_class() == h5py.h5t.VLEN or \
+                    (member_type.get_class() == h5py.h5t.STRING and member_type.is_variable_str()):
+                shift += heap_size - member_type.get_size()
+        if not names or (fields is not None and len(names) < len(fields)):
+            return None
+        dtype = np.dtype({"names": names, "formats": formats, "offsets": offsets,
+                          "itemsize": file_type.get_size() + shift})
+    if dtype.itemsize * dataset.size != dataset.id.get_storage_size():
+        return None
+    return np.memmap(dataset.file.filename, dtype=dtype, mode="r", offset=offset, shape=dataset.shape)
+
+
+def time_mask(records, name="Time", start=-np.inf, end=np.inf):
+    return (records[name] >= start) & (records[name] <= end)
+
+
+def merge_records(parent, child=None, exclude=(), categories=None):
+    fields = {}
+    for array in (parent, child):
+        if array is not None:
+            for name in array.dtype.names:
+                if name not in exclude and name not in fields:
+                    fields[name] = array
+    dtype = []
+    for name, array in fields.items():
+        if array.dtype[name].kind in "OS" or array.dtype[name] == LINK_DTYPE or \
+                (categories is not None and name in categories and array.dtype[name] == HDF5categories.CODE_DTYPE):
+            dtype.append((name, object))
+        else:
+            dtype.append((name, array.dtype[name]))
+    result = np.empty(parent.shape[0], dtype=dtype)
+    for name, array in fields.items():
+        result[name] = decode_column(array[name], name, categories)
+    return result
+
+
+def records_to_dicts(array):
+    names = array.dtype.names
+    return [dict(zip(names, row)) for row in array.tolist()]
+
+
+def structured_to_columns(array):
+    return {name: array[name] for name in array.dtype.names}
+
+
+def read_rows(dataset, rows):
+    # Reads the span covering the rows once and picks the rows out in memory
+    if rows.shape[0] == 0:
+        return np.empty(0, dtype=dataset.dtype)
+    start = int(rows.min())
+    stop = int(rows.max()) + 1
+    return np.ravel(dataset[start:stop])[rows - start]
+
+
 def np_to_dict(array):
     result = {}
     for t in array.dtype.descr:
         name = t[0]
-        result[name] = array[name]
+        result[name] = decode_column(array[name], name)
     return result
 
 
+def decode_strings(array):
+    # h5py 3 returns variable length strings as bytes
+    if isinstance(array, bytes):
+        return array.decode("utf-8")
+    elif isinstance(array, np.ndarray) and array.dtype.kind == "O":
+        decoded = [a.decode("utf-8") if isinstance(a, bytes) else a for a in array.flat]
+        result = np.empty(array.shape, dtype=object)
+        result.flat[:] = decoded
+        return result
+    elif isinstance(array, np.ndarray) and array.dtype.kind == "S":
+        return np.char.decode(array, "utf-8").astype(object)
+    else:
+        return array
+
+
+def decode_column(array, name, categories=None):
+    # Categorical code columns are looked up, string columns are decoded
+    if categories is not None and name in categories and np.asarray(array).dtype == HDF5categories.CODE_DTYPE:
+        return categories.decode(name, array)
+    elif np.asarray(array).dtype == LINK_DTYPE:
+        return link_ids_to_strings(array)
+    else:
+        return decode_strings(array)
+
+
+def match_column(array, name, value, categories=None):
+    # Compares the codes of a categorical column so no strings are made
+    if categories is not None and array.dtype == HDF5categories.CODE_DTYPE:
+        code = categories.code(name, value)
+        return array == code if code is not None else np.zeros(array.shape, dtype=bool)
+    else:
+        return decode_strings(array) == value
+
+
+def link_ids_to_bytes(array):
+    # Binary LinkIDs are only viewed as bytes, files from before them store LinkIDs as UUID strings
+    array = np.asarray(array)
+    if array.dtype == LINK_DTYPE:
+        return np.ascontiguousarray(array).view("S16").ravel()
+    else:
+        return uuid_strings_to_bytes(array)
+
+
+def link_ids_to_strings(array):
+    array = np.asarray(array)
+    result = np.empty(array.shape, dtype=object)
+    result.flat[:] = [str(uuid.UUID(bytes=bytes(link))) if any(bytes(link)) else "" for link in array.flat]
+    return result if result.ndim > 0 else result[()]
+
+
+def dtype_kind(dtype):
+    # The kind a journal or publisher stores a field of this dtype as
+    if dtype.kind in "iub":
+        return "i"
+    elif dtype.kind == "f":
+        return "f"
+    else:
+        return "s"
+
+
+def empty_link_id(dtype):
+    return np.void(bytes(16)) if dtype == LINK_DTYPE else ""
+
+
+def new_link_ids(n, dtype=LINK_DTYPE):
+    # Makes random version 4 UUIDs at once, files from before binary LinkIDs get them as strings
+    data = np.frombuffer(os.urandom(16 * n), dtype=np.uint8).reshape(n, 16).copy()
+    data[:, 6] = (data[:, 6] & 0x0F) | 0x40
+    data[:, 8] = (data[:, 8] & 0x3F) | 0x80
+    links = data.view(LINK_DTYPE).ravel()
+    return links if dtype == LINK_DTYPE else link_ids_to_strings(links)
+
+
+def uuid_strings_to_bytes(array):
+    # Parses the hex digits of whole columns of UUID strings at once, empty strings become empty bytes
+    array = np.asarray(array)
+    if array.dtype.kind == "O":
+        array = np.array([a.encode("utf-8") if isinstance(a, str) else a for a in array.flat], dtype="S36")
+    chars = np.ascontiguousarray(array, dtype="S36").view(np.uint8).reshape(-1, 36)
+    digits = HEX_DIGITS[np.delete(chars, (8, 13, 18, 23), axis=1)]
+    return np.ascontiguousarray((digits[:, 0::2] << 4) | digits[:, 1::2]).view("S16").ravel()
+
+
 def dict_to_np(item, descr, pop=False):
     array = []
     for dtype in descr:
@@ -1587,7 +4553,15 @@ def dict_to_np(item, descr, pop=False):
             data = item.pop(field)
         else:
             data = item[field]
+        typestr = dtype[1][0] if isinstance(dtype[1], tuple) else dtype[1]
+        if typestr == LINK_DTYPE.str:
+            # Binary LinkIDs take the sixteen bytes of the UUID
+            data = np.void((data if isinstance(data, uuid.UUID) else uuid.UUID(data)).bytes)
         data = item_to_np(data)
+        if isinstance(data, str):
+            # Fixed length string fields only take bytes
+            if typestr[1:2] == "S":
+                data = data.encode("utf-8")
         array.append(data)
     return array
 
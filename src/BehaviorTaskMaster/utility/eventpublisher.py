@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" eventpublisher.py
+Description: Sends events to other processes over a local socket as they are logged.
+"""
+__author__ = "Anthony Fong"
+__copyright__ = "Copyright 2019, Anthony Fong"
+__credits__ = ["Anthony Fong"]
+__license__ = ""
+__version__ = "1.0.0"
+__maintainer__ = "Anthony Fong"
+__email__ = ""
+__status__ = "Prototype"
+
+# Default Libraries #
+import pathlib
+import select
+import socket
+import threading
+import time
+from warnings import warn
+
+# Downloaded Libraries #
+
+# Local Libraries #
+from .eventjournal import EventCodec
+
+
+# Definitions #
+# Classes #
+class EventSubscription(object):
+    # Instantiation, Copy, Destruction
+    def __init__(self, connection, address=None):
+        self.connection = connection
+        self.address = address
+        self.pending = bytearray()
+        self.dropped_count = 0
+        self.sent_count = 0
+
+    # Sending
+    def send(self, data, policy="drop", buffer_size=1048576):
+        # Never blocks, what the socket does not take is kept whole so the framing stays intact
+        if self.pending:
+            self.send_pending()
+            if self.pending:
+                if policy == "buffer" and len(self.pending) + len(data) <= buffer_size:
+                    self.pending += data
+                    self.sent_count += 1
+                else:
+                    self.dropped_count += 1
+                return
+
+        try:
+            sent = self.connection.send(data)
+        except BlockingIOError:
+            sent = 0
+        if sent == 0 and policy == "drop":
+            self.dropped_count += 1
+        else:
+            self.pending += data[sent:]
+            self.sent_count += 1
+
+    def send_schema(self, data):
+        # Schemas are never dropped, the events of their type after them could not be decoded without them
+        self.pending += data
+        self.send_pending()
+
+    def send_pending(self):
+        try:
+            sent = self.connection.send(self.pending)
+        except BlockingIOError:
+            sent = 0
+        del self.pending[:sent]
+
+    def close(self):
+        try:
+            self.connection.close()
+        except OSError:
+            pass
+
+
+class EventPublisher(object):
+    # Instantiation, Copy, Destruction
+    def __init__(self, address=None, policy="drop", buffer_size=1048576, types=None, init=False):
+        self.address = address
+        self.policy = policy
+        self.buffer_size = buffer_size
+        self.types = None if types is None else set(types)
+
+        self.codec = EventCodec()
+        self.server = None
+        self.subscriptions = []
+        self.lock = threading.Lock()
+        self.accept_thread = None
+        self.dropped_count = 0
+
+        if init:
+            self.open()
+
+    @property
+    def is_open(self):
+        return self.server is not None
+
+    @property
+    def family(self):
+        return socket.AF_INET if isinstance(self.address, tuple) else socket.AF_UNIX
+
+    # Context Managers
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    # Socket Methods
+    def open(self):
+        if not self.is_open:
+            if self.policy not in ("drop", "buffer"):
+                raise ValueError("policy must be drop or buffer")
+            self.server = socket.socket(self.family, socket.SOCK_STREAM)
+            if self.family == socket.AF_UNIX:
+                path = pathlib.Path(self.address)
+                if path.exists():
+                    path.unlink()
+                self.server.bind(path.as_posix())
+            else:
+                self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                self.server.bind(self.address)
+                self.address = self.server.getsockname()
+            self.server.listen()
+            self.accept_thread = threading.Thread(target=self.accept, daemon=True)
+            self.accept_thread.start()
+
+    def close(self):
+        if self.is_open:
+            server = self.server
+            self.server = None
+            try:
+                server.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            server.close()
+            self.accept_thread.join()
+            with self.lock:
+                for subscription in self.subscriptions:
+                    subscription.close()
+                self.subscriptions.clear()
+            if self.family == socket.AF_UNIX and pathlib.Path(self.address).exists():
+                pathlib.Path(self.address).unlink()
+
+    def accept(self):
+        while self.server is not None:
+            try:
+                connection, address = self.server.accept()
+            except OSError:
+                break
+            if self.family == socket.AF_INET:
+                connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            connection.setblocking(False)
+            subscription = EventSubscription(connection, address)
+            with self.lock:
+                # A new subscriber needs the schemas of the types already sent before any events
+                subscription.pending += self.codec.schema_frames()
+                self.subscriptions.append(subscription)
+
+    # Publishing
+    def publish(self, event):
+        if self.types is not None and event.get(self.codec.type_name) not in self.types:
+            return
+        with self.lock:
+            # Schemas are kept even without subscribers so late subscribers can decode later events
+            schema, new = self.codec.require_schema(event)
+            schema = self.codec.frame(schema.encode_schema()) if new else None
+            if not self.subscriptions:
+                return
+            self.send_all(schema, self.codec.encode(event))
+
+    def publish_values(self, name, fields, times, values):
+        # Publishes an event from an appender's positional values, fields are the name kind pairs of the values
+        if self.types is not None and name not in self.types:
+            return
+        with self.lock:
+            schema, new = self.codec.require_value_schema(name, fields)
+            schema_frame = self.codec.frame(schema.encode_schema()) if new else None
+            if not self.subscriptions:
+                return
+            self.send_all(schema_frame, self.codec.frame(schema.encode_values(times, bytes(16), values)))
+
+    def send_all(self, schema, data):
+        # Called with the lock held
+        closed = []
+        for subscription in self.subscriptions:
+            try:
+                if schema is not None:
+                    subscription.send_schema(schema)
+                subscription.send(data, self.policy, self.buffer_size)
+            except OSError:
+                closed.append(subscription)
+        for subscription in closed:
+            self.dropped_count += subscription.dropped_count
+            subscription.close()
+            self.subscriptions.remove(subscription)
+
+    def stats(self):
+        with self.lock:
+            return {"subscribers": len(self.subscriptions),
+                    "sent": sum(s.sent_count for s in self.subscriptions),
+                    "dropped": self.dropped_count + sum(s.dropped_count for s in self.subscriptions),
+                    "pending": sum(len(s.pending) for s in self.subscriptions)}
+
+
+class EventSubscriber(object):
+    # Instantiation, Copy, Destruction
+    def __init__(self, address=None, init=False):
+        self.address = address
+        self.connection = None
+        self.codec = EventCodec()
+        self.data = bytearray()
+
+        if init:
+            self.open()
+
+    @property
+    def is_open(self):
+        return self.connection is not None
+
+    # Container Magic Methods
+    def __iter__(self):
+        return self.events()
+
+    # Context Managers
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    # Socket Methods
+    def open(self):
+        if not self.is_open:
+            if isinstance(self.address, tuple):
+                self.connection = socket.create_connection(self.address)
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            else:
+                self.connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                self.connection.connect(pathlib.Path(self.address).as_posix())
+            self.codec.clear()
+            self.data.clear()
+
+    def close(self):
+        if self.is_open:
+            self.connection.close()
+            self.connection = None
+
+    # Receiving
+    def receive(self, timeout=None):
+        # Returns the events that arrived within the timeout, an empty list if there were none
+        readable, _, _ = select.select([self.connection], [], [], timeout)
+        if not readable:
+            return []
+        chunk = self.connection.recv(65536)
+        if not chunk:
+            self.close()
+            raise ConnectionError("Publisher closed the connection")
+        self.data += chunk
+        unknown = self.codec.unknown_count
+        events, offset, corrupt = self.codec.decode(self.data)
+        if self.codec.unknown_count > unknown:
+            warn("Skipped " + str(self.codec.unknown_count - unknown) + " events of types without a schema",
+                 stacklevel=2)
+        if corrupt:
+            warn("Received a corrupt event record, dropping the received data", stacklevel=2)
+            self.data.clear()
+        else:
+            del self.data[:offset]
+        return events
+
+    def events(self, timeout=None):
+        last = time.perf_counter()
+        while self.is_open and (timeout is None or time.perf_counter() - last < timeout):
+            try:
+                events = self.receive(0.1 if timeout is None else timeout)
+            except ConnectionError:
+                break
+            if events:
+                last = time.perf_counter()
+            yield from events
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" ioscheduler.py
+Description: Defers heavy file work while a timing critical phase of a task is running.
+"""
+__author__ = "Anthony Fong"
+__copyright__ = "Copyright 2019, Anthony Fong"
+__credits__ = ["Anthony Fong"]
+__license__ = ""
+__version__ = "1.0.0"
+__maintainer__ = "Anthony Fong"
+__email__ = ""
+__status__ = "Prototype"
+
+# Default Libraries #
+import collections
+import os
+import pathlib
+import threading
+import time
+from warnings import warn
+
+# Downloaded Libraries #
+
+# Local Libraries #
+
+
+# Definitions #
+# Classes #
+class IOScheduler(object):
+    # Work submitted during a timing critical phase is queued by key and run once the task reaches an idle phase
+    # Instantiation, Copy, Destruction
+    def __init__(self, critical_phases=("video_player",), max_buffered=65536, drain_budget=None):
+        self.critical_phases = set(critical_phases)
+        self.max_buffered = max_buffered
+        self.drain_budget = drain_budget
+
+        self.phase = None
+        self.phases = {}
+        self.tasks = collections.OrderedDict()
+        self.lock = threading.RLock()
+
+        self.deferred_count = 0
+        self.run_count = 0
+        # Running totals, a session drains after every phase so the times themselves are not kept
+        self.drain_count = 0
+        self.drain_time = 0.0
+        self.max_drain_time = 0.0
+        self.exception = None
+
+    @property
+    def is_critical(self):
+        return self.phase in self.critical_phases
+
+    # Container Magic Methods
+    def __len__(self):
+        return len(self.tasks)
+
+    # Phases
+    def add_phases(self, widgets):
+        # Names the phases of the widgets a sequencer runs, widgets maps each phase name to its widget
+        for name, widget in widgets.items():
+            self.phases[widget] = name
+
+    def enter(self, widget):
+        self.set_phase(self.phases.get(widget))
+
+    def set_phase(self, phase):
+        self.phase = phase
+
+    # Work
+    def submit(self, key, function, *args, **kwargs):
+        # Runs the work now outside of critical phases, otherwise queues it once per key
+        with self.lock:
+            if self.is_critical:
+                if key not in self.tasks:
+                    self.tasks[key] = (function, args, kwargs)
+                    self.deferred_count += 1
+                return None
+        return self.run(function, args, kwargs)
+
+    def run(self, function, args=(), kwargs=None):
+        try:
+            output = function(*args, **({} if kwargs is None else kwargs))
+        except Exception as e:
+            self.exception = e
+            warn("Could not run deferred work due to error: " + str(e), stacklevel=3)
+            output = None
+        self.run_count += 1
+        return output
+
+    def drain(self, budget=None):
+        # Runs the queued work in order until the budget in seconds is spent, what is left waits for the next drain
+        if budget is None:
+            budget = self.drain_budget
+        start = time.perf_counter()
+        while not self.is_critical and (budget is None or time.perf_counter() - start < budget):
+            with self.lock:
+                if not self.tasks:
+                    break
+                _, (function, args, kwargs) = self.tasks.popitem(last=False)
+            self.run(function, args, kwargs)
+        duration = time.perf_counter() - start
+        self.drain_count += 1
+        self.drain_time += duration
+        self.max_drain_time = max(self.max_drain_time, duration)
+        return len(self.tasks)
+
+    def clear(self):
+        with self.lock:
+            self.tasks.clear()
+        self.phase = None
+
+    def stats(self):
+        return {"phase": self.phase, "pending": len(self.tasks), "deferred": self.deferred_count,
+                "run": self.run_count, "drains": self.drain_count, "drain_time": self.drain_time,
+                "max_drain_time": self.max_drain_time}
+
+
+# Functions #
+def prefetch_file(path, max_bytes=67108864, chunk_size=1048576):
+    # Asks the system to read a stimulus into its cache, files are read directly where that cannot be asked
+    path = pathlib.Path(path)
+    if not path.is_file():
+        return 0
+    size = min(path.stat().st_size, max_bytes)
+    with path.open("rb") as file:
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(file.fileno(), 0, size, os.POSIX_FADV_WILLNEED)
+        else:
+            read = 0
+            while read < size and file.read(chunk_size):
+                read += chunk_size
+    return size
@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" logarchiver.py
+Description: Copies finished logs from a fast local staging directory to an archive directory in the background.
+
+The tasks do not pass either directory, so they are read from the BEHAVIORTASK_STAGING and BEHAVIORTASK_ARCHIVE
+environment variables. Without BEHAVIORTASK_STAGING logs are written next to the task's module, and without
+BEHAVIORTASK_ARCHIVE they are left there and nothing is archived. A log that is archived is removed from staging, and
+the logger reads the staged file until the copy is verified, then moves its path to the copy.
+"""
+__author__ = "Anthony Fong"
+__copyright__ = "Copyright 2019, Anthony Fong"
+__credits__ = ["Anthony Fong"]
+__license__ = ""
+__version__ = "1.0.0"
+__maintainer__ = "Anthony Fong"
+__email__ = ""
+__status__ = "Prototype"
+
+# Default Libraries #
+import atexit
+import hashlib
+import os
+import pathlib
+import queue
+import threading
+import time
+import weakref
+from warnings import warn
+
+# Downloaded Libraries #
+
+# Local Libraries #
+
+
+# Definitions #
+# Constants #
+ARCHIVERS = weakref.WeakSet()
+
+
+# Classes #
+class LogArchiver(object):
+    # Logs are written to the staging directory during a session, the archive only sees complete and verified copies
+    STAGING_ENVIRONMENT = "BEHAVIORTASK_STAGING"
+    ARCHIVE_ENVIRONMENT = "BEHAVIORTASK_ARCHIVE"
+    PARTIAL_SUFFIX = ".partial"
+
+    # Instantiation, Copy, Destruction
+    def __init__(self, staging=None, archive=None, algorithm="sha256", remove_staged=True, retries=3,
+                 chunk_size=1048576):
+        # Unset directories fall back on the environment so a deployment can move them without changing the tasks
+        if staging is None:
+            staging = os.environ.get(self.STAGING_ENVIRONMENT)
+        if archive is None:
+            archive = os.environ.get(self.ARCHIVE_ENVIRONMENT)
+        self.staging = None if staging is None else pathlib.Path(staging)
+        self.archive = None if archive is None else pathlib.Path(archive)
+        self.algorithm = algorithm
+        self.remove_staged = remove_staged
+        self.retries = retries
+        self.chunk_size = chunk_size
+
+        self.queue = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+
+        self.checksums = {}
+        self.failed = []
+        self.archived_count = 0
+        self.archived_bytes = 0
+        self.archive_time = 0.0
+        self.exception = None
+
+        self._stop_item = object()
+        ARCHIVERS.add(self)
+
+    @property
+    def is_active(self):
+        return self.archive is not None
+
+    @property
+    def is_alive(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    # Paths
+    def stage_path(self, name, default=None):
+        # The path a new log is written to, the default directory is used when there is no staging directory
+        root = self.staging if self.staging is not None else pathlib.Path(default)
+        root.mkdir(parents=True, exist_ok=True)
+        return root.joinpath(name)
+
+    def archive_path(self, path):
+        return self.archive.joinpath(pathlib.Path(path).name)
+
+    # Producer Methods
+    def submit(self, paths, archived=None):
+        # The files of a log are archived in the order given, so files which refer to others should come last,
+        # archived is called with each file and its copy once the copy is verified and returns whether it can be removed
+        if not self.is_active:
+            return False
+        paths = [pathlib.Path(path) for path in paths if pathlib.Path(path).is_file()]
+        if paths:
+            self.start()
+            self.queue.put((paths, archived))
+        return True
+
+    def start(self):
+        with self.lock:
+            if not self.is_alive:
+                self.thread = threading.Thread(target=self.run, name="LogArchiver", daemon=True)
+                self.thread.start()
+        return self.thread
+
+    def join(self):
+        if self.is_alive and threading.current_thread() is not self.thread:
+            self.queue.join()
+
+    def stop(self):
+        if self.is_alive:
+            self.queue.put(self._stop_item)
+            self.thread.join()
+
+    def stats(self):
+        with self.lock:
+            return {"pending": self.queue.qsize(), "archived": self.archived_count, "bytes": self.archived_bytes,
+                    "time": self.archive_time, "failed": len(self.failed)}
+
+    # Consumer Methods
+    def run(self):
+        running = True
+        while running:
+            item = self.queue.get()
+            if item is self._stop_item:
+                running = False
+            else:
+                paths, archived = item
+                for path in paths:
+                    self.archive_file(path, archived)
+            self.queue.task_done()
+
+    def archive_file(self, path, archived=None):
+        # A failed copy is tried again and the staged file is kept until a copy is verified
+        start = time.perf_counter()
+        error = None
+        for _ in range(self.retries):
+            try:
+                checksum = self.copy_file(path)
+            except Exception as e:
+                self.exception = e
+                error = e
+            else:
+                destination = self.archive_path(path)
+                removable = archived is None or archived(path, destination)
+                if self.remove_staged and removable:
+                    path.unlink()
+                size = destination.stat().st_size
+                with self.lock:
+                    self.checksums[path.name] = checksum
+                    self.archived_count += 1
+                    self.archived_bytes += size
+                    self.archive_time += time.perf_counter() - start
+                return checksum
+
+        with self.lock:
+            self.failed.append(path)
+        warn("Could not archive " + path.as_posix() + " due to error: " + str(error), stacklevel=2)
+        return None
+
+    def copy_file(self, path):
+        # The copy is written under a partial name and only moved into place once its checksum matches
+        self.archive.mkdir(parents=True, exist_ok=True)
+        destination = self.archive_path(path)
+        partial = destination.with_name(destination.name + self.PARTIAL_SUFFIX)
+        source_hash = hashlib.new(self.algorithm)
+        with path.open("rb") as source, partial.open("wb") as copy_:
+            for chunk in iter(lambda: source.read(self.chunk_size), b""):
+                source_hash.update(chunk)
+                copy_.write(chunk)
+            copy_.flush()
+            os.fsync(copy_.fileno())
+
+        checksum = source_hash.hexdigest()
+        copied = file_checksum(partial, self.algorithm, self.chunk_size)
+        if copied != checksum:
+            partial.unlink()
+            raise OSError("the checksum of the copy does not match, " + copied + " != " + checksum)
+
+        os.replace(partial, destination)
+        destination.with_name(destination.name + "." + self.algorithm).write_text(
+            checksum + "  " + destination.name + "\n")
+        return checksum
+
+
+# Functions #
+def stop_archivers():
+    # Logs submitted before the interpreter exits are still archived
+    for archiver in list(ARCHIVERS):
+        archiver.stop()
+
+
+atexit.register(stop_archivers)
+
+
+def file_checksum(path, algorithm="sha256", chunk_size=1048576):
+    file_hash = hashlib.new(algorithm)
+    with pathlib.Path(path).open("rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
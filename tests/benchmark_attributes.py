@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" benchmark_attributes.py
+Description: Measures the cost of attribute access on HDF5 containers and datasets.
+"""
+# Package Header #
+from src.BehaviorTaskMaster.__header__ import *
+
+# Header #
+__author__ = __author__
+__credits__ = __credits__
+__maintainer__ = __maintainer__
+__email__ = __email__
+
+
+# Imports #
+# Standard Libraries #
+import pathlib
+import sys
+import tempfile
+import timeit
+
+# Downloaded Libraries #
+import numpy as np
+
+# Local Libraries #
+from src.BehaviorTaskMaster.utility.eventlogger import HDF5container
+
+
+# Definitions #
+# Functions #
+def benchmark(path, n=20000):
+    container = HDF5container(path)
+    container.construct()
+    container.set_dataset("Samples", np.arange(100), shape=(100,), dtype="i8")
+    container.open()
+    dataset = container.get_dataset("Samples")
+
+    cases = {"plain attribute": lambda: container.is_updating,
+             "property": lambda: container.is_open,
+             "file attribute": lambda: container.FileType,
+             "dataset": lambda: container.Samples,
+             "dataset shape": lambda: dataset.shape,
+             "dataset wrapper": lambda: dataset.dataset}
+    for name, case in cases.items():
+        seconds = min(timeit.repeat(case, number=n, repeat=5)) / n
+        print(f"{name:>16}  {seconds * 1e6:8.3f} us")
+    container.close()
+
+
+# Main #
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    with tempfile.TemporaryDirectory() as directory:
+        benchmark(pathlib.Path(directory) / "attributes.h5", n)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" benchmark_compression.py
+Description: Compares the write speed, read speed, and file size of event logs under different storage settings.
+"""
+# Package Header #
+from src.BehaviorTaskMaster.__header__ import *
+
+# Header #
+__author__ = __author__
+__credits__ = __credits__
+__maintainer__ = __maintainer__
+__email__ = __email__
+
+
+# Imports #
+# Standard Libraries #
+import pathlib
+import sys
+import tempfile
+import time
+
+# Downloaded Libraries #
+import numpy as np
+
+# Local Libraries #
+from src.BehaviorTaskMaster.utility.eventlogger import HDF5eventLogger, HDF5storageConfig, HDF5durabilityConfig
+
+
+# Definitions #
+# Constants #
+SETTINGS = {"gzip 4": {},
+            "none": {"compression": None},
+            "lzf": {"compression": "lzf"},
+            "lzf shuffle": {"compression": "lzf", "shuffle": True},
+            "gzip 1 shuffle": {"compression": "gzip", "compression_opts": 1, "shuffle": True},
+            "gzip 4 4096 rows": {"chunk_rows": 4096},
+            "lzf delta": {"compression": "lzf", "shuffle": True, "delta_time": True},
+            "gzip 4 delta": {"shuffle": True, "delta_time": True},
+            "lzf delta categorical": {"compression": "lzf", "shuffle": True, "delta_time": True, "categorical": True}}
+
+
+# Functions #
+def synthetic_events(n=100000, seed=0):
+    # Mostly frames with the occasional answer, like a video task
+    rng = np.random.default_rng(seed)
+    start = time.time()
+    deltas = np.round(np.cumsum(rng.exponential(1 / 60, n)), 6)
+    events = []
+    for i, delta in enumerate(deltas.tolist()):
+        event = {"Time": start + delta, "DeltaTime": delta, "StartTime": start}
+        if i % 100 == 99:
+            event.update(Type="Rating", File="video_" + str(i // 1000) + ".mp4", Value=int(rng.integers(0, 10)))
+        else:
+            event.update(Type="Frame", Frame=i)
+        events.append(event)
+    return events
+
+
+def recorded_events(path):
+    logger = HDF5eventLogger(path)
+    logger.construct()
+    events = logger[:]
+    logger.close()
+    return events
+
+
+def benchmark(events, directory, name=""):
+    print(f"{name}: {len(events)} events")
+    print(f"{'setting':>21}  {'write us/event':>14}  {'read us/event':>13}  {'size KiB':>10}")
+    for setting, kwargs in SETTINGS.items():
+        path = pathlib.Path(directory) / (setting.replace(" ", "_") + ".h5")
+        start = time.perf_counter()
+        durability = HDF5durabilityConfig(buffered=True, buffer_size=4096, flush_interval=None)
+        logger = HDF5eventLogger(path, storage=HDF5storageConfig(**kwargs), durability=durability)
+        logger.construct()
+        logger.open()
+        for event in events:
+            logger.append(event.copy())
+        logger.close()
+        write = (time.perf_counter() - start) / len(events)
+
+        start = time.perf_counter()
+        logger = HDF5eventLogger(path)
+        logger.construct()
+        logger.open()
+        rows = sum(columns.shape[0] for columns in logger.iter_events(chunk_rows=65536))
+        logger.close()
+        read = (time.perf_counter() - start) / rows
+
+        print(f"{setting:>21}  {write * 1e6:14.2f}  {read * 1e6:13.3f}  {path.stat().st_size / 1024:10.1f}")
+
+
+# Main #
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        if len(sys.argv) > 1:
+            for argument in sys.argv[1:]:
+                benchmark(recorded_events(argument), directory, argument)
+        else:
+            benchmark(synthetic_events(), directory, "synthetic")
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" benchmark_publisher.py
+Description: Measures the latency from publishing an event to a subscriber in another process receiving it.
+"""
+# Package Header #
+from src.BehaviorTaskMaster.__header__ import *
+
+# Header #
+__author__ = __author__
+__credits__ = __credits__
+__maintainer__ = __maintainer__
+__email__ = __email__
+
+
+# Imports #
+# Standard Libraries #
+import multiprocessing
+import pathlib
+import sys
+import tempfile
+import time
+
+# Downloaded Libraries #
+import numpy as np
+
+# Local Libraries #
+from src.BehaviorTaskMaster.utility.eventpublisher import EventPublisher, EventSubscriber
+
+
+# Definitions #
+# Functions #
+def subscribe(address, n, results, ready):
+    # Stand in for a real time consumer, the clock is shared between processes so the latency is exact
+    latencies = []
+    with EventSubscriber(address) as subscriber:
+        ready.set()
+        for event in subscriber.events(timeout=5.0):
+            latencies.append(time.perf_counter() - event["Sent"])
+            if len(latencies) == n:
+                break
+    results.put(latencies)
+
+
+def benchmark(address, n=5000, interval=0.0005):
+    results = multiprocessing.Queue()
+    ready = multiprocessing.Event()
+    with EventPublisher(address, policy="buffer") as publisher:
+        process = multiprocessing.Process(target=subscribe, args=(publisher.address, n, results, ready))
+        process.start()
+        ready.wait()
+        while publisher.stats()["subscribers"] == 0:
+            time.sleep(0.01)
+
+        publish_times = []
+        for i in range(n):
+            start = time.perf_counter()
+            publisher.publish({"Time": time.time(), "DeltaTime": 0.0, "StartTime": 0.0, "Type": "Trigger",
+                               "Sent": time.perf_counter(), "Index": i})
+            publish_times.append(time.perf_counter() - start)
+            time.sleep(interval)
+
+        latencies = np.array(results.get(timeout=10.0)) * 1e6
+        process.join()
+        stats = publisher.stats()
+        address = publisher.address
+
+    publish_times = np.array(publish_times) * 1e6
+    print(f"{address}: received {latencies.shape[0]}/{n}, dropped {stats['dropped']}")
+    print(f"    publish us  median {np.median(publish_times):8.1f}  p99 {np.percentile(publish_times, 99):8.1f}")
+    print(f"    latency us  median {np.median(latencies):8.1f}  p99 {np.percentile(latencies, 99):8.1f}  "
+          f"max {latencies.max():8.1f}")
+
+
+# Main #
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    with tempfile.TemporaryDirectory() as directory:
+        benchmark((pathlib.Path(directory) / "events.sock").as_posix(), n)
+    benchmark(("127.0.0.1", 0), n)
@@ -0,0 +1,757 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" test_eventlogger.py
+Description: Stress tests many threads logging to one event logger at the same time.
+"""
+# Package Header #
+from src.BehaviorTaskMaster.__header__ import *
+
+# Header #
+__author__ = __author__
+__credits__ = __credits__
+__maintainer__ = __maintainer__
+__email__ = __email__
+
+
+# Imports #
+# Standard Libraries #
+import gc
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+# Downloaded Libraries #
+import h5py
+import numpy as np
+import pytest
+
+# Local Libraries #
+from src.BehaviorTaskMaster.utility.eventlogger import HDF5eventLogger, HDF5handleManager, link_ids_to_bytes
+from src.BehaviorTaskMaster.utility.eventlogger import HDF5container, HDF5metadataCache, HDF5flushPolicy, HDF5dataset
+from src.BehaviorTaskMaster.utility.eventlogger import HDF5storageConfig, HDF5durabilityConfig, HDF5segmentConfig
+
+
+# Definitions #
+# Constants #
+THREADS = 8
+EVENTS = 500
+MODES = [{}, {"durability": HDF5durabilityConfig(buffered=True, buffer_size=64)},
+         {"durability": HDF5durabilityConfig(threaded=True, queue_size=128)},
+         {"durability": HDF5durabilityConfig(journaled=True)}]
+SWMR_TYPES = {"Frame": {"Index": 0}, "Answer": {"Index": 0, "Text": ""}}
+
+
+# Functions #
+def log_concurrently(logger, threads=THREADS, events=EVENTS):
+    # Every thread starts at once and logs a shared type and a type of its own
+    barrier = threading.Barrier(threads + 1)
+    appender = logger.register_event_type("Frame", {"Thread": int, "Index": int})
+    errors = []
+
+    def produce(number):
+        producer = logger.producer("Thread" + str(number))
+        try:
+            barrier.wait()
+            for i in range(events):
+                producer.append("Sample", Value=number * events + i)
+                if i % 5 == 0:
+                    producer.append("Answer" + str(number), Text=str(i))
+                if i % 3 == 0:
+                    appender(number, i)
+        except Exception as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=produce, args=(number,)) for number in range(threads)]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    for worker in workers:
+        worker.join()
+    return errors
+
+
+def read_log(path):
+    with h5py.File(path, "r") as file:
+        return {name: np.ravel(dataset[...]) for name, dataset in file.items() if isinstance(dataset, h5py.Dataset)}
+
+
+def decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def write_string_link_log(path, count):
+    # Writes a log the way the logger did before LinkIDs were stored as bytes, a UUID string links each row
+    string = h5py.string_dtype(encoding="utf-8")
+    events = np.dtype([("Time", np.float64), ("DeltaTime", np.float64), ("StartTime", np.float64), ("Type", string),
+                       ("LinkID", string)])
+    start = time.time() - 100
+    links = [str(uuid.uuid4()) for _ in range(count + 1)]
+    rows = [(start, 0.0, start, "TimeSet", links[0])]
+    rows += [(start + i + 1, i + 1.0, start, "Sample", links[i + 1]) for i in range(count)]
+    samples = [(i, links[i + 1]) for i in range(count)]
+    with h5py.File(path, "w") as file:
+        file.attrs.update({"FileType": "EventLog", "Version": "0.0.1"})
+        for name, data in (("Events", np.array(rows, dtype=events)),
+                           ("TimeSet", np.array(links[:1], dtype=[("LinkID", string)])),
+                           ("Sample", np.array(samples, dtype=[("Value", np.int64), ("LinkID", string)]))):
+            file.create_dataset(name, data=data.reshape(-1, 1), maxshape=(None, 1), chunks=True)
+    return links
+
+
+def opens_elsewhere(path, mode="r"):
+    # Whether another process can open the file, HDF5 locks it while it is open for writing
+    command = "import sys, h5py; h5py.File(sys.argv[1], sys.argv[2]).close()"
+    return subprocess.run([sys.executable, "-c", command, str(path), mode], capture_output=True).returncode == 0
+
+
+# Tests #
+@pytest.mark.parametrize("kwargs", MODES)
+def test_concurrent_links(tmp_path, kwargs):
+    path = tmp_path / "concurrent.h5"
+    logger = HDF5eventLogger(path, **kwargs)
+    logger.construct()
+    logger.open()
+    logger.set_time()
+    assert log_concurrently(logger) == []
+    logger.close()
+
+    datasets = read_log(path)
+    events = datasets.pop("Events")
+    types = np.array([decode(type_) for type_ in events["Type"]])
+    links = link_ids_to_bytes(events["LinkID"])
+    assert len(set(links.tolist())) == events.shape[0]
+
+    # Every event joins exactly one row of its type and every row of a type is joined by an event
+    for name, child in datasets.items():
+        child_links = link_ids_to_bytes(child["LinkID"])
+        assert sorted(child_links.tolist()) == sorted(links[types == name].tolist())
+
+    frames = datasets["Frame"]
+    assert frames.shape[0] == THREADS * -(-EVENTS // 3)
+    for number in range(THREADS):
+        assert frames["Index"][frames["Thread"] == number].tolist() == list(range(0, EVENTS, 3))
+
+
+@pytest.mark.parametrize("kwargs", MODES)
+def test_producer_order(tmp_path, kwargs):
+    path = tmp_path / "ordered.h5"
+    logger = HDF5eventLogger(path, **kwargs)
+    logger.construct()
+    logger.open()
+    logger.set_time()
+    assert log_concurrently(logger) == []
+    for number in range(THREADS):
+        assert len(logger.producer("Thread" + str(number))) == EVENTS + -(-EVENTS // 5)
+    logger.close()
+
+    datasets = read_log(path)
+    events = datasets["Events"]
+    samples = datasets["Sample"]
+    types = np.array([decode(type_) for type_ in events["Type"]])
+    produced = np.isin(types, ["Sample"] + ["Answer" + str(number) for number in range(THREADS)])
+
+    # The times of the produced events increase down the file across all of the threads
+    assert np.all(np.diff(events["Time"][produced]) >= 0)
+
+    # Each producer's numbers have no gaps and are stored in the order they were given
+    sample_order = {link: row for row, link in enumerate(link_ids_to_bytes(events["LinkID"]).tolist())}
+    rows = np.array([sample_order[link] for link in link_ids_to_bytes(samples["LinkID"]).tolist()])
+    samples = samples[np.argsort(rows)]
+    for number in range(THREADS):
+        mine = samples[np.array([decode(name) for name in samples["Producer"]]) == "Thread" + str(number)]
+        assert mine["Value"].tolist() == list(range(number * EVENTS, (number + 1) * EVENTS))
+        assert np.all(np.diff(mine["Sequence"]) > 0)
+        answers = datasets["Answer" + str(number)]
+        sequences = np.sort(np.concatenate([mine["Sequence"], answers["Sequence"]]))
+        assert sequences.tolist() == list(range(EVENTS + -(-EVENTS // 5)))
+
+
+@pytest.mark.parametrize("kwargs", MODES)
+def test_reads_while_producing(tmp_path, kwargs):
+    logger = HDF5eventLogger(tmp_path / "reading.h5", **kwargs)
+    logger.construct()
+    logger.open()
+    logger.set_time()
+    errors = []
+
+    def produce(number):
+        producer = logger.producer("Thread" + str(number))
+        try:
+            for i in range(EVENTS):
+                producer.append("Sample", Value=number * EVENTS + i)
+        except Exception as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=produce, args=(number,)) for number in range(4)]
+    for worker in workers:
+        worker.start()
+
+    # Every read sees a whole log, and never fewer events than the read before it
+    counts = []
+    while any(worker.is_alive() for worker in workers):
+        counts.append(len(logger.get_event_type("Sample")))
+        assert logger.get_event_columns("Sample").shape[0] >= counts[-1]
+        assert sum(columns.shape[0] for columns in logger.iter_events("Sample")) >= counts[-1]
+        assert len(logger) > counts[-1]
+        assert logger[-1]["Type"] in ("TimeSet", "Sample")
+    for worker in workers:
+        worker.join()
+
+    assert errors == []
+    assert counts == sorted(counts)
+    assert len(logger.get_event_type("Sample")) == 4 * EVENTS
+    logger.close()
+
+
+def write_frames(path, count, **kwargs):
+    logger = HDF5eventLogger(path, **kwargs)
+    logger.construct()
+    logger.open()
+    logger.set_time()
+    for i in range(count):
+        logger.append("Frame" if i % 2 else "Sample", Index=i)
+    logger.close()
+
+
+def test_index_saved_by_full_buffer(tmp_path):
+    # The last event fills the buffer, which saves the index before the logger is closed
+    path = tmp_path / "buffered.h5"
+    write_frames(path, 55, durability=HDF5durabilityConfig(buffered=True, buffer_size=7))
+
+    logger = HDF5eventLogger(path)
+    logger.construct()
+    first = logger[0]["Time"]
+    last = logger[-1]["Time"]
+    assert len(logger.find_event_range(first, last)[1]) == 56
+    assert len(logger.find_event_range(first, last, "Frame")[1]) == 27
+    logger.close()
+
+
+def test_flush_policy_triggers():
+    # Each trigger resets the pending count, the stats keep the totals while only the recent durations are held
+    policy = HDF5flushPolicy(events=3, interval=0.05, types=("Answer",), recent_size=4)
+    assert [policy.due("Sample") for _ in range(3)] == [None, None, "events"]
+    policy.record(0.5, "events")
+    assert policy.due("Answer") == "type"
+    policy.record(1.0, "type")
+    assert policy.due("Sample") is None and not policy.is_idle_due()
+    time.sleep(0.06)
+    assert policy.is_idle_due() and policy.due("Sample") == "interval"
+    for _ in range(8):
+        policy.record(0.25, "interval")
+
+    stats = policy.stats()
+    assert len(policy.durations) == 4
+    assert stats["flushes"] == 10 and stats["pending"] == 0
+    assert stats["reasons"] == {"events": 1, "type": 1, "interval": 8}
+    assert stats["total_time"] == 3.5 and stats["mean_time"] == 0.35 and stats["max_time"] == 1.0
+    assert stats["p99_time"] == 0.25
+    policy.clear()
+    assert policy.stats()["flushes"] == 0 and policy.stats()["p99_time"] == 0.0
+
+
+def test_buffer_flushed_when_due(tmp_path):
+    # A full buffer or one older than the flush interval is written as events are appended
+    path = tmp_path / "due.h5"
+    logger = HDF5eventLogger(path, durability=HDF5durabilityConfig(buffered=True, buffer_size=4, flush_interval=None))
+    logger.construct()
+    logger.open()
+    logger.set_time()
+    for i in range(11):
+        logger.append("Sample", Value=i)
+    assert logger.flush_stats()["reasons"] == {"buffer": 3} and len(logger.buffer) == 0
+    logger.close()
+
+    path = tmp_path / "interval.h5"
+    logger = HDF5eventLogger(path, durability=HDF5durabilityConfig(buffered=True, buffer_size=None, flush_interval=0.05))
+    logger.construct()
+    logger.open()
+    logger.set_time()
+    logger.append("Sample", Value=0)
+    assert len(logger.buffer) == 2
+    time.sleep(0.06)
+    logger.append("Sample", Value=1)
+    assert logger.flush_stats()["reasons"] == {"buffer": 1} and len(logger.buffer) == 0
+    logger.close()
+
+
+def test_appended_without_open(tmp_path):
+    # Each append opens and releases the file, the rows written are kept past the allocation the file is grown to
+    path = tmp_path / "unopened.h5"
+    logger = HDF5eventLogger(path)
+    logger.construct()
+    logger.set_time()
+    for i in range(3):
+        logger.append("Sample", Value=i)
+    assert len(logger) == 4
+    assert [event["Type"] for event in logger[:]] == ["TimeSet", "Sample", "Sample", "Sample"]
+    assert [event["Value"] for event in logger.get_event_type("Sample")] == [0, 1, 2]
+    logger.close()
+
+    with h5py.File(path, "r") as file:
+        assert file["Events"].shape[0] == 4 and file["Sample"].shape[0] == 3
+        assert "Length" not in file["Events"].attrs and "Length" not in file["Sample"].attrs
+
+
+def test_string_link_log_round_trip(tmp_path):
+    path = tmp_path / "strings.h5"
+    links = write_string_link_log(path, 3)
+
+    logger = HDF5eventLogger(path)
+    logger.construct()
+    assert len(logger) == 4
+    samples = logger.get_event_type("Sample", id_info=True)
+    assert [event["Value"] for event in samples] == [0, 1, 2]
+    assert [event["LinkID"] for event in samples] == links[1:]
+    assert logger.find_event(logger[2]["Time"])[0] == 2
+
+    # Events appended to the old log keep its string LinkIDs
+    logger.set_time()
+    logger.append("Sample", Value=3)
+    logger.append("Sample", Value=4)
+    assert len(logger) == 7
+    logger.close()
+
+    logger = HDF5eventLogger(path)
+    logger.construct()
+    assert [event["Type"] for event in logger[:]] == ["TimeSet", "Sample", "Sample", "Sample", "TimeSet", "Sample",
+                                                      "Sample"]
+    samples = logger.get_event_type("Sample", id_info=True)
+    assert [event["Value"] for event in samples] == [0, 1, 2, 3, 4]
+    assert samples[0]["LinkID"] == links[1] and len(set(event["LinkID"] for event in samples)) == 5
+    logger.close()
+    with h5py.File(path, "r") as file:
+        assert file["Events"].shape == (7, 1) and file["Events"].dtype["LinkID"].kind == "O"
+
+
+def test_stale_type_index_rebuilt(tmp_path):
+    path = tmp_path / "stale.h5"
+    write_frames(path, 20)
+    with h5py.File(path, "a") as file:
+        file["_Index/Times/Frame"].resize((9,))
+        file["_Index/Rows/Frame"].resize((9,))
+
+    logger = HDF5eventLogger(path)
+    with pytest.warns(UserWarning, match="out of date event index"):
+        logger.construct()
+    _, frames = logger.find_event_range(logger[0]["Time"], logger[-1]["Time"], "Frame")
+    assert [event["Index"] for event in frames] == list(range(1, 20, 2))
+    logger.close()
+
+
+@pytest.mark.parametrize("kwargs", MODES + [{"durability": HDF5durabilityConfig(swmr=True), "event_types": SWMR_TYPES}])
+def test_appender_times(tmp_path, kwargs):
+    path = tmp_path / "appended.h5"
+    logger = HDF5eventLogger(path, **kwargs)
+    logger.construct()
+    logger.open()
+    logger.set_time()
+    appender = logger.register_event_type("Answer", {"Index": int, "Text": str})
+    bounds = []
+    for i in range(5):
+        before = time.time()
+        appender(i, "a" + str(i))
+        logger.append("Frame", Index=i)
+        bounds.append((before, time.time()))
+    if logger.is_journaled:
+        # The journal holds the appended values with their times before the buffer is stored
+        journaled = [event for event in logger.journal.read() if event["Type"] == "Answer"]
+        assert [event["Index"] for event in journaled] == list(range(5))
+        assert all(b[0] - 0.01 <= event["Time"] <= b[1] + 0.01 for event, b in zip(journaled, bounds))
+    logger.close()
+
+    logger = HDF5eventLogger(path)
+    logger.construct()
+    events = logger[:]
+    assert [event["Type"] for event in events] == ["TimeSet"] + ["Answer", "Frame"] * 5
+    answers = logger.get_event_type("Answer")
+    assert [(event["Index"], event["Text"]) for event in answers] == [(i, "a" + str(i)) for i in range(5)]
+    start = events[0]["Time"]
+    for answer, (before, after) in zip(answers, bounds):
+        assert before - 0.01 <= answer["Time"] <= after + 0.01
+        assert answer["StartTime"] == pytest.approx(start)
+        assert answer["Time"] == pytest.approx(start + answer["DeltaTime"])
+    times = [event["Time"] for event in events]
+    assert times == sorted(times)
+    logger.close()
+
+
+def test_journal_changing_fields(tmp_path):
+    path = tmp_path / "journaled.h5"
+    logger = HDF5eventLogger(path, durability=HDF5durabilityConfig(journaled=True, buffer_size=8, flush_interval=None))
+    logger.construct()
+    logger.open()
+    logger.set_time()
+    logger.append("Rating", Value=1)
+    logger.append("Rating", Value=1.5)
+    logger.append("Rating", Value=2, Note="late")
+    with pytest.raises(TypeError):
+        logger.append("Rating", Value=None)
+    for i in range(20):
+        logger.append("Frame", Index=i)
+        # The journal is flushed to the file by the same policy as the buffer
+        assert len(logger.buffer) < 8
+
+    # Only the events the file could store were journaled
+    journaled = logger.journal.read()
+    assert all(event["Type"] == "Frame" for event in journaled)
+    logger.close()
+    assert not logger.journal.path.is_file()
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"durability": HDF5durabilityConfig(buffered=True)}])
+def test_columns_of_types_without_rows(tmp_path, kwargs):
+    logger = HDF5eventLogger(tmp_path / "empty.h5", **kwargs)
+    logger.construct()
+    logger.open()
+    logger.set_time()
+    logger.register_event_type("Video_Frame", {"Frame": int})
+    logger.append("Sample", Value=1)
+
+    assert logger.get_event_type("Nope") == []
+    assert logger.get_event_columns("Nope").shape == (0,)
+    columns = logger.get_event_columns("Video_Frame")
+    assert columns.shape == (0,) and "Frame" in columns.dtype.names
+    logger.close()
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"durability": HDF5durabilityConfig(buffered=True)}])
+def test_iter_types_without_rows(tmp_path, kwargs):
+    path = tmp_path / "empty.h5"
+    logger = HDF5eventLogger(path, **kwargs)
+    logger.construct()
+    logger.open()
+    logger.set_time()
+    logger.register_event_type("Video_Frame", {"Frame": int})
+    logger.append("Sample", Value=1)
+    for name in ("Nope", "Video_Frame"):
+        assert list(logger.iter_events(name)) == []
+        assert list(logger.iter_events(name, start=0, end=np.inf)) == []
+    logger.close()
+
+    logger = HDF5eventLogger(path)
+    logger.construct()
+    for name in ("Nope", "Video_Frame"):
+        assert list(logger.iter_events(name)) == []
+    assert sum(columns.shape[0] for columns in logger.iter_events("Sample")) == 1
+    logger.close()
+
+
+def test_swmr_pending_replayed(tmp_path):
+    path = tmp_path / "swmr.h5"
+    logger = HDF5eventLogger(path, durability=HDF5durabilityConfig(swmr=True), event_types={"Frame": {"Index": 0}})
+    logger.construct()
+    logger.open()
+    logger.set_time()
+    logger.append("Frame", Index=0)
+    logger.append("Late", Note="undeclared")
+
+    # A reader in another process holds the file's lock for as long as it is attached
+    reader = subprocess.Popen([sys.executable, "-c", "import sys, h5py; f = h5py.File(sys.argv[1], 'r', swmr=True); "
+                               "print('ready', flush=True); sys.stdin.read()", str(path)],
+                              stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+    try:
+        assert reader.stdout.readline().strip() == "ready"
+        with pytest.warns(UserWarning, match="still open by readers"):
+            logger.close()
+        assert logger.journal.path.is_file()
+
+        with pytest.raises(BlockingIOError, match="single writer multiple reader"):
+            HDF5eventLogger(path).construct()
+    finally:
+        reader.communicate("")
+
+    # The undeclared event is replayed from the journal once the file can be written
+    logger = HDF5eventLogger(path)
+    with pytest.warns(UserWarning, match="Recovering 1 events"):
+        logger.construct()
+    assert [event["Note"] for event in logger.get_event_type("Late")] == ["undeclared"]
+    assert len(logger) == 3
+    logger.close()
+    assert not logger.journal.path.is_file()
+
+
+def test_idle_handles_closed_by_their_thread(tmp_path):
+    manager = HDF5handleManager(idle_timeout=0.0)
+    first, second, third = (tmp_path / name for name in ("first.h5", "second.h5", "third.h5"))
+    for path in (first, second):
+        h5py.File(path, "w").close()
+    manager.acquire(first, "r")
+    manager.release(first)
+
+    def use_second():
+        manager.acquire(second, "r")
+        manager.release(second)
+
+    worker = threading.Thread(target=use_second)
+    worker.start()
+    worker.join()
+    assert first in manager and second in manager
+
+    # Only the idle handles this thread used are closed when it leases another file
+    manager.acquire(third)
+    assert first not in manager and second in manager and third in manager
+    manager.release(third)
+    # Writable files are closed as soon as nothing leases them
+    assert third not in manager
+    manager.close_all()
+    assert len(manager) == 0
+
+
+def test_released_file_opens_elsewhere(tmp_path):
+    path = tmp_path / "released.h5"
+    write_frames(path, 10)
+
+    logger = HDF5eventLogger(path)
+    logger.construct()
+    assert len(logger.get_event_type("Sample")) == 5
+    assert opens_elsewhere(path) and opens_elsewhere(path, "a")
+
+    # A logger that is never closed gives the file up once it is collected
+    logger.open()
+    assert not opens_elsewhere(path)
+    del logger
+    gc.collect()
+    assert opens_elsewhere(path) and opens_elsewhere(path, "a")
+
+
+def test_metadata_cache_bounded():
+    cache = HDF5metadataCache(max_size=2)
+    for name in ("a", "b", "c"):
+        cache[name] = name
+        cache.get("a")
+    assert len(cache) == 2 and "a" in cache and "b" not in cache
+
+
+def test_metadata_read_without_reopening(tmp_path):
+    path = tmp_path / "metadata.h5"
+    write_frames(path, 10)
+
+    container = HDF5container(path)
+    metadata = container.get_metadata()
+    assert path not in HDF5container.handles
+    # The stamp is taken after the file is closed, so the cached metadata is used until the file changes
+    assert container.get_metadata(refresh=False) is metadata
+    assert HDF5container(path).get_metadata() is metadata
+    assert path not in HDF5container.handles
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"storage": HDF5storageConfig(categorical=True), "durability": HDF5durabilityConfig(swmr=True)},
+    {"storage": HDF5storageConfig(), "durability": HDF5durabilityConfig(swmr=True)},
+    {"durability": HDF5durabilityConfig(threaded=True, journaled=True)},
+    {"segmentation": HDF5segmentConfig(events=10), "archiver": object()},
+])
+def test_conflicting_configs_refused(tmp_path, kwargs):
+    with pytest.raises(ValueError):
+        HDF5eventLogger(tmp_path / "conflicting.h5", **kwargs)
+    assert not (tmp_path / "conflicting.h5").exists()
+
+
+@pytest.mark.parametrize("categorical", [False, True])
+def test_type_named_like_lookups(tmp_path, categorical):
+    path = tmp_path / "categories.h5"
+    logger = HDF5eventLogger(path, storage=HDF5storageConfig(categorical=categorical))
+    logger.construct()
+    logger.open()
+    logger.set_time()
+    logger.append("Categories", Note="x")
+    with pytest.raises(ValueError, match="reserves"):
+        logger.append("_Categories", Note="x")
+    logger.close()
+
+    logger = HDF5eventLogger(path)
+    logger.construct()
+    assert [event["Note"] for event in logger.get_event_type("Categories")] == ["x"]
+    logger.close()
+
+
+def test_type_named_like_index(tmp_path):
+    path = tmp_path / "index.h5"
+    write_frames(path, 4)
+    logger = HDF5eventLogger(path)
+    logger.construct()
+    logger.open()
+    logger.set_time()
+    logger.append("Index", Value=1)
+    with pytest.raises(ValueError, match="reserves"):
+        logger.append("_Index", Value=1)
+    logger.close()
+
+    # The saved index is used when the log is opened again
+    logger = HDF5eventLogger(path)
+    logger.construct()
+    assert logger.index_valid
+    assert [event["Value"] for event in logger.get_event_type("Index")] == [1]
+    assert len(logger.find_event_range(logger[0]["Time"], logger[-1]["Time"], "Index")[1]) == 1
+    logger.close()
+
+
+def test_rollover_stitched_by_master(tmp_path):
+    path = tmp_path / "segmented.h5"
+    logger = HDF5eventLogger(path, segmentation=HDF5segmentConfig(events=10))
+    logger.construct()
+    logger.open()
+    logger.set_time()
+    for i in range(35):
+        logger.append("Frame" if i % 2 else "Sample", Index=i)
+    assert len(logger.segment_paths) == 4
+    # Only the open segment can be queried while the log is being written
+    with pytest.warns(UserWarning, match="closed segments"):
+        assert len(logger) < 36
+    logger.close()
+
+    master = HDF5eventLogger(path)
+    master.construct()
+    assert master.index_valid
+    assert len(master) == 36
+    first = master[0]["Time"]
+    last = master[-1]["Time"]
+    assert len(master.find_event_range(first, last)[1]) == 36
+    _, frames = master.find_event_range(first, last, "Frame")
+    assert [event["Index"] for event in frames] == list(range(1, 35, 2))
+
+    # The stitched index points at the rows each type has in the master
+    index = master.require_time_index()
+    assert index.get_rows().tolist() == list(range(36))
+    samples = master.get_events(index.get_rows("Sample"))
+    assert [event["Index"] for event in samples] == list(range(0, 35, 2))
+    master.close()
+
+
+def test_repacked_log_memory_mapped(tmp_path):
+    # A repacked log is contiguous so its numeric fields are mapped straight from the file
+    path = tmp_path / "chunked.h5"
+    write_frames(path, 20)
+    logger = HDF5eventLogger(path)
+    logger.construct()
+    logger.repack(tmp_path / "contiguous.h5")
+    logger.close()
+    expected = read_log(tmp_path / "contiguous.h5")
+
+    mapped = HDF5eventLogger(tmp_path / "contiguous.h5", mmap=True)
+    mapped.construct()
+    for name in ("Time", "DeltaTime"):
+        values = mapped.Events.read_field(name)
+        assert isinstance(values, np.memmap)
+        assert np.array_equal(np.ravel(values), expected["Events"][name])
+    assert len(mapped.find_event_range(mapped[0]["Time"], mapped[-1]["Time"], "Frame")[1]) == 10
+    mapped.close()
+
+
+@pytest.mark.parametrize("compression", [None, "gzip"])
+def test_unmappable_log_read(tmp_path, compression):
+    # Chunked and compressed datasets cannot be mapped, they are read through h5py instead
+    path = tmp_path / "chunked.h5"
+    write_frames(path, 20)
+    if compression is not None:
+        logger = HDF5eventLogger(path)
+        logger.construct()
+        logger.repack(tmp_path / "compressed.h5", compression=compression)
+        logger.close()
+        path = tmp_path / "compressed.h5"
+    expected = read_log(path)
+
+    logger = HDF5eventLogger(path, mmap=True)
+    logger.construct()
+    assert logger.Events.memmap() is None
+    for name in ("Time", "DeltaTime"):
+        values = logger.Events.read_field(name)
+        assert not isinstance(values, np.memmap)
+        assert np.array_equal(np.ravel(values), expected["Events"][name])
+    logger.close()
+
+
+def test_find_events_batch(tmp_path):
+    # A batch of times is searched at once and agrees with searching each time alone
+    path = tmp_path / "batch.h5"
+    write_frames(path, 8)
+    logger = HDF5eventLogger(path)
+    logger.construct()
+    times = [event["Time"] for event in logger[:]]
+    assert logger.find_events(times).tolist() == list(range(9))
+    assert logger.find_events(times[2::2], "Frame").tolist() == [0, 1, 2, 3]
+    queries = [times[0] - 1] + [(a + b) / 2 for a, b in zip(times, times[1:])] + [times[-1] + 1]
+    for bisect_ in ("bisect", "left", "right"):
+        found = logger.find_events(queries, "Sample", bisect_).tolist()
+        assert found == [int(logger.find_events([t], "Sample", bisect_)[0]) for t in queries]
+    assert logger.find_event(times[4], "Frame")[1]["Index"] == 3
+    logger.close()
+
+
+def test_find_event_range_after_appends(tmp_path):
+    # Events appended after a query are found by the next one, and the range is bounded by its times
+    path = tmp_path / "range.h5"
+    logger = HDF5eventLogger(path)
+    logger.construct()
+    logger.open()
+    logger.set_time()
+    for i in range(6):
+        logger.append("Frame" if i % 2 else "Sample", Index=i)
+    first = logger[0]["Time"]
+    assert len(logger.find_event_range(first, logger[-1]["Time"])[1]) == 7
+
+    for i in range(6, 12):
+        logger.append("Frame" if i % 2 else "Sample", Index=i)
+    times = [event["Time"] for event in logger[:]]
+    indices, events = logger.find_event_range(first, times[-1])
+    assert indices == range(0, 13) and len(events) == 13
+    indices, events = logger.find_event_range(times[3], times[9], "Frame")
+    assert [event["Index"] for event in events] == [3, 5, 7]
+    assert indices == range(1, 4)
+    logger.close()
+
+
+def test_linked_rows_written_once(tmp_path, monkeypatch):
+    # Appending an event writes its parent row and its child row once each, already linked
+    path = tmp_path / "linked.h5"
+    logger = HDF5eventLogger(path)
+    logger.construct()
+    logger.open()
+    logger.set_time()
+    writes = []
+    setitem = HDF5dataset.__setitem__
+
+    def count_write(dataset, key, value):
+        writes.append(dataset.name)
+        setitem(dataset, key, value)
+
+    monkeypatch.setattr(HDF5dataset, "__setitem__", count_write)
+    for i in range(3):
+        logger.append("Frame", Index=i)
+    assert writes == ["/Events", "/Frame"] * 3
+    monkeypatch.undo()
+
+    links = logger.hierarchy.dataset_links
+    id_ = links.get_id("Frame", (2, 0))
+    assert links.get_indices(id_) == {"Events": (3, 0), "Frame": (2, 0)}
+    assert links.get_linked_data("Events", id_)["Frame"]["Index"] == 2
+    logger.close()
+
+
+def test_link_ids_found_after_reopen(tmp_path):
+    # The LinkID index is rebuilt from the file, including rows appended after the log was reopened
+    path = tmp_path / "links.h5"
+    write_frames(path, 6)
+    with h5py.File(path, "r") as file:
+        ids = [uuid.UUID(bytes=bytes(id_)) for id_ in np.ravel(file["Events"]["LinkID"])]
+
+    logger = HDF5eventLogger(path)
+    logger.construct()
+    links = logger.hierarchy.dataset_links
+    for row, id_ in enumerate(ids):
+        name = "TimeSet" if row == 0 else ("Frame" if row % 2 == 0 else "Sample")
+        indices = links.get_indices(id_)
+        assert indices["Events"] == (row, 0) and indices[name] == (max(row - 1, 0) // 2, 0)
+        assert links.get_index("Events", str(id_)) == (row, 0)
+    assert links.get_linked_data("Events", ids[4])["Frame"]["Index"] == 3
+
+    logger.open()
+    logger.set_time()
+    logger.append("Frame", Index=7)
+    id_ = links.get_id("Events", (8, 0))
+    assert links.get_indices(id_) == {"Events": (8, 0), "Frame": (3, 0)}
+    assert uuid.uuid4() not in links.references["Events"]
+    logger.close()
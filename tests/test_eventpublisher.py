@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" test_eventpublisher.py
+Description: Tests that subscribers which fall behind can still decode the events they receive.
+"""
+# Package Header #
+from src.BehaviorTaskMaster.__header__ import *
+
+# Header #
+__author__ = __author__
+__credits__ = __credits__
+__maintainer__ = __maintainer__
+__email__ = __email__
+
+
+# Imports #
+# Standard Libraries #
+import threading
+import time
+
+# Downloaded Libraries #
+import pytest
+
+# Local Libraries #
+from src.BehaviorTaskMaster.utility.eventjournal import EventCodec
+from src.BehaviorTaskMaster.utility.eventlogger import HDF5eventLogger
+from src.BehaviorTaskMaster.utility.eventpublisher import EventPublisher, EventSubscriber
+
+
+# Definitions #
+# Functions #
+def make_event(type_, **kwargs):
+    return {"Time": time.time(), "DeltaTime": 0.0, "StartTime": 0.0, "Type": type_, **kwargs}
+
+
+# Tests #
+def test_codec_skips_unknown_types():
+    encoder = EventCodec()
+    first = encoder.encode(make_event("Frame", Frame=1))
+    encoder.encode(make_event("Trigger", Index=1))
+    second = encoder.encode(make_event("Trigger", Index=2))
+    third = encoder.encode(make_event("Frame", Frame=2))
+
+    # The trigger's schema was only in its first record, which was lost
+    decoder = EventCodec()
+    data = first + second + third
+    events, offset, corrupt = decoder.decode(data)
+    assert not corrupt and offset == len(data)
+    assert [event["Type"] for event in events] == ["Frame", "Frame"]
+    assert decoder.unknown_count == 1
+
+
+def test_codec_widens_schema():
+    encoder = EventCodec()
+    data = encoder.encode(make_event("Rating", Value=1))
+    data += encoder.encode(make_event("Rating", Value=1.5))
+    data += encoder.encode(make_event("Rating", Value=2, Note="late"))
+    data += encoder.encode(make_event("Rating", Value=None))
+
+    events, offset, corrupt = EventCodec().decode(data)
+    assert not corrupt and offset == len(data)
+    assert [event["Value"] for event in events] == [1, 1.5, 2.0, "None"]
+    assert events[2]["Note"] == "late"
+
+
+def test_codec_encodes_values():
+    # An appender's values are encoded in the order of its fields and decode like any other event
+    encoder = EventCodec()
+    fields = [("Index", "i"), ("Text", "s"), ("Value", "f")]
+    data = encoder.encode_values("Answer", fields, (10.5, 0.5, 10.0), (1, "a", 0.25))
+    data += encoder.encode(make_event("Answer", Index=2, Text="b", Value=0.5))
+    data += encoder.encode_values("Answer", fields, (11.5, 1.5, 10.0), (3, "c", 0.75))
+
+    events, offset, corrupt = EventCodec().decode(data)
+    assert not corrupt and offset == len(data)
+    values = [(event["Index"], event["Text"], event["Value"]) for event in events]
+    assert values == [(1, "a", 0.25), (2, "b", 0.5), (3, "c", 0.75)]
+    assert (events[0]["Time"], events[0]["DeltaTime"], events[0]["StartTime"]) == (10.5, 0.5, 10.0)
+    assert "LinkID" not in events[0]
+
+
+@pytest.mark.parametrize("policy", ["drop", "buffer"])
+def test_stalled_subscriber(tmp_path, policy):
+    with EventPublisher((tmp_path / "events.sock").as_posix(), policy=policy, buffer_size=65536) as publisher:
+        with EventSubscriber(publisher.address) as subscriber:
+            while publisher.stats()["subscribers"] == 0:
+                time.sleep(0.01)
+
+            # The subscriber does not read until the publisher has dropped events, including a new type's first
+            padding = "x" * 256
+            for i in range(20000):
+                publisher.publish(make_event("Frame", Frame=i, Padding=padding))
+            assert publisher.stats()["dropped"] > 0
+            publisher.publish(make_event("Trigger", Index=0))
+
+            received = []
+
+            def read():
+                for event in subscriber.events(timeout=1.0):
+                    received.append(event)
+
+            reader = threading.Thread(target=read)
+            reader.start()
+            start = time.perf_counter()
+            index = 1
+            while reader.is_alive() and time.perf_counter() - start < 10.0:
+                publisher.publish(make_event("Trigger", Index=index))
+                index += 1
+                time.sleep(0.001)
+                if any(event["Type"] == "Trigger" for event in received):
+                    break
+            reader.join()
+
+    triggers = [event for event in received if event["Type"] == "Trigger"]
+    assert triggers
+    assert all(isinstance(event["Index"], int) for event in triggers)
+
+
+def test_appender_events_published(tmp_path):
+    with EventPublisher((tmp_path / "events.sock").as_posix()) as publisher:
+        with EventSubscriber(publisher.address) as subscriber:
+            while publisher.stats()["subscribers"] == 0:
+                time.sleep(0.01)
+            logger = HDF5eventLogger(tmp_path / "published.h5", publisher=publisher)
+            logger.construct()
+            logger.open()
+            logger.set_time()
+            appender = logger.register_event_type("Answer", {"Index": int, "Text": str})
+            before = time.time()
+            for i in range(3):
+                appender(i, "a" + str(i))
+            after = time.time()
+            logger.close()
+
+            received = []
+            for event in subscriber.events(timeout=1.0):
+                received.append(event)
+                if len(received) == 4:
+                    break
+
+    answers = [event for event in received if event["Type"] == "Answer"]
+    assert [(event["Index"], event["Text"]) for event in answers] == [(0, "a0"), (1, "a1"), (2, "a2")]
+    assert all(before - 0.01 <= event["Time"] <= after + 0.01 for event in answers)
+    assert all(event["Time"] == pytest.approx(event["StartTime"] + event["DeltaTime"]) for event in answers)
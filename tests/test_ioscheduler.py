@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" test_ioscheduler.py
+Description: Tests that file work waits for the idle phases of a task and still runs before the session ends.
+"""
+# Package Header #
+from src.BehaviorTaskMaster.__header__ import *
+
+# Header #
+__author__ = __author__
+__credits__ = __credits__
+__maintainer__ = __maintainer__
+__email__ = __email__
+
+
+# Imports #
+# Standard Libraries #
+
+# Downloaded Libraries #
+import pytest
+
+# Local Libraries #
+from src.BehaviorTaskMaster.utility.eventlogger import HDF5eventLogger
+from src.BehaviorTaskMaster.utility.ioscheduler import IOScheduler
+
+
+# Definitions #
+# Classes #
+class PhaseWidget(object):
+    # Stands in for a task's widget, the sequencer only runs it and names its phase
+    def __init__(self, name, ran):
+        self.name = name
+        self.ran = ran
+
+    def run(self, **kwargs):
+        self.ran.append(self.name)
+
+
+# Functions #
+def stored_events(logger):
+    with logger.io_lock:
+        logger.open()
+        return logger.Events.len()
+
+
+# Tests #
+def test_flushes_wait_for_idle_phase(tmp_path):
+    scheduler = IOScheduler(critical_phases=("video_player",))
+    logger = HDF5eventLogger(tmp_path / "scheduled.h5", io_scheduler=scheduler)
+    logger.construct()
+    logger.open()
+    logger.set_time()
+
+    # Held in the buffer while the video plays, set_time has already stored its own event
+    stored = stored_events(logger)
+    scheduler.set_phase("video_player")
+    for i in range(10):
+        logger.append("Frame", Index=i)
+    assert len(logger.buffer) == 10 and len(scheduler) > 0
+    assert stored_events(logger) == stored
+
+    # Stored once the washout starts
+    scheduler.set_phase("washout")
+    assert scheduler.drain() == 0
+    assert len(logger.buffer) == 0 and stored_events(logger) == stored + 10
+    assert scheduler.stats()["drains"] == 1
+    logger.close()
+
+
+def test_buffer_written_through_past_max(tmp_path):
+    scheduler = IOScheduler(critical_phases=("video_player",), max_buffered=4)
+    logger = HDF5eventLogger(tmp_path / "bounded.h5", io_scheduler=scheduler)
+    logger.construct()
+    logger.open()
+    logger.set_time()
+
+    stored = stored_events(logger)
+    scheduler.set_phase("video_player")
+    for i in range(10):
+        logger.append("Frame", Index=i)
+        assert len(logger.buffer) <= 4
+    assert stored_events(logger) + len(logger.buffer) == stored + 10 and stored_events(logger) > stored
+    logger.close()
+
+
+def test_sequencer_prefetches_and_finishes(tmp_path, monkeypatch):
+    utilitywidgets = pytest.importorskip("src.BehaviorTaskMaster.QtUtility.utilitywidgets", exc_type=ImportError)
+    fetched = []
+    monkeypatch.setattr(utilitywidgets, "prefetch_file", fetched.append)
+    ran = []
+    video, washout = PhaseWidget("video_player", ran), PhaseWidget("washout", ran)
+    scheduler = IOScheduler(critical_phases=("video_player",))
+    sequencer = utilitywidgets.WidgetContainerSequencer(scheduler=scheduler)
+    sequencer.add_phases({"video_player": video, "washout": washout})
+    sequencer.insert(video, path=tmp_path / "first.mp4")
+    sequencer.insert(video, path=tmp_path / "second.mp4")
+    sequencer.insert(washout)
+
+    # The next video is only read ahead once the washout is showing
+    sequencer.start()
+    sequencer.prefetch_next(video)
+    next(sequencer)
+    assert fetched == [] and len(scheduler) == 1
+    next(sequencer)
+    assert fetched == [tmp_path / "second.mp4"] and len(scheduler) == 0
+    sequencer.prefetch_next(video)
+    assert fetched == [tmp_path / "second.mp4", tmp_path / "first.mp4"]
+    assert ran == ["video_player", "video_player", "washout"]
+
+    logger = HDF5eventLogger(tmp_path / "finished.h5", io_scheduler=scheduler)
+    logger.construct()
+    logger.open()
+    logger.set_time()
+    # The session ends during a video, what it held back is stored before the log is closed
+    next(sequencer)
+    stored = stored_events(logger)
+    logger.append("Frame", Index=0)
+    assert len(logger.buffer) == 1
+    sequencer.finish(logger)
+    assert scheduler.phase is None and len(scheduler) == 0
+    assert not logger.is_open and stored_events(logger) == stored + 1
+    logger.close()
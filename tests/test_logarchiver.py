@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" test_logarchiver.py
+Description: Tests that logs are only removed from staging once a verified copy is in the archive.
+"""
+# Package Header #
+from src.BehaviorTaskMaster.__header__ import *
+
+# Header #
+__author__ = __author__
+__credits__ = __credits__
+__maintainer__ = __maintainer__
+__email__ = __email__
+
+
+# Imports #
+# Standard Libraries #
+import threading
+
+# Downloaded Libraries #
+import pytest
+
+# Local Libraries #
+from src.BehaviorTaskMaster.utility.eventlogger import HDF5eventLogger
+from src.BehaviorTaskMaster.utility.logarchiver import LogArchiver, file_checksum
+
+
+# Definitions #
+# Functions #
+def staged_file(archiver, name="session.h5", data=b"events" * 1000):
+    path = archiver.stage_path(name)
+    path.write_bytes(data)
+    return path
+
+
+# Tests #
+def test_copy_file(tmp_path):
+    archiver = LogArchiver(staging=tmp_path / "staging", archive=tmp_path / "archive", chunk_size=64)
+    path = staged_file(archiver)
+    checksum = archiver.copy_file(path)
+
+    copy_ = tmp_path / "archive" / "session.h5"
+    assert copy_.read_bytes() == path.read_bytes()
+    assert checksum == file_checksum(path) == file_checksum(copy_)
+    assert (tmp_path / "archive" / "session.h5.sha256").read_text() == checksum + "  session.h5\n"
+    assert not (tmp_path / "archive" / "session.h5.partial").exists()
+
+
+def test_archive_file_retries(tmp_path, monkeypatch):
+    archiver = LogArchiver(staging=tmp_path / "staging", archive=tmp_path / "archive", retries=3)
+    path = staged_file(archiver)
+    copy_file = archiver.copy_file
+    attempts = []
+
+    def flaky_copy(path_):
+        attempts.append(path_)
+        if len(attempts) < 3:
+            raise OSError("the archive is not reachable")
+        return copy_file(path_)
+
+    monkeypatch.setattr(archiver, "copy_file", flaky_copy)
+    assert archiver.archive_file(path) == file_checksum(tmp_path / "archive" / "session.h5")
+    assert len(attempts) == 3
+    assert not path.exists()
+    assert archiver.stats()["archived"] == 1 and archiver.failed == []
+
+
+def test_failed_archive_keeps_staged(tmp_path, monkeypatch):
+    archiver = LogArchiver(staging=tmp_path / "staging", archive=tmp_path / "archive", retries=2)
+    path = staged_file(archiver)
+
+    def failing_copy(path_):
+        raise OSError("the archive is not reachable")
+
+    monkeypatch.setattr(archiver, "copy_file", failing_copy)
+    with pytest.warns(UserWarning, match="Could not archive"):
+        assert archiver.archive_file(path) is None
+    assert path.exists()
+    assert archiver.failed == [path]
+
+
+def test_closed_log_archived(tmp_path, monkeypatch):
+    archiver = LogArchiver(staging=tmp_path / "staging", archive=tmp_path / "archive")
+    copying = threading.Event()
+    copied = threading.Event()
+    copy_file = archiver.copy_file
+
+    def held_copy(path_):
+        copying.set()
+        copied.wait(10)
+        return copy_file(path_)
+
+    monkeypatch.setattr(archiver, "copy_file", held_copy)
+    logger = HDF5eventLogger(tmp_path / "session.h5", archiver=archiver)
+    logger.construct()
+    staged = logger.path
+    assert staged.parent == tmp_path / "staging"
+    logger.open()
+    logger.set_time()
+    logger.append("Sample", Value=1)
+    logger.close()
+
+    # The staged file is read until its copy is verified
+    assert copying.wait(10)
+    assert logger.path == staged and len(logger) == 2
+    assert logger.find_event(logger[1]["Time"], "Sample")[1]["Value"] == 1
+    copied.set()
+    archiver.join()
+
+    # Then the logger follows its log into the archive
+    assert not staged.exists()
+    assert logger.path == tmp_path / "archive" / "session.h5"
+    assert [event["Value"] for event in logger.get_event_type("Sample")] == [1]
+    logger.close()
+    archiver.stop()
+
+
+def test_open_staged_file_kept(tmp_path):
+    # Without an archive directory closing the log archives nothing, the copies are made here instead
+    archiver = LogArchiver(staging=tmp_path / "staging")
+    logger = HDF5eventLogger(tmp_path / "session.h5", archiver=archiver)
+    logger.construct()
+    staged = logger.path
+    logger.open()
+    logger.set_time()
+    logger.close()
+    archiver.archive = tmp_path / "archive"
+
+    # A staged file that is still open is copied but left in place
+    logger.open()
+    assert archiver.archive_file(staged, logger.archived) is not None
+    assert staged.exists() and logger.path == staged
+    logger.release()
+    assert archiver.archive_file(staged, logger.archived) is not None
+    assert not staged.exists() and logger.path == tmp_path / "archive" / "session.h5"